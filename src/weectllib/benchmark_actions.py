@@ -0,0 +1,457 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your rights.
+#
+"""Benchmark the hot paths of WeeWX against synthetic databases.
+
+A database with a given number of years of synthetic data is built from scratch, then the time
+taken by each of the following is measured:
+
+- Adding records to the archive, both in bulk and one at a time, as the engine does;
+- Backfilling the daily summaries;
+- Calculating aggregates with xtypes.get_aggregate(), for each type of aggregation;
+- Calculating series with xtypes.get_series();
+- Adding LOOP packets to an accumulator;
+- Running the CheetahGenerator and the ImageGenerator of a skin.
+
+The data are a deterministic function of time, so that the results of two runs are comparable.
+They are written as JSON.
+"""
+
+import contextlib
+import datetime
+import json
+import logging
+import math
+import os
+import os.path
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import weeutil.config
+import weeutil.weeutil
+import weewx
+import weewx.accum
+import weewx.engine
+import weewx.manager
+import weewx.reportengine
+import weewx.station
+import weewx.wxformulas
+import weewx.xtypes
+from weeutil.weeutil import TimeSpan
+
+log = logging.getLogger('weectl-debug')
+
+# The synthetic data end at the start of this day, local time.
+STOP_TT = (2025, 1, 1, 0, 0, 0, 0, 0, -1)
+
+# The aggregations to be timed, as (obs_type, aggregate_type)
+AGGREGATES = [
+    ('outTemp', 'avg'),
+    ('outTemp', 'count'),
+    ('outTemp', 'first'),
+    ('outTemp', 'last'),
+    ('outTemp', 'max'),
+    ('outTemp', 'maxtime'),
+    ('outTemp', 'meanmax'),
+    ('outTemp', 'meanmin'),
+    ('outTemp', 'min'),
+    ('outTemp', 'mintime'),
+    ('outTemp', 'not_null'),
+    ('outTemp', 'median'),
+    ('outTemp', 'p95'),
+    ('rain', 'sum'),
+    ('wind', 'gustdir'),
+    ('wind', 'rms'),
+    ('wind', 'vecavg'),
+    ('wind', 'vecdir'),
+]
+
+# The periods over which the aggregations are calculated
+AGGREGATE_SPANS = ['day', 'month', 'year', 'all']
+
+# The series to be timed, as (obs_type, span, aggregate_type, aggregate_interval). These are the
+# series plotted by the Seasons skin.
+SERIES = [
+    ('outTemp', 'day', None, None),
+    ('outTemp', 'week', 'avg', 3600),
+    ('outTemp', 'month', 'avg', 10800),
+    ('outTemp', 'year', 'avg', 86400),
+    ('rain', 'year', 'sum', 86400),
+    ('windvec', 'week', 'max', 3600),
+]
+
+# The generators to be timed
+GENERATORS = ['weewx.cheetahgenerator.CheetahGenerator',
+              'weewx.imagegenerator.ImageGenerator']
+
+
+def benchmark(config_dict, years=(1,), interval=300, repeat=3, skin='Seasons', loop_packets=10000,
+              work_dir=None, keep=False, output=None):
+    """Run the benchmarks, once for each database size.
+
+    Args:
+        config_dict (dict): The configuration dictionary. Used for the database schema and the
+            location of the skins. The station's own database is not touched.
+        years (list[int]): The sizes of the synthetic databases, in years.
+        interval (int): The archive interval of the synthetic data, in seconds.
+        repeat (int): How many times each query is run. The best time is kept.
+        skin (str): The skin whose generators are to be timed.
+        loop_packets (int): How many LOOP packets to add to the accumulator.
+        work_dir (str|None): Where to put the databases and the generated files, in a
+            subdirectory for each size, such as '1y'. None of these may exist already. Default
+            is a temporary directory.
+        keep (bool): True to keep the databases and the generated files. Otherwise, only what
+            this run made is removed.
+        output (str|None): Path to where the results will be put. Default is stdout.
+
+    Raises:
+        weewx.ViolatedPrecondition: If the subdirectory of a size already exists in work_dir.
+    """
+
+    results = {
+        'weewx_version': weewx.__version__,
+        'python_version': platform.python_version(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'parameters': {
+            'interval': interval,
+            'repeat': repeat,
+            'skin': skin,
+            'loop_packets': loop_packets,
+        },
+        'results': [],
+    }
+
+    if work_dir:
+        # Anything that was in the directory before is left alone
+        for nyears in years:
+            size_dir = os.path.join(work_dir, f'{nyears}y')
+            if os.path.exists(size_dir):
+                raise weewx.ViolatedPrecondition(f"Directory {size_dir} already exists. Remove "
+                                                 f"it, or use another work directory.")
+        root = work_dir
+        os.makedirs(root, exist_ok=True)
+    else:
+        root = tempfile.mkdtemp(prefix='weewx-benchmark-')
+
+    # The directories of the database sizes made by this run
+    size_dirs = []
+    try:
+        for nyears in years:
+            size_dir = os.path.join(root, f'{nyears}y')
+            if size_dir in size_dirs:
+                # The same size was given twice
+                shutil.rmtree(size_dir)
+            else:
+                size_dirs.append(size_dir)
+            results['results'].append(run_size(config_dict, nyears, interval, repeat, skin,
+                                               loop_packets, size_dir))
+    finally:
+        if keep:
+            progress(f"Databases and generated files kept in {root}")
+        elif work_dir:
+            for size_dir in size_dirs:
+                shutil.rmtree(size_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if output:
+        sink = open(output, 'wt')
+    else:
+        sink = contextlib.nullcontext(sys.stdout)
+    with sink as fd:
+        json.dump(results, fd, indent=2)
+        print(file=fd)
+
+
+def run_size(config_dict, years, interval, repeat, skin, loop_packets, work_dir):
+    """Build a database with the given number of years of data, then time everything against it.
+
+    Returns:
+        dict: The results for this size.
+    """
+    # The directory must be new, so that nothing is lost when it is removed
+    os.makedirs(work_dir)
+    bench_dict = make_config(config_dict, skin, interval, work_dir)
+
+    stop_ts = int(time.mktime(STOP_TT))
+    start_ts = stop_ts - years * 365 * 86400
+    # Start on a day boundary
+    start_ts = weeutil.weeutil.startOfDay(start_ts) + interval
+    result = {'years': years}
+
+    progress(f"Building a database with {years} year(s) of data in {work_dir}")
+    # Like weewx/tests/gen_fake_data.py, build the archive first, then backfill the daily
+    # summaries. Use a plain Manager for the former.
+    archive_dict = weeutil.config.deep_copy(bench_dict)
+    archive_dict['DataBindings']['wx_binding']['manager'] = 'weewx.manager.Manager'
+    with weewx.manager.open_manager_with_config(archive_dict, 'wx_binding',
+                                                initialize=True) as archive:
+        t0 = time.perf_counter()
+        nrecs = archive.addRecord(gen_records(start_ts, stop_ts, interval),
+                                  log_success=False)
+        elapsed = time.perf_counter() - t0
+    result['records'] = nrecs
+    result['add_record_bulk'] = rate(elapsed, nrecs, 'records')
+
+    progress("Backfilling the daily summaries")
+    with weewx.manager.open_manager_with_config(bench_dict, 'wx_binding',
+                                                initialize=True) as db_manager:
+        t0 = time.perf_counter()
+        nrecs, ndays = db_manager.backfill_day_summary(progress_fn=None)
+        elapsed = time.perf_counter() - t0
+        result['backfill_day_summary'] = rate(elapsed, nrecs, 'records')
+        result['backfill_day_summary']['days'] = ndays
+
+    # The xtypes extensions, such as the one that calculates 'windvec', are loaded by the engine.
+    engine = weewx.engine.DummyEngine(bench_dict)
+    try:
+        with weewx.manager.open_manager_with_config(bench_dict, 'wx_binding') as db_manager:
+            progress("Timing get_aggregate()")
+            result['get_aggregate'] = time_aggregates(db_manager, start_ts, stop_ts, repeat)
+            progress("Timing get_series()")
+            result['get_series'] = time_series(db_manager, stop_ts, repeat)
+
+        progress("Timing the accumulator")
+        result['accumulator'] = time_accumulator(stop_ts, loop_packets)
+
+        progress(f"Timing the generators of skin {skin}")
+        result['generators'] = time_generators(bench_dict, stop_ts)
+
+        progress("Timing add_record, one record at a time")
+        with weewx.manager.open_manager_with_config(bench_dict, 'wx_binding') as db_manager:
+            result['add_record_single'] = time_add_single(db_manager, stop_ts, interval)
+    finally:
+        engine.shutDown()
+
+    result['database_bytes'] = os.path.getsize(os.path.join(work_dir, 'benchmark.sdb'))
+    return result
+
+
+def make_config(config_dict, skin, interval, work_dir):
+    """Make a copy of the configuration dictionary that uses a SQLite database and an HTML
+    directory in work_dir, and a single report, which uses the given skin."""
+    bench_dict = weeutil.config.deep_copy(config_dict)
+
+    bench_dict['Databases']['benchmark_sqlite'] = {
+        'database_name': os.path.join(work_dir, 'benchmark.sdb'),
+        'database_type': 'SQLite',
+    }
+    binding = bench_dict['DataBindings']['wx_binding']
+    binding['database'] = 'benchmark_sqlite'
+    binding['table_name'] = 'archive'
+    binding['manager'] = 'weewx.manager.DaySummaryManager'
+    bench_dict['StdArchive']['archive_interval'] = interval
+    bench_dict['StdArchive']['data_binding'] = 'wx_binding'
+
+    # Load only the services that extend xtypes. Nothing is uploaded or reported.
+    services = bench_dict['Engine']['Services']
+    for group in list(services.scalars):
+        if group != 'xtype_services':
+            services[group] = ''
+
+    std_report = bench_dict['StdReport']
+    for report in list(std_report.sections):
+        if report != 'Defaults':
+            del std_report[report]
+    std_report['HTML_ROOT'] = os.path.join(work_dir, 'html')
+    std_report['Benchmark'] = {
+        'skin': skin,
+        'enable': True,
+        'HTML_ROOT': os.path.join(work_dir, 'html'),
+    }
+    return bench_dict
+
+
+def gen_records(start_ts, stop_ts, interval):
+    """Generate synthetic archive records, from start_ts to stop_ts inclusive. The values are
+    smooth functions of time, with daily, annual, and 4-day "weather" cycles."""
+    for ts in range(start_ts, stop_ts + 1, interval):
+        yield make_record(ts, interval)
+
+
+def make_record(ts, interval):
+    """Make a synthetic record, in US units, for time ts."""
+    daily_phase = ts * 2.0 * math.pi / 86400.0
+    annual_phase = ts * 2.0 * math.pi / (86400.0 * 365.25)
+    weather_phase = ts * 2.0 * math.pi / (86400.0 * 4)
+    weather = math.sin(weather_phase)
+
+    out_temp = -20.0 * math.sin(daily_phase) - 40.0 * math.cos(annual_phase) + 50.0
+    out_humidity = 40.0 * weather + 50.0
+    wind_speed = 10.0 * (1.0 + weather)
+    radiation = max(800.0 * math.sin(daily_phase - math.pi / 2.0), 0.0) \
+                * 0.5 * (math.cos(annual_phase + math.pi) + 1.5)
+    if weather > 0.95:
+        rain = 0.08 if weather > 0.98 else 0.04
+    else:
+        rain = 0.0
+    record = {
+        'dateTime': ts,
+        'usUnits': weewx.US,
+        'interval': interval // 60,
+        'outTemp': out_temp,
+        'outHumidity': out_humidity,
+        'dewpoint': weewx.wxformulas.dewpointF(out_temp, out_humidity),
+        'windchill': weewx.wxformulas.windchillF(out_temp, wind_speed),
+        'heatindex': weewx.wxformulas.heatindexF(out_temp, out_humidity),
+        'inTemp': 68.0 + 2.0 * math.sin(daily_phase),
+        'inHumidity': 45.0,
+        'barometer': 30.0 - weather,
+        'pressure': 29.2 - weather,
+        'altimeter': 30.0 - weather,
+        'windSpeed': wind_speed,
+        'windDir': math.degrees(weather_phase) % 360.0,
+        'windGust': 1.2 * wind_speed,
+        'windGustDir': math.degrees(weather_phase) % 360.0,
+        'rain': rain,
+        'rainRate': rain * 3600.0 / interval,
+        'radiation': radiation,
+        'UV': radiation / 100.0,
+    }
+    return record
+
+
+def time_aggregates(db_manager, start_ts, stop_ts, repeat):
+    """Time each aggregation over each span. Returns the best time, in seconds, keyed by
+    'obs_type.aggregate_type', then by span."""
+    spans = {
+        'day': weeutil.weeutil.archiveDaySpan(stop_ts),
+        'month': weeutil.weeutil.archiveMonthSpan(stop_ts),
+        'year': weeutil.weeutil.archiveYearSpan(stop_ts),
+        'all': TimeSpan(weeutil.weeutil.startOfDay(start_ts), stop_ts),
+    }
+    results = {}
+    for obs_type, aggregate_type in AGGREGATES:
+        timings = results[f'{obs_type}.{aggregate_type}'] = {}
+        for span in AGGREGATE_SPANS:
+            try:
+                timings[span] = best_of(repeat, weewx.xtypes.get_aggregate, obs_type,
+                                        spans[span], aggregate_type, db_manager)
+            except (weewx.UnknownType, weewx.UnknownAggregation, weewx.CannotCalculate) as e:
+                log.debug("Cannot time %s.%s: %s", obs_type, aggregate_type, e)
+                timings[span] = None
+    return results
+
+
+def time_series(db_manager, stop_ts, repeat):
+    """Time each series. Returns the best time, in seconds, keyed by a description of the
+    series."""
+    lengths = {'day': 86400, 'week': 7 * 86400, 'month': 31 * 86400, 'year': 365 * 86400}
+    results = {}
+    for obs_type, span, aggregate_type, aggregate_interval in SERIES:
+        name = f'{obs_type}.{span}'
+        if aggregate_type:
+            name += f'.{aggregate_type}.{aggregate_interval}'
+        timespan = TimeSpan(stop_ts - lengths[span], stop_ts)
+        try:
+            results[name] = best_of(repeat, weewx.xtypes.get_series, obs_type, timespan,
+                                    db_manager, aggregate_type, aggregate_interval)
+        except (weewx.UnknownType, weewx.UnknownAggregation, weewx.CannotCalculate) as e:
+            log.debug("Cannot time series %s: %s", name, e)
+            results[name] = None
+    return results
+
+
+def time_accumulator(stop_ts, loop_packets):
+    """Time adding LOOP packets, 2 seconds apart, to an accumulator, then extracting a record
+    from it."""
+    start_ts = weeutil.weeutil.startOfDay(stop_ts)
+    # The packets are made in advance, so that only the accumulator is timed
+    packets = [make_record(start_ts + 2 * (i + 1), 2) for i in range(loop_packets)]
+    for packet in packets:
+        del packet['interval']
+    accum = weewx.accum.Accum(TimeSpan(start_ts, packets[-1]['dateTime']))
+
+    t0 = time.perf_counter()
+    for packet in packets:
+        accum.addRecord(packet)
+    elapsed = time.perf_counter() - t0
+    result = rate(elapsed, loop_packets, 'packets')
+
+    t0 = time.perf_counter()
+    accum.getRecord()
+    result['get_record_seconds'] = time.perf_counter() - t0
+    return result
+
+
+def time_generators(bench_dict, stop_ts):
+    """Time each generator of the benchmark report. Returns the time, in seconds, and the number
+    of files in HTML_ROOT afterwards."""
+    skin_dict = weewx.reportengine.build_skin_dict(bench_dict, 'Benchmark')
+    stn_info = weewx.station.StationInfo(**bench_dict['Station'])
+    with weewx.manager.open_manager_with_config(bench_dict, 'wx_binding') as db_manager:
+        record = db_manager.getRecord(stop_ts)
+    html_root = os.path.join(bench_dict['WEEWX_ROOT'], skin_dict['HTML_ROOT'])
+
+    results = {}
+    # As StdReportEngine.run_generators() does, run from the skin directory, and in the
+    # skin's locale.
+    with weewx.reportengine.set_cwd(os.path.join(bench_dict['WEEWX_ROOT'],
+                                                 skin_dict['SKIN_ROOT'],
+                                                 skin_dict['skin'])), \
+            weewx.reportengine.set_locale(skin_dict.get('lang', '')):
+        for generator in GENERATORS:
+            obj = weeutil.weeutil.get_object(generator)(bench_dict, skin_dict, stop_ts, True,
+                                                        stn_info, record)
+            t0 = time.perf_counter()
+            try:
+                obj.start()
+            finally:
+                obj.finalize()
+            elapsed = time.perf_counter() - t0
+            results[generator.rsplit('.', 1)[-1]] = {
+                'seconds': elapsed,
+                'files': count_files(html_root),
+            }
+    return results
+
+
+def time_add_single(db_manager, stop_ts, interval):
+    """Time adding a day of records after stop_ts, one record at a time, each in its own
+    transaction, as the engine does."""
+    records = [make_record(ts, interval)
+               for ts in range(stop_ts + interval, stop_ts + 86400 + 1, interval)]
+    t0 = time.perf_counter()
+    for record in records:
+        db_manager.addRecord(record, log_success=False)
+    elapsed = time.perf_counter() - t0
+    return rate(elapsed, len(records), 'records')
+
+
+def best_of(repeat, func, *args):
+    """Call func repeat times. Returns the shortest time, in seconds."""
+    best = None
+    for _ in range(max(repeat, 1)):
+        t0 = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def rate(elapsed, count, what):
+    """Returns a dictionary with the elapsed time, the count, and the count per second."""
+    return {
+        'seconds': elapsed,
+        what: count,
+        f'{what}_per_second': count / elapsed if elapsed else None,
+    }
+
+
+def count_files(directory):
+    """Count the files in a directory tree."""
+    return sum(len(files) for _, _, files in os.walk(directory))
+
+
+def progress(msg):
+    """Progress messages go to stderr, so that the results can go to stdout."""
+    print(msg, file=sys.stderr)
@@ -79,8 +79,17 @@ def rebuild_daily(config_dict,
                   to_date=None,
                   db_binding='wx_binding',
                   dry_run=False,
-                  no_confirm=False):
-    """Rebuild the daily summaries."""
+                  no_confirm=False,
+                  workers=1,
+                  rollups=None,
+                  sketches=None):
+    """Rebuild the daily summaries.
+
+    If rollups is given, it is a comma-separated list of the spans of the rollups to be kept
+    besides the daily summaries, such as 'hour,month'. Otherwise, the rollups in the schema of
+    the binding are used. Likewise, sketches is a comma-separated list of the types whose values
+    are to be sketched, such as 'outTemp,windSpeed'.
+    """
 
     manager_dict = weewx.manager.get_manager_dict_from_config(config_dict, db_binding)
     database_name = manager_dict['database_dict']['database_name']
@@ -127,18 +136,38 @@ def rebuild_daily(config_dict,
     if 'windSpeed' in sqlkeys:
         # For backwards compatibility, include 'wind'
         day_summaries_schemas += [('wind', 'vector')]
+    schema = manager_dict['schema']
+    if rollups is None:
+        rollups = schema.get('rollups', []) if isinstance(schema, dict) else []
+    else:
+        rollups = [span.strip() for span in rollups.split(',') if span.strip()]
+    if sketches is None:
+        sketches = schema.get('sketches', []) if isinstance(schema, dict) else []
+    else:
+        sketches = [obs_type.strip() for obs_type in sketches.split(',') if obs_type.strip()]
     # Replace the static schema with the one we just built:
-    manager_dict['schema'] = {'day_summaries': day_summaries_schemas}
+    manager_dict['schema'] = {'day_summaries': day_summaries_schemas,
+                              'rollups': rollups,
+                              'sketches': sketches}
 
     # Open up the database. Use initialize=True, so the daily summary tables will be created:
     with weewx.manager.open_manager(manager_dict, initialize=True) as dbm:
+        missing = [span for span in rollups if not dbm.rollupkeys.get(span)]
+        if missing:
+            print(f"The daily summaries already exist, so rollups {', '.join(missing)} cannot "
+                  f"be added. Drop the daily summaries first.", file=sys.stderr)
+        missing = [obs_type for obs_type in sketches if obs_type not in dbm.sketchkeys]
+        if missing:
+            print(f"The daily summaries already exist, so sketches of {', '.join(missing)} "
+                  f"cannot be added. Drop the daily summaries first.", file=sys.stderr)
         if dry_run:
             nrecs = ndays = 0
         else:
             # Do the actual rebuild
             nrecs, ndays = dbm.backfill_day_summary(start_d=from_d,
                                                     stop_d=to_d,
-                                                    trans_days=20)
+                                                    trans_days=20,
+                                                    workers=workers)
     tdiff = time.time() - t1
     # advise the user/log what we did
     log.info(f"Rebuild of daily summaries in database '{database_name}' complete.")
@@ -387,8 +416,10 @@ def transfer_database(config_dict,
                     logging.disable(logging.INFO)
 
                     # do the transfer, should be quick as it's done as a
-                    # single transaction
-                    nrecs = dest_manager.addRecord(src_manager.genBatchRecords(),
+                    # single transaction. Fetch the source records a batch at a time, so a big
+                    # MySQL archive does not have to be held in memory.
+                    records = src_manager.genBatchRecords(fetch_size=dest_manager.batch_size)
+                    nrecs = dest_manager.addRecord(records,
                                                    progress_fn=weewx.manager.show_progress)
 
                     # Remove the temporary restriction
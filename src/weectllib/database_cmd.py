@@ -20,6 +20,7 @@ drop_daily_usage = f"""{bcolors.BOLD}weectl database drop-daily
             [--dry-run] [-y]{bcolors.ENDC}"""
 rebuild_usage = f"""{bcolors.BOLD}weectl database rebuild-daily
             [[--date=YYYY-mm-dd] | [--from=YYYY-mm-dd] [--to=YYYY-mm-dd]]
+            [--workers=N] [--rollups=SPANS] [--sketches=TYPES]
             [--config=FILENAME] [--binding=BINDING-NAME] 
             [--dry-run] [-y]{bcolors.ENDC}"""
 add_column_usage = f"""{bcolors.BOLD}weectl database add-column NAME
@@ -140,6 +141,24 @@ def add_subparser(subparsers):
                                 metavar="YYYY-mm-dd",
                                 dest='to_date',
                                 help="Rebuild ending with this date.")
+    rebuild_parser.add_argument("--workers",
+                                type=int,
+                                default=1,
+                                metavar="N",
+                                help="Summarize the archive data using N worker processes. "
+                                     "Default is 1.")
+    rebuild_parser.add_argument("--rollups",
+                                metavar="SPANS",
+                                help="Also keep summaries by these spans of time. Either 'hour', "
+                                     "'month', or 'hour,month'. Only used when the daily "
+                                     "summaries are created. Default is to use the spans in "
+                                     "the schema, if any.")
+    rebuild_parser.add_argument("--sketches",
+                                metavar="TYPES",
+                                help="Also keep sketches of the values of these types, for "
+                                     "percentiles. For example, 'outTemp,windSpeed'. Only used "
+                                     "when the daily summaries are created. Default is to use "
+                                     "the types in the schema, if any.")
     _add_common_args(rebuild_parser)
     rebuild_parser.set_defaults(func=weectllib.dispatch)
     rebuild_parser.set_defaults(action_func=rebuild_daily)
@@ -331,7 +350,10 @@ def rebuild_daily(config_dict, namespace):
                                              to_date=namespace.to_date,
                                              db_binding=namespace.binding,
                                              dry_run=namespace.dry_run,
-                                             no_confirm=namespace.yes)
+                                             no_confirm=namespace.yes,
+                                             workers=namespace.workers,
+                                             rollups=namespace.rollups,
+                                             sketches=namespace.sketches)
 
 
 def add_column(config_dict, namespace):
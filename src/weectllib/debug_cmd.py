@@ -5,14 +5,39 @@
 #
 """Generate weewx debug info"""
 
+import sys
+
 import weecfg
 import weecfg.extension
+import weectllib.benchmark_actions
 import weectllib.debug_actions
+import weewx
 from weeutil.weeutil import bcolors
 
 debug_usage = f"""{bcolors.BOLD}weectl debug
             [--config=FILENAME]
             [--output=FILENAME]{bcolors.ENDC}
+       {bcolors.BOLD}weectl debug benchmark
+            [--config=FILENAME]
+            [--years=N[,N...]] [--interval=SECONDS]
+            [--repeat=N] [--skin=SKIN] [--loop-packets=N]
+            [--work-dir=DIR] [--keep]
+            [--output=FILENAME]{bcolors.ENDC}
+"""
+
+benchmark_usage = f"""{bcolors.BOLD}weectl debug benchmark
+            [--config=FILENAME]
+            [--years=N[,N...]] [--interval=SECONDS]
+            [--repeat=N] [--skin=SKIN] [--loop-packets=N]
+            [--work-dir=DIR] [--keep]
+            [--output=FILENAME]{bcolors.ENDC}
+"""
+
+benchmark_description = """
+Build synthetic SQLite databases with the given number of years of data, then
+time adding records, backfilling the daily summaries, calculating aggregates
+and series, accumulating LOOP packets, and running the generators of a skin.
+The results are written as JSON. The station's own database is not touched.
 """
 
 debug_description = """
@@ -42,13 +67,94 @@ def add_subparser(subparsers):
                               metavar='FILENAME',
                               help=f'Path to configuration file. '
                                    f'Default is "{weecfg.default_config_path}".')
+    # The action 'benchmark' has an option --output of its own, so use a different dest, to
+    # tell whether this one was given before the action.
     debug_parser.add_argument('--output',
+                              dest='debug_output',
                               metavar="FILENAME",
                               help="Redirect output to FILENAME. Default is "
                                    "standard output.")
     debug_parser.set_defaults(func=weectllib.dispatch)
     debug_parser.set_defaults(action_func=debug)
 
+    # The action 'benchmark' is optional. Without it, the debug info is generated.
+    # In the following, the 'prog' argument is necessary to get a proper error message.
+    # See Python issue https://bugs.python.org/issue42297
+    action_parser = debug_parser.add_subparsers(dest='action',
+                                                prog='weectl debug',
+                                                title="Optional action")
+
+    # ---------- Action 'benchmark' ----------
+    benchmark_parser = action_parser.add_parser('benchmark',
+                                                usage=benchmark_usage,
+                                                description=benchmark_description,
+                                                help="Benchmark WeeWX against synthetic "
+                                                     "databases.")
+    benchmark_parser.add_argument('--config',
+                                  metavar='FILENAME',
+                                  help=f'Path to configuration file. '
+                                       f'Default is "{weecfg.default_config_path}".')
+    benchmark_parser.add_argument('--years',
+                                  metavar='N[,N...]',
+                                  default='1',
+                                  help="The sizes of the synthetic databases, in years, "
+                                       "separated by commas. Default is 1.")
+    benchmark_parser.add_argument('--interval',
+                                  type=int,
+                                  metavar='SECONDS',
+                                  default=300,
+                                  help="The archive interval of the synthetic data. "
+                                       "Default is 300.")
+    benchmark_parser.add_argument('--repeat',
+                                  type=int,
+                                  metavar='N',
+                                  default=3,
+                                  help="How many times to run each query. The best time is "
+                                       "reported. Default is 3.")
+    benchmark_parser.add_argument('--skin',
+                                  default='Seasons',
+                                  help="The skin whose generators are to be timed. "
+                                       "Default is 'Seasons'.")
+    benchmark_parser.add_argument('--loop-packets',
+                                  type=int,
+                                  metavar='N',
+                                  default=10000,
+                                  help="How many LOOP packets to accumulate. Default is 10000.")
+    benchmark_parser.add_argument('--work-dir',
+                                  metavar='DIR',
+                                  help="Where to put the databases and generated files. "
+                                       "Default is a temporary directory.")
+    benchmark_parser.add_argument('--keep',
+                                  action='store_true',
+                                  help="Keep the databases and generated files.")
+    benchmark_parser.add_argument('--output',
+                                  metavar="FILENAME",
+                                  help="Write the results to FILENAME. Default is "
+                                       "standard output.")
+    benchmark_parser.set_defaults(func=weectllib.dispatch)
+    benchmark_parser.set_defaults(action_func=benchmark)
+
 
 def debug(config_dict, namespace):
-    weectllib.debug_actions.debug(config_dict, output=namespace.output)
+    weectllib.debug_actions.debug(config_dict, output=namespace.debug_output)
+
+
+def benchmark(config_dict, namespace):
+    if namespace.debug_output:
+        sys.exit("Option --output must be given after the action 'benchmark'.")
+    try:
+        years = [int(y) for y in namespace.years.split(',')]
+    except ValueError:
+        sys.exit(f"Invalid --years option: {namespace.years}")
+    try:
+        weectllib.benchmark_actions.benchmark(config_dict,
+                                              years=years,
+                                              interval=namespace.interval,
+                                              repeat=namespace.repeat,
+                                              skin=namespace.skin,
+                                              loop_packets=namespace.loop_packets,
+                                              work_dir=namespace.work_dir,
+                                              keep=namespace.keep,
+                                              output=namespace.output)
+    except weewx.ViolatedPrecondition as e:
+        sys.exit(str(e))
@@ -0,0 +1,121 @@
+#
+#      Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#      See the file LICENSE.txt for your full rights.
+#
+"""Test module weectllib.benchmark_actions"""
+
+import argparse
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import configobj
+
+import weewx
+import weewx.manager
+import weewx_data
+from weectllib import benchmark_actions, debug_cmd
+
+config_path = os.path.join(os.path.dirname(weewx_data.__file__), 'weewx.conf')
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        config_dict = configobj.ConfigObj(config_path, encoding='utf-8')
+        config_dict['WEEWX_ROOT'] = self.work_dir
+        self.bench_dict = benchmark_actions.make_config(config_dict, 'Seasons', 300,
+                                                        self.work_dir)
+        self.stop_ts = int(time.mktime(benchmark_actions.STOP_TT))
+        self.start_ts = self.stop_ts - 3 * 86400 + 300
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_make_config(self):
+        self.assertEqual(self.bench_dict['DataBindings']['wx_binding']['database'],
+                         'benchmark_sqlite')
+        self.assertEqual(sorted(self.bench_dict['StdReport'].sections), ['Benchmark', 'Defaults'])
+        self.assertEqual(self.bench_dict['Engine']['Services']['restful_services'], '')
+
+    def test_records(self):
+        records = list(benchmark_actions.gen_records(self.start_ts, self.stop_ts, 300))
+        self.assertEqual(len(records), 3 * 288)
+        self.assertEqual(records[-1]['dateTime'], self.stop_ts)
+        # The data must be the same from one run to the next
+        self.assertEqual(records, list(benchmark_actions.gen_records(self.start_ts,
+                                                                     self.stop_ts, 300)))
+
+    def test_timings(self):
+        with weewx.manager.open_manager_with_config(self.bench_dict, 'wx_binding',
+                                                    initialize=True) as db_manager:
+            db_manager.addRecord(benchmark_actions.gen_records(self.start_ts, self.stop_ts, 300),
+                                 log_success=False)
+            aggregates = benchmark_actions.time_aggregates(db_manager, self.start_ts,
+                                                           self.stop_ts, 1)
+            series = benchmark_actions.time_series(db_manager, self.stop_ts, 1)
+
+        self.assertEqual(len(aggregates), len(benchmark_actions.AGGREGATES))
+        for timings in aggregates.values():
+            self.assertEqual(sorted(timings), sorted(benchmark_actions.AGGREGATE_SPANS))
+        # Every aggregation can be calculated over days, months, and years
+        self.assertNotIn(None, [aggregates[agg][span]
+                                for agg in aggregates for span in ('day', 'month', 'year')])
+        self.assertEqual(len(series), len(benchmark_actions.SERIES))
+        self.assertIsNotNone(series['outTemp.week.avg.3600'])
+
+        accum = benchmark_actions.time_accumulator(self.stop_ts, 100)
+        self.assertEqual(accum['packets'], 100)
+
+    @staticmethod
+    def fake_run_size(config_dict, years, interval, repeat, skin, loop_packets, work_dir):
+        os.makedirs(work_dir)
+        with open(os.path.join(work_dir, 'benchmark.sdb'), 'w'):
+            pass
+        return {'years': years}
+
+    def test_work_dir(self):
+        """Only what the benchmark made in the work directory is removed"""
+        notes = os.path.join(self.work_dir, 'notes.txt')
+        with open(notes, 'w') as fd:
+            fd.write('Not to be removed')
+        with mock.patch.object(benchmark_actions, 'run_size',
+                               side_effect=BenchmarkTest.fake_run_size) as run_size:
+            benchmark_actions.benchmark({}, years=[1, 2], work_dir=self.work_dir,
+                                        output=os.devnull)
+        self.assertEqual(run_size.call_count, 2)
+        self.assertTrue(os.path.exists(notes))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, '1y')))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, '2y')))
+
+    def test_work_dir_exists(self):
+        """The benchmark refuses to run if the directory of a size already exists"""
+        size_dir = os.path.join(self.work_dir, '2y')
+        os.makedirs(size_dir)
+        with mock.patch.object(benchmark_actions, 'run_size',
+                               side_effect=BenchmarkTest.fake_run_size) as run_size:
+            with self.assertRaises(weewx.ViolatedPrecondition):
+                benchmark_actions.benchmark({}, years=[1, 2], work_dir=self.work_dir,
+                                            output=os.devnull)
+        run_size.assert_not_called()
+        self.assertTrue(os.path.isdir(size_dir))
+
+    def test_output_before_action(self):
+        """Option --output of 'weectl debug' cannot be given before the action 'benchmark'"""
+        parser = argparse.ArgumentParser()
+        debug_cmd.add_subparser(parser.add_subparsers())
+        namespace = parser.parse_args(['debug', '--output=x', 'benchmark'])
+        with self.assertRaises(SystemExit):
+            debug_cmd.benchmark({}, namespace)
+        namespace = parser.parse_args(['debug', 'benchmark', '--output=x'])
+        self.assertEqual(namespace.output, 'x')
+        self.assertIsNone(namespace.debug_output)
+
+
+if __name__ == '__main__':
+    unittest.main()
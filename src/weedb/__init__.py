@@ -126,8 +126,12 @@ class Connection:
         self.database_name = database_name
         self.dbtype = dbtype
 
-    def cursor(self):
-        """Returns an appropriate database cursor."""
+    def cursor(self, server_side=False):
+        """Returns an appropriate database cursor.
+
+        If server_side is True, and the database supports it, the result set of a query is kept
+        by the server, and sent as it is fetched, instead of all at once. Until the result set
+        has been fetched in full, the connection cannot be used for anything else."""
         raise NotImplementedError
 
     def execute(self, sql_string, sql_tuple=()):
@@ -9,9 +9,11 @@ import decimal
 
 try:
     import MySQLdb
+    import MySQLdb.cursors
 except ImportError:
     # Maybe the user has "pymysql", a pure-Python version?
     import pymysql as MySQLdb
+    import pymysql.cursors
     from pymysql import DatabaseError as MySQLDatabaseError
 else:
     try:
@@ -65,8 +67,10 @@ def guard(fn):
 
 
 def connect(host='localhost', user='', password='', database_name='',
-            driver='', port=3306, engine=DEFAULT_ENGINE, autocommit=True, **kwargs):
-    """Connect to the specified database"""
+            driver='', port=3306, engine=DEFAULT_ENGINE, autocommit=True,
+            reader=False, **kwargs):  # @UnusedVariable
+    """Connect to the specified database. Whether the connection will only be used for reading
+    makes no difference to MySQL, so reader is not used."""
     return Connection(host=host, port=int(port), user=user, password=password,
                       database_name=database_name, engine=engine, autocommit=autocommit, **kwargs)
 
@@ -135,11 +139,11 @@ class Connection(weedb.Connection):
         self.connection.query("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
         self.connection.autocommit(to_bool(autocommit))
 
-    def cursor(self):
-        """Return a cursor object."""
+    def cursor(self, server_side=False):
+        """Return a cursor object. If server_side is True, it will be a server-side cursor."""
         # The implementation of the MySQLdb cursor is lame enough that we are
         # obliged to include a wrapper around it:
-        return Cursor(self)
+        return Cursor(self, server_side)
 
     @guard
     def tables(self):
@@ -221,13 +225,19 @@ class Cursor(weedb.Cursor):
     """A wrapper around the MySQLdb cursor object"""
 
     @guard
-    def __init__(self, connection):
+    def __init__(self, connection, server_side=False):
         """Initialize a Cursor from a connection.
         
-        connection: An instance of db.mysql.Connection"""
+        connection: An instance of db.mysql.Connection
+
+        server_side: If True, use a server-side cursor, which fetches rows from the server as
+        they are needed, rather than all at once."""
 
         # Get the MySQLdb cursor and store it internally:
-        self.cursor = connection.connection.cursor()
+        if server_side:
+            self.cursor = connection.connection.cursor(MySQLdb.cursors.SSCursor)
+        else:
+            self.cursor = connection.connection.cursor()
 
     @guard
     def execute(self, sql_string, sql_tuple=()):
@@ -248,6 +258,21 @@ class Cursor(weedb.Cursor):
 
         return self
 
+    @guard
+    def executemany(self, sql_string, sql_tuples):
+        """Execute a SQL statement once for each tuple in sql_tuples.
+
+        sql_string: A SQL statement to be executed. It should use ? as
+        a placeholder.
+
+        sql_tuples: An iterable of tuples with the values to be used in the
+        placeholders."""
+
+        mysql_string = sql_string.replace('?', '%s')
+        self.cursor.executemany(mysql_string, [tuple(sql_tuple) for sql_tuple in sql_tuples])
+
+        return self
+
     @property
     def rowcount(self):
         """Return the number of rows affected by the last execute() call."""
@@ -258,6 +283,13 @@ class Cursor(weedb.Cursor):
         # filter below
         return _massage(self.cursor.fetchone())
 
+    @guard
+    def fetchmany(self, size=None):
+        """Fetch up to 'size' rows at a time. If size is None, use the cursor's arraysize."""
+        if size is None:
+            size = self.cursor.arraysize
+        return [_massage(row) for row in self.cursor.fetchmany(size)]
+
     def drop_columns(self, table, column_names):
         """Drop the set of 'column_names' from table 'table'.
 
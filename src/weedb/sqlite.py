@@ -5,7 +5,10 @@
 #
 """weedb driver for sqlite"""
 
+import os
 import os.path
+import threading
+import urllib.parse
 
 # Import sqlite3. If it does not support the 'with' statement, then
 # import pysqlite2, which might...
@@ -29,6 +32,20 @@ else:
 import weedb
 from weeutil.weeutil import to_int, to_bool
 
+# Idle connections of readers, keyed by the path to the database file. See Connection.close().
+_pool = {}
+_pool_lock = threading.Lock()
+# The process that opened the connections in the pool. A forked process must not use them.
+_pool_pid = os.getpid()
+# Connections inherited from a parent process. They are kept, so they do not get closed when
+# garbage collected. They still belong to the parent.
+_inherited = []
+
+# A closed connection, to stand in for one that has been returned to the pool. Using it raises
+# an exception, just as using any closed connection does.
+_closed_connection = sqlite3.connect(":memory:")
+_closed_connection.close()
+
 
 def guard(fn):
     """Decorator function that converts sqlite exceptions into weedb exceptions."""
@@ -87,6 +104,11 @@ def create(database_name='', SQLITE_ROOT='', driver='', **argv):  # @UnusedVaria
 
 def drop(database_name='', SQLITE_ROOT='', driver='', **argv):  # @UnusedVariable
     file_path = _get_filepath(SQLITE_ROOT, database_name, **argv)
+    # Close any idle readers of the database
+    with _pool_lock:
+        if _pool_pid == os.getpid():
+            for connection in _pool.pop(file_path, []):
+                connection.close()
     try:
         os.remove(file_path)
     except OSError as e:
@@ -124,6 +146,17 @@ class Connection(weedb.Connection):
               Optional. Default is 5.
             isolation_level(str): The type of isolation level to use. One of None,
               DEFERRED, IMMEDIATE, or EXCLUSIVE. Default is None (autocommit mode).
+            journal_mode(str): If given, the journal mode to set, such as WAL. In WAL mode,
+              readers do not block the writer, nor the writer the readers. Optional.
+            reader(bool): True if the connection will only be used for reading. Its page cache
+              and memory map are set by cache_size and mmap_size. In WAL mode, it is opened
+              read-only, and is kept in a pool of up to pool_size connections when closed, so
+              it can be used again. Default is False.
+            cache_size(int): The size of the page cache of a reader. As for the SQLite pragma,
+              a negative number is in kibibytes. Optional.
+            mmap_size(int): How many bytes of the database a reader maps into memory. Optional.
+            pool_size(int): How many idle readers to keep for each database, in WAL mode.
+              Default is 2.
 
         Raises:
             NoDatabaseError: If the database file does not exist.
@@ -135,17 +168,40 @@ class Connection(weedb.Connection):
                                         % self.file_path)
         timeout = to_int(argv.get('timeout', 5))
         isolation_level = argv.get('isolation_level')
-        connection = sqlite3.connect(self.file_path, timeout=timeout,
-                                     isolation_level=isolation_level)
-
-        if pragmas:
-            for pragma in pragmas:
-                connection.execute("PRAGMA %s=%s;" % (pragma, pragmas[pragma]))
+        journal_mode = argv.get('journal_mode')
+        reader = to_bool(argv.get('reader', False))
+        # Readers of a database in WAL mode are pooled
+        self.pool_size = to_int(argv.get('pool_size', 2)) \
+            if reader and self.file_path != ':memory:' and journal_mode \
+               and journal_mode.upper() == 'WAL' else 0
+
+        connection = _take_from_pool(self.file_path) if self.pool_size else None
+        if connection is None:
+            if self.pool_size:
+                # The connection may be used by another thread, after this one has returned it to
+                # the pool. It is never used by two threads at once.
+                connection = sqlite3.connect("file:%s?mode=ro" % urllib.parse.quote(self.file_path),
+                                             uri=True, timeout=timeout,
+                                             isolation_level=isolation_level,
+                                             check_same_thread=False)
+            else:
+                connection = sqlite3.connect(self.file_path, timeout=timeout,
+                                             isolation_level=isolation_level)
+                if journal_mode:
+                    connection.execute("PRAGMA journal_mode=%s;" % journal_mode)
+            if reader:
+                for pragma in ('cache_size', 'mmap_size'):
+                    if argv.get(pragma) is not None:
+                        connection.execute("PRAGMA %s=%d;" % (pragma, to_int(argv[pragma])))
+            if pragmas:
+                for pragma in pragmas:
+                    connection.execute("PRAGMA %s=%s;" % (pragma, pragmas[pragma]))
         weedb.Connection.__init__(self, connection, database_name, 'sqlite')
 
     @guard
-    def cursor(self):
-        """Return a cursor object."""
+    def cursor(self, server_side=False):
+        """Return a cursor object. An sqlite cursor always steps through a result set as it is
+        fetched, so server_side is ignored."""
         return self.connection.cursor(Cursor)
 
     @guard
@@ -220,7 +276,39 @@ class Connection(weedb.Connection):
 
     @guard
     def close(self):
-        self.connection.close()
+        if self.pool_size and self.connection is not _closed_connection \
+                and _return_to_pool(self.file_path, self.connection, self.pool_size):
+            self.connection = _closed_connection
+        else:
+            self.connection.close()
+
+
+def _take_from_pool(file_path):
+    """Take an idle connection to a database from the pool. Returns None if there is none."""
+    global _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            # This is a forked process. The connections in the pool belong to the parent.
+            _inherited.extend(_pool.values())
+            _pool.clear()
+            _pool_pid = os.getpid()
+        idle = _pool.get(file_path)
+        return idle.pop() if idle else None
+
+
+def _return_to_pool(file_path, connection, pool_size):
+    """Return a connection to the pool. Returns False if the pool is full, or if the
+    connection is not idle, or was not opened by this process."""
+    if connection.in_transaction:
+        return False
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            return False
+        idle = _pool.setdefault(file_path, [])
+        if len(idle) >= pool_size:
+            return False
+        idle.append(connection)
+        return True
 
 
 class Cursor(sqlite3.Cursor, weedb.Cursor):
@@ -232,6 +320,10 @@ class Cursor(sqlite3.Cursor, weedb.Cursor):
     def execute(self, *args, **kwargs):
         return sqlite3.Cursor.execute(self, *args, **kwargs)
 
+    @guard
+    def executemany(self, *args, **kwargs):
+        return sqlite3.Cursor.executemany(self, *args, **kwargs)
+
     @guard
     def fetchone(self):
         return sqlite3.Cursor.fetchone(self)
@@ -97,6 +97,25 @@ class Common(unittest.TestCase):
                 with self.assertRaises(weedb.IntegrityError):
                     _cursor.execute("INSERT INTO test1 (dateTime, min, mintime) VALUES (0, 10, 0)")
 
+    def test_executemany(self):
+        self.populate_db()
+        with weedb.connect(self.db_dict) as _connect:
+            with weedb.Transaction(_connect) as _cursor:
+                _cursor.executemany("INSERT INTO test2 (dateTime, min) VALUES (?, ?)",
+                                    [(irec, 10 * irec) for irec in range(5)])
+                # A duplicate key should raise an IntegrityError. Roll back just the failed
+                # batch by using a savepoint.
+                _cursor.execute("SAVEPOINT test_batch")
+                with self.assertRaises(weedb.IntegrityError):
+                    _cursor.executemany("INSERT INTO test2 (dateTime, min) VALUES (?, ?)",
+                                        [(5, 50), (4, 40)])
+                _cursor.execute("ROLLBACK TO SAVEPOINT test_batch")
+                _cursor.execute("RELEASE SAVEPOINT test_batch")
+            with _connect.cursor() as _cursor:
+                _cursor.execute("SELECT dateTime, min FROM test2")
+                self.assertEqual([tuple(_row) for _row in _cursor],
+                                 [(irec, 10 * irec) for irec in range(5)])
+
     def test_bad_table(self):
         self.populate_db()
         with weedb.connect(self.db_dict) as _connect:
@@ -133,6 +152,22 @@ class Common(unittest.TestCase):
                 self.assertIsNotNone(_row)
                 self.assertIsNone(_row[0])
 
+    def test_fetchmany(self):
+        self.populate_db()
+        with weedb.connect(self.db_dict) as _connect:
+            for server_side in (False, True):
+                with _connect.cursor(server_side=server_side) as _cursor:
+                    _cursor.execute("SELECT dateTime, min FROM test1 ORDER BY dateTime")
+                    _rows = []
+                    while True:
+                        _chunk = _cursor.fetchmany(3)
+                        if not _chunk:
+                            break
+                        self.assertLessEqual(len(_chunk), 3)
+                        _rows.extend(_chunk)
+                    self.assertEqual([tuple(_row) for _row in _rows],
+                                     [(i, i * 10) for i in range(20)])
+
     def test_bad_select(self):
         self.populate_db()
         with weedb.connect(self.db_dict) as _connect:
@@ -218,6 +253,43 @@ class TestSqlite(Common):
             self.assertIsNone(_v)
         _connect.close()
 
+    def test_wal_readers(self):
+        self.populate_db()
+        db_dict = dict(self.db_dict, journal_mode='WAL')
+        reader_dict = dict(db_dict, reader=True, mmap_size=1048576, cache_size=-1024)
+        with weedb.connect(db_dict) as writer:
+            self.assertEqual(writer.get_variable('journal_mode')[1].lower(), 'wal')
+            reader = weedb.connect(reader_dict)
+            self.assertEqual(reader.get_variable('mmap_size')[1], 1048576)
+            self.assertEqual(reader.get_variable('cache_size')[1], -1024)
+            # Readers cannot write
+            with self.assertRaises(weedb.OperationalError):
+                reader.execute("INSERT INTO test1 (dateTime) VALUES (100)")
+            # The writer does not block the readers, which see the last commit
+            with weedb.Transaction(writer) as _cursor:
+                _cursor.execute("INSERT INTO test1 (dateTime) VALUES (100)")
+                _row = reader.connection.execute("SELECT COUNT(*) FROM test1").fetchone()
+                self.assertEqual(_row[0], 20)
+            sqlite_connection = reader.connection
+            reader.close()
+            # Closing twice does no harm, but a closed reader cannot be used
+            reader.close()
+            with self.assertRaises(weedb.ProgrammingError):
+                reader.tables()
+            # The next reader gets the connection from the pool
+            with weedb.connect(reader_dict) as reader:
+                self.assertIs(reader.connection, sqlite_connection)
+                _row = reader.connection.execute("SELECT COUNT(*) FROM test1").fetchone()
+                self.assertEqual(_row[0], 21)
+            # The pool is bounded
+            readers = [weedb.connect(dict(reader_dict, pool_size=1)) for _ in range(3)]
+            for reader in readers:
+                reader.close()
+            self.assertEqual(len(weedb.sqlite._pool[self.db_dict['database_name']]), 1)
+        # Dropping the database closes the idle readers
+        weedb.drop(self.db_dict)
+        self.assertNotIn(self.db_dict['database_name'], weedb.sqlite._pool)
+
 
 class TestMySQL(Common):
 
@@ -216,11 +216,14 @@ class CSVSource(weeimport.Source):
     def get_raw_data(self, period):
         """Obtain an iterable containing the raw data to be imported.
 
-        Raw data is read and any clean-up/pre-processing carried out before the
-        iterable is returned. In this case we will use csv.Dictreader(). The
+        Raw data is read and any clean-up/pre-processing carried out as the
+        iterable is consumed. In this case we will use csv.Dictreader(). The
         iterable should be of a form where the field names in the field map can
         be used to map the data to the WeeWX archive record format.
 
+        The source file is read a line at a time, so it need not fit in
+        memory.
+
         Input parameters:
 
             period: a simple counter that is unused but retained to keep the
@@ -228,44 +231,49 @@ class CSVSource(weeimport.Source):
         """
 
         # does our source exist?
-        if os.path.isfile(self.source):
-            # It exists.  The source file may use some encoding, if we can't
-            # decode it raise a WeeImportDecodeError.
-            try:
-                with io.open(self.source, mode='r', encoding=self.source_encoding) as f:
-                    _raw_data = f.readlines()
-            except UnicodeDecodeError as e:
-                # not a utf-8 based encoding, so raise a WeeImportDecodeError
-                raise weeimport.WeeImportDecodeError(e)
-        else:
+        if not os.path.isfile(self.source):
             # if it doesn't we can't go on so raise it
             raise weeimport.WeeImportIOError("CSV source file '%s' could " \
                                              "not be found." % self.source)
 
-        # just in case the data has been sourced from the web we will remove
-        # any HTML tags and blank lines that may exist
-        _clean_data = []
-        for _row in _raw_data:
-            # check for and remove any null bytes
-            clean_row = _row
-            if "\x00" in _row:
-                clean_row = clean_row.replace("\x00", "")
-                _msg = "One or more null bytes found in and removed " \
-                       "from file '%s'" % self.source
-                print(_msg)
-                log.info(_msg)
-            # get rid of any HTML tags
-            _line = ''.join(CSVSource._tags.split(clean_row))
-            if _line != "\n":
-                # save anything that is not a blank line
-                _clean_data.append(_line)
-
         # create a dictionary CSV reader, using the first line as the set of keys
-        _csv_reader = csv.DictReader(_clean_data, delimiter=self.delimiter)
+        _csv_reader = csv.DictReader(self.clean_lines(), delimiter=self.delimiter)
 
         # return our CSV dict reader
         return _csv_reader
 
+    def clean_lines(self):
+        """Generator that yields the cleaned lines of the source file.
+
+        Just in case the data has been sourced from the web we will remove any
+        HTML tags, null bytes and blank lines that may exist.
+        """
+
+        # The source file may use some encoding, if we can't decode it raise a
+        # WeeImportDecodeError.
+        with io.open(self.source, mode='r', encoding=self.source_encoding) as f:
+            _warned = False
+            try:
+                for _row in f:
+                    # check for and remove any null bytes
+                    clean_row = _row
+                    if "\x00" in _row:
+                        clean_row = clean_row.replace("\x00", "")
+                        if not _warned:
+                            _msg = "One or more null bytes found in and removed " \
+                                   "from file '%s'" % self.source
+                            print(_msg)
+                            log.info(_msg)
+                            _warned = True
+                    # get rid of any HTML tags
+                    _line = ''.join(CSVSource._tags.split(clean_row))
+                    if _line != "\n":
+                        # pass on anything that is not a blank line
+                        yield _line
+            except UnicodeDecodeError as e:
+                # not a utf-8 based encoding, so raise a WeeImportDecodeError
+                raise weeimport.WeeImportDecodeError(e)
+
     @staticmethod
     def period_generator():
         """Generator function to control CSV import processing loop.
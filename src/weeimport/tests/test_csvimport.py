@@ -0,0 +1,228 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+"""Test the CSV import"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import configobj
+
+import weewx.manager
+from weeimport import csvimport, weeimport
+
+os.environ['TZ'] = 'America/Los_Angeles'
+time.tzset()
+
+CONFIG_DICT_INI = """
+[StdConvert]
+    target_unit = US
+
+[StdArchive]
+    data_binding = wx_binding
+
+[DataBindings]
+    [[wx_binding]]
+        database = archive_sqlite
+        table_name = archive
+        manager = weewx.manager.DaySummaryManager
+        schema = schemas.wview_extended.schema
+
+[Databases]
+    [[archive_sqlite]]
+        database_name = weewx.sdb
+        database_type = SQLite
+
+[DatabaseTypes]
+    [[SQLite]]
+        driver = weedb.sqlite
+        SQLITE_ROOT = .
+"""
+
+CSV_CONFIG_INI = """
+interval = derive
+qc = True
+calc_missing = False
+tranche = 2
+raw_datetime_format = %Y-%m-%d %H:%M
+[FieldMap]
+    [[dateTime]]
+        source_field = time
+    [[outTemp]]
+        source_field = temp
+        unit = degree_C
+    [[windDir]]
+        source_field = dir
+        unit = degree_compass
+    [[rain]]
+        source_field = dayrain
+        unit = mm
+        is_cumulative = True
+"""
+
+# Some of the rows are across the change from daylight saving time in the fall. There is also an
+# HTML tag, a blank line, a null byte, a timestamp and a cardinal wind direction.
+CSV_DATA = """time,temp,dir,dayrain
+2024-11-02 23:50,10.5,180,0.0
+2024-11-03 00:00,10.1,NNE,0.2
+
+2024-11-03 00:10,9.8,200,0.4<br>
+2024-11-03 00:20,9.5,210,0.4\x00
+1730619000,9.1,220,1.0
+2024-11-03 00:40,8.9,225,1.2
+2024-11-03 00:50,8.7,230,1.2
+"""
+
+# The kwargs given to a source by 'weectl import'
+KWARGS = {'dry_run': False, 'update': False, 'verbose': False, 'no_prompt': True,
+          'suppress_warning': True, 'date': None, 'from_datetime': None, 'to_datetime': None}
+
+
+def readlines_data(path):
+    """Read a CSV file the way the import did before the file was streamed: all at once."""
+    with io.open(path, mode='r', encoding='utf-8-sig') as f:
+        raw_data = f.readlines()
+    clean_data = []
+    for row in raw_data:
+        line = ''.join(weeimport.Source._tags.split(row.replace("\x00", "")))
+        if line != "\n":
+            clean_data.append(line)
+    return csv.DictReader(clean_data, delimiter=',')
+
+
+class TestCSVImport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, True)
+        self.config_dict = configobj.ConfigObj(io.StringIO(CONFIG_DICT_INI))
+        self.config_dict['WEEWX_ROOT'] = self.tmpdir
+        self.csv_path = os.path.join(self.tmpdir, 'data.csv')
+        self.write_csv(CSV_DATA)
+
+    def write_csv(self, data):
+        with io.open(self.csv_path, mode='w', encoding='utf-8') as f:
+            f.write(data)
+
+    def get_source(self, **options):
+        csv_config_dict = configobj.ConfigObj(io.StringIO(CSV_CONFIG_INI))
+        csv_config_dict['file'] = self.csv_path
+        csv_config_dict.update(options)
+        return csvimport.CSVSource(None, self.config_dict, 'import.conf', csv_config_dict,
+                                   **KWARGS)
+
+    def get_archive(self):
+        with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as manager:
+            return [{key: record[key] for key in ('dateTime', 'interval', 'outTemp', 'windDir',
+                                                  'rain')}
+                    for record in manager.genBatchRecords()]
+
+    def test_stream(self):
+        """Streaming the file should give the same records as reading it all at once"""
+        source = self.get_source()
+        records = list(source.map_raw_data(source.get_raw_data(1), source.archive_unit_sys))
+        old_source = self.get_source()
+        old_records = list(old_source.map_raw_data(readlines_data(self.csv_path),
+                                                   old_source.archive_unit_sys))
+        self.assertEqual(records, old_records)
+        self.assertEqual(len(records), 7)
+        self.assertEqual(records[1]['windDir'], 22.5)
+        self.assertEqual(records[4]['dateTime'], 1730619000)
+        self.assertEqual([record['interval'] for record in records], [10] * 7)
+        self.assertEqual((source.earliest_ts, source.latest_ts),
+                         (records[0]['dateTime'], records[-1]['dateTime']))
+
+    def test_import(self):
+        """The imported records should be those mapped, in tranches of 2"""
+        source = self.get_source()
+        with mock.patch('weewx.manager.Manager.addRecord',
+                        side_effect=weewx.manager.Manager.addRecord, autospec=True) as add:
+            source.run()
+        self.assertEqual([len(call[0][1]) for call in add.call_args_list], [2, 2, 2, 1])
+        self.assertEqual(source.total_rec_proc, 7)
+
+        old_source = self.get_source()
+        expected = [{key: record.get(key) for key in ('dateTime', 'interval', 'outTemp',
+                                                      'windDir', 'rain')}
+                    for record in old_source.map_raw_data(readlines_data(self.csv_path),
+                                                          weewx.US)]
+        self.assertEqual(self.get_archive(), expected)
+
+    def test_mixed_intervals(self):
+        """If the user chooses not to import records with mixed intervals, nothing should be
+        saved, even if the first difference comes after several tranches"""
+        self.write_csv(CSV_DATA + "2024-11-03 01:30,8.2,235,1.4\n")
+        source = self.get_source()
+        source.no_prompt = False
+        # The user has agreed to save the records, but not to mixed intervals
+        source.ans = 'y'
+        with mock.patch('builtins.input', return_value='n') as mock_input:
+            with self.assertRaises(SystemExit):
+                source.run()
+        mock_input.assert_called_once()
+        self.assertEqual(source.total_rec_proc, 0)
+        self.assertEqual(self.get_archive(), [])
+
+    def test_fixed_interval(self):
+        """With a fixed interval, records do not have mixed intervals"""
+        self.write_csv(CSV_DATA + "2024-11-03 01:30,8.2,235,1.4\n")
+        source = self.get_source(interval=5)
+        source.no_prompt = False
+        with mock.patch('builtins.input', return_value='y') as mock_input:
+            source.run()
+        # Only asked whether to save the records
+        mock_input.assert_called_once()
+        self.assertEqual(source.total_rec_proc, 8)
+
+
+class TestDateTimeParser(unittest.TestCase):
+    """The parser should give the same results as time.strptime()"""
+
+    def check(self, fmt, strings):
+        parse = weeimport.DateTimeParser(fmt)
+        for string in strings:
+            try:
+                expected = int(time.mktime(time.strptime(string, fmt)))
+            except ValueError:
+                with self.assertRaises(ValueError, msg=string):
+                    parse(string)
+            else:
+                self.assertEqual(parse(string), expected, msg=string)
+
+    def test_dst(self):
+        # Times in the hour skipped in the spring, and the hour repeated in the fall
+        self.check('%Y-%m-%d %H:%M:%S', ['2024-03-10 01:59:59', '2024-03-10 02:00:00',
+                                         '2024-03-10 02:30:00', '2024-03-10 03:00:00',
+                                         '2024-11-03 00:59:59', '2024-11-03 01:00:00',
+                                         '2024-11-03 01:30:00', '2024-11-03 02:00:00'])
+
+    def test_out_of_range(self):
+        self.check('%Y-%m-%d %H:%M:%S', ['2024-13-01 00:00:00', '2024-00-10 00:00:00',
+                                         '2024-04-31 00:00:00', '2023-02-29 00:00:00',
+                                         '2024-02-29 00:00:00', '2024-01-01 24:00:00',
+                                         '2024-01-01 23:60:00', '2024-01-01 23:59:60',
+                                         '2024-01-01 23:59:61', '2024-01-01 23:59:62',
+                                         '2024-1-1 1:2:3', '2024-001-01 00:00:00',
+                                         '24-01-01 00:00:00'])
+
+    def test_whitespace(self):
+        self.check('%d/%m/%Y %H:%M', ['01/03/2024 10:15', '01/03/2024  10:15',
+                                      '01/03/2024\t10:15', '01/03/2024 10:15 ',
+                                      ' 01/03/2024 10:15', '01/03/202410:15'])
+
+    def test_other_formats(self):
+        # These are left to time.strptime()
+        self.check('%y%m%d %I:%M %p', ['240301 10:15 PM', '240301 13:15 PM'])
+        self.check('%Y-%m-%dT%H:%M%%', ['2024-03-01T10:15%', '2024-03-01T10:15'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,8 @@ into WeeWX.
 
 # Python imports
 import datetime
+import functools
+import itertools
 import logging
 import numbers
 import re
@@ -358,13 +360,36 @@ class Source:
                 if not (self.first_period and self.last_period):
                     print("Period %d ..." % self.period_no)
 
-                # get the raw data
+                # Get the raw data, map it to WeeWX archive compatible
+                # dictionaries, and save it to archive. Each stage is an
+                # iterable that draws records from the one before, so a source
+                # may be read lazily, and only a tranche of records need be
+                # held at once. An error reading the source may therefore
+                # arise at any stage.
                 _msg = 'Obtaining raw import data for period %d ...' % self.period_no
                 if self.verbose:
                     print(_msg)
                 log.info(_msg)
                 try:
                     _raw_data = self.get_raw_data(period)
+                    _msg = 'Raw import data obtained successfully for period %d.' % self.period_no
+                    if self.verbose:
+                        print(_msg)
+                    log.info(_msg)
+                    # Check the intervals before anything is saved. If the raw
+                    # data can only be read once, check another copy of it.
+                    if iter(_raw_data) is _raw_data:
+                        self.check_intervals(self.get_raw_data(period))
+                    else:
+                        self.check_intervals(_raw_data)
+                    _mapped_data = self.map_raw_data(_raw_data, self.archive_unit_sys)
+                    # first advise the user and log, but only if it's not a dry run
+                    if not self.dry_run:
+                        _msg = 'Saving mapped data to archive for period %d ...' % self.period_no
+                        if self.verbose:
+                            print(_msg)
+                        log.info(_msg)
+                    self.save_to_archive(archive, _mapped_data)
                 except WeeImportIOError as e:
                     print("**** Unable to load source data for period %d." % self.period_no)
                     log.info("**** Unable to load source data for period %d." % self.period_no)
@@ -382,9 +407,9 @@ class Source:
                     log.info("**** Unable to decode source data for period %d." % self.period_no)
                     print("**** %s" % e)
                     log.info("**** %s" % e)
-                    print("**** Period %d will be skipped. "
+                    print("**** The rest of period %d will be skipped. "
                           "Proceeding to next period." % self.period_no)
-                    log.info("**** Period %d will be skipped. "
+                    log.info("**** The rest of period %d will be skipped. "
                              "Proceeding to next period." % self.period_no)
                     print("**** Consider specifying the source file encoding "
                           "using the 'source_encoding' config option.")
@@ -393,30 +418,6 @@ class Source:
                     # increment our period counter
                     self.period_no += 1
                     continue
-                _msg = 'Raw import data read successfully for period %d.' % self.period_no
-                if self.verbose:
-                    print(_msg)
-                log.info(_msg)
-
-                # map the raw data to a WeeWX archive compatible dictionary
-                _msg = 'Mapping raw import data for period %d ...' % self.period_no
-                if self.verbose:
-                    print(_msg)
-                log.info(_msg)
-                _mapped_data = self.map_raw_data(_raw_data, self.archive_unit_sys)
-                _msg = 'Raw import data mapped successfully for period %d.' % self.period_no
-                if self.verbose:
-                    print(_msg)
-                log.info(_msg)
-
-                # save the mapped data to archive
-                # first advise the user and log, but only if it's not a dry run
-                if not self.dry_run:
-                    _msg = 'Saving mapped data to archive for period %d ...' % self.period_no
-                    if self.verbose:
-                        print(_msg)
-                    log.info(_msg)
-                self.save_to_archive(archive, _mapped_data)
                 # advise the user and log, but only if it's not a dry run
                 if not self.dry_run:
                     _msg = 'Mapped data saved to archive successfully ' \
@@ -502,9 +503,9 @@ class Source:
                     print(_msg)
                     log.info(_msg)
                     _msg = "%d records were processed and %d unique records " \
-                           "imported in %.2f seconds." % (total_rec,
-                                                          self.total_rec_proc,
-                                                          self.tdiff)
+                           "imported in %.2f seconds (%d records/second)." \
+                           % (total_rec, self.total_rec_proc, self.tdiff,
+                              total_rec / self.tdiff if self.tdiff > 0 else 0)
                     print(_msg)
                     log.info(_msg)
                     if self.total_duplicate_rec > 1:
@@ -694,7 +695,9 @@ class Source:
 
         Takes an iterable source of raw data observations, maps the fields of
         each row to a WeeWX field based on the field map and performs any
-        necessary unit conversion.
+        necessary unit conversion. This is a generator, so rows are read from
+        data only as the mapped records are consumed, and a large source need
+        never be held in memory.
 
         Input parameters:
 
@@ -704,11 +707,16 @@ class Source:
                       provided. Omission will result in US customary (weewx.US)
                       being used.
 
-        Returns a list of dicts of WeeWX compatible archive records.
+        Yields dicts of WeeWX compatible archive records.
         """
 
-        # initialise our list of mapped records
-        _records = []
+        # the number of records mapped
+        _count = 0
+        # the first record is held back until we have the second, in case its
+        # interval has to be taken from the second
+        _first_rec = None
+        # parser for our date time field
+        _parse_datetime = DateTimeParser(self.raw_datetime_format)
         # initialise some rain variables
         _last_ts = None
         _last_rain = None
@@ -720,56 +728,17 @@ class Source:
             _rec = {}
             # first off process the fields that require special processing
             # dateTime
-            if 'source_field' in self.map['dateTime']:
-                # we have a map for dateTime
-                try:
-                    _raw_dateTime = _row[self.map['dateTime']['source_field']]
-                except KeyError:
-                    _msg = "Field '%s' not found in source "\
-                           "data." % self.map['dateTime']['source_field']
-                    raise WeeImportFieldError(_msg)
-                # now process the raw date time data
-                if isinstance(_raw_dateTime, numbers.Number) or _raw_dateTime.isdigit():
-                    # Our dateTime is a number, is it a timestamp already?
-                    # Try to use it and catch the error if there is one and
-                    # raise it higher.
-                    try:
-                        _rec_dateTime = int(_raw_dateTime)
-                    except ValueError:
-                        _msg = "Invalid '%s' field. Cannot convert '%s' to " \
-                               "timestamp." % (self.map['dateTime']['source_field'],
-                                               _raw_dateTime)
-                        raise ValueError(_msg)
-                else:
-                    # it's a non-numeric string so try to parse it and catch
-                    # the error if there is one and raise it higher
-                    try:
-                        _datetm = time.strptime(_raw_dateTime,
-                                                self.raw_datetime_format)
-                        _rec_dateTime = int(time.mktime(_datetm))
-                    except ValueError:
-                        _msg = "Invalid '%s' field. Cannot convert '%s' to " \
-                               "timestamp." % (self.map['dateTime']['source_field'],
-                                               _raw_dateTime)
-                        raise ValueError(_msg)
-                # if we have a timeframe of concern does our record fall within
-                # it
-                if (self.first_ts is None and self.last_ts is None) or \
-                        self.first_ts < _rec_dateTime <= self.last_ts:
-                    # we have no timeframe or if we do it falls within it so
-                    # save the dateTime
-                    _rec['dateTime'] = _rec_dateTime
-                    # update earliest and latest record timestamps
-                    if self.earliest_ts is None or _rec_dateTime < self.earliest_ts:
-                        self.earliest_ts = _rec_dateTime
-                    if self.latest_ts is None or _rec_dateTime > self.earliest_ts:
-                        self.latest_ts = _rec_dateTime
-                else:
-                    # it is not so skip to the next record
-                    continue
-            else:
-                # there is no mapped field for dateTime so raise an error
-                raise ValueError("No mapping for WeeWX field 'dateTime'.")
+            _rec_dateTime = self.map_datetime(_row, _parse_datetime)
+            if _rec_dateTime is None:
+                # it is not in our timeframe of concern so skip to the next
+                # record
+                continue
+            _rec['dateTime'] = _rec_dateTime
+            # update earliest and latest record timestamps
+            if self.earliest_ts is None or _rec_dateTime < self.earliest_ts:
+                self.earliest_ts = _rec_dateTime
+            if self.latest_ts is None or _rec_dateTime > self.earliest_ts:
+                self.latest_ts = _rec_dateTime
             # usUnits
             _units = None
             if 'usUnits' in self.map.keys() and 'source_field' in self.map['usUnits']:
@@ -794,30 +763,8 @@ class Source:
                     raise weewx.UnitError(_msg)
             # interval
             if 'interval' in self.map.keys() and 'source_field' in self.map['interval']:
-                # We have a map for interval so try to get the raw data. If
-                # it's not there raise an error.
-                try:
-                    _tfield = _row[self.map['interval']['source_field']]
-                except KeyError:
-                    _msg = "Field '%s' not found in "\
-                           "source data." % self.map['interval']['source_field']
-                    raise WeeImportFieldError(_msg)
-                # now process the raw interval data
-                if _tfield is not None and _tfield != '':
-                    try:
-                        _rec['interval'] = int(_tfield)
-                    except ValueError:
-                        _msg = "Invalid '%s' field. Cannot convert '%s' to " \
-                               "an integer." % (self.map['interval']['source_field'],
-                                                _tfield)
-                        raise ValueError(_msg)
-                else:
-                    # if it happens to be None then raise an error
-                    _msg = "Invalid value '%s' for mapped field '%s' at " \
-                           "timestamp '%s'." % (_tfield,
-                                                self.map['interval']['source_field'],
-                                                timestamp_to_string(_rec['dateTime']))
-                    raise ValueError(_msg)
+                # we have a map for interval
+                _rec['interval'] = self.map_interval(_row, _rec['dateTime'])
             else:
                 # we have no mapping so calculate it, wrap in a try..except in
                 # case it cannot be calculated
@@ -1018,85 +965,221 @@ class Source:
                 # all we need do is set 'usUnits', any bulk conversion will be
                 # taken care of by saveToArchive()
                 _rec['usUnits'] = unit_sys
-            # If interval is being derived from record timestamps our first
-            # record will have an interval of None. In this case we wait until
-            # we have the second record, and then we use the interval between
-            # records 1 and 2 as the interval for record 1.
-            if len(_records) == 1 and _records[0]['interval'] is None:
-                _records[0]['interval'] = _rec['interval']
             _last_ts = _rec['dateTime']
-            # this record is done, add it to our list of records to return
-            _records.append(_rec)
-        # If we have more than 1 unique value for interval in our records it
-        # could be a sign of missing data and impact the integrity of our data,
-        # so do the check and see if the user wants to continue
-        if len(_records) > 0:
-            # if we have any records to return do the unique interval check
-            # before we return the records
-            _start_interval = _records[0]['interval']
-            _diff_interval = False
-            for _rec in _records:
-                if _rec['interval'] != _start_interval:
-                    _diff_interval = True
-                    break
-            if _diff_interval and self.interval_ans != 'y':
-                # we had more than one unique value for interval, warn the user
-                _msg = "Warning: Records to be imported contain multiple " \
-                       "different 'interval' values."
-                print(_msg)
-                log.info(_msg)
-                print("         This may mean the imported data is missing "
-                      "some records and it may lead")
-                print("         to data integrity issues. If the raw data has "
-                      "a known, fixed interval")
-                print("         value setting the relevant 'interval' setting "
-                      "in wee_import config to")
-                print("         this value may give a better result.")
-                while self.interval_ans not in ['y', 'n']:
-                    if self.no_prompt:
-                        self.interval_ans = 'y'
-                    else:
-                        self.interval_ans = input('Are you sure you want to proceed (y/n)? ')
-                if self.interval_ans == 'n':
-                    # the user chose to abort, but we may have already
-                    # processed some records. So log it then raise a SystemExit()
-                    if self.dry_run:
-                        print("Dry run import aborted by user. %d records were processed." % self.total_rec_proc)
-                    else:
-                        if self.total_rec_proc > 0:
-                            if self.update:
-                                print("Some existing database records may have been updated "
-                                      "with imported data.")
-                                print("As the import was aborted before completion refer to "
-                                      "the weectl log file to")
-                                print("confirm which records were imported.")
-                            else:
-                                print("Those records with a timestamp already in the "
-                                      "archive will not have been")
-                                print("imported. As the import was aborted before completion "
-                                      "refer to the WeeWX log")
-                                print("file to confirm which records were imported.")
-                            raise SystemExit('Exiting.')
-                        else:
-                            print("Import aborted by user. No records saved to archive.")
-                        _msg = "User chose to abort import. %d records were processed. " \
-                               "Exiting." % self.total_rec_proc
-                        log.info(_msg)
-                    raise SystemExit('Exiting. Nothing done.')
-            _msg = "Mapped %d records." % len(_records)
-            if self.verbose:
-                print(_msg)
-            log.info(_msg)
-            # the user wants to continue, or we have only one unique value for
-            # interval so return the records
-            return _records
+            _count += 1
+            if _count == 1:
+                # this is our first record, hold it until we have the second
+                _first_rec = _rec
+                continue
+            if _first_rec is not None:
+                # If interval is being derived from record timestamps our
+                # first record will have an interval of None. In this case we
+                # use the interval between records 1 and 2 as the interval for
+                # record 1.
+                if _first_rec['interval'] is None:
+                    _first_rec['interval'] = _rec['interval']
+                yield _first_rec
+                _first_rec = None
+            # this record is done
+            yield _rec
+        if _first_rec is not None:
+            # we only had the one record
+            yield _first_rec
+        _msg = "Mapped %d records." % _count
+        if self.verbose:
+            print(_msg)
+        log.info(_msg)
+
+    def map_datetime(self, row, parse_datetime):
+        """Get the timestamp of a row of raw data.
+
+        Input parameters:
+
+            row: dict holding a row of raw data.
+
+            parse_datetime: callable that converts a date-time string to a
+                            timestamp, such as a DateTimeParser.
+
+        Returns the timestamp, or None if the row is outside our timeframe of
+        concern.
+        """
+
+        if 'source_field' in self.map['dateTime']:
+            # we have a map for dateTime
+            try:
+                _raw_dateTime = row[self.map['dateTime']['source_field']]
+            except KeyError:
+                _msg = "Field '%s' not found in source "\
+                       "data." % self.map['dateTime']['source_field']
+                raise WeeImportFieldError(_msg)
+            # now process the raw date time data
+            if isinstance(_raw_dateTime, numbers.Number) or _raw_dateTime.isdigit():
+                # Our dateTime is a number, is it a timestamp already?
+                # Try to use it and catch the error if there is one and
+                # raise it higher.
+                try:
+                    _rec_dateTime = int(_raw_dateTime)
+                except ValueError:
+                    _msg = "Invalid '%s' field. Cannot convert '%s' to " \
+                           "timestamp." % (self.map['dateTime']['source_field'],
+                                           _raw_dateTime)
+                    raise ValueError(_msg)
+            else:
+                # it's a non-numeric string so try to parse it and catch
+                # the error if there is one and raise it higher
+                try:
+                    _rec_dateTime = parse_datetime(_raw_dateTime)
+                except ValueError:
+                    _msg = "Invalid '%s' field. Cannot convert '%s' to " \
+                           "timestamp." % (self.map['dateTime']['source_field'],
+                                           _raw_dateTime)
+                    raise ValueError(_msg)
         else:
-            _msg = "Mapped 0 records."
-            if self.verbose:
-                print(_msg)
-            log.info(_msg)
-            # we have no records to return so return None
-            return None
+            # there is no mapped field for dateTime so raise an error
+            raise ValueError("No mapping for WeeWX field 'dateTime'.")
+        # if we have a timeframe of concern does our record fall within it
+        if (self.first_ts is None and self.last_ts is None) or \
+                self.first_ts < _rec_dateTime <= self.last_ts:
+            # we have no timeframe or if we do it falls within it
+            return _rec_dateTime
+        return None
+
+    def map_interval(self, row, ts):
+        """Get the interval of a row of raw data from its mapped field.
+
+        Input parameters:
+
+            row: dict holding a row of raw data.
+
+            ts: the timestamp of the row.
+
+        Returns the interval in minutes.
+        """
+
+        # try to get the raw data, if it's not there raise an error
+        try:
+            _tfield = row[self.map['interval']['source_field']]
+        except KeyError:
+            _msg = "Field '%s' not found in "\
+                   "source data." % self.map['interval']['source_field']
+            raise WeeImportFieldError(_msg)
+        # now process the raw interval data
+        if _tfield is not None and _tfield != '':
+            try:
+                return int(_tfield)
+            except ValueError:
+                _msg = "Invalid '%s' field. Cannot convert '%s' to " \
+                       "an integer." % (self.map['interval']['source_field'],
+                                        _tfield)
+                raise ValueError(_msg)
+        else:
+            # if it happens to be None then raise an error
+            _msg = "Invalid value '%s' for mapped field '%s' at " \
+                   "timestamp '%s'." % (_tfield,
+                                        self.map['interval']['source_field'],
+                                        timestamp_to_string(ts))
+            raise ValueError(_msg)
+
+    def check_intervals(self, data):
+        """Check whether the records of a period have different intervals.
+
+        If we have more than 1 unique value for interval in our records it
+        could be a sign of missing data and impact the integrity of our data,
+        so see if the user wants to continue. This is done in a pass through
+        the raw data before any of it is mapped, so that if the user chooses
+        not to continue nothing of the period has been saved. Only the date
+        time and interval of each row are looked at, and the rows are read
+        one at a time.
+
+        Input parameters:
+
+            data: iterable that yields the data records to be processed.
+        """
+
+        _mapped = 'interval' in self.map.keys() and 'source_field' in self.map['interval']
+        if self.interval_ans == 'y' or \
+                not (_mapped or str(self.interval).lower() == 'derive'):
+            # the user has already agreed, or every record will have the same
+            # interval, so there is nothing to check
+            return
+        _parse_datetime = DateTimeParser(self.raw_datetime_format)
+        _last_ts = None
+        _count = 0
+        _start_interval = None
+        for _row in data:
+            _ts = self.map_datetime(_row, _parse_datetime)
+            if _ts is None:
+                continue
+            if _mapped:
+                _interval = self.map_interval(_row, _ts)
+            else:
+                try:
+                    _interval = self.get_interval(_last_ts, _ts)
+                except WeeImportFieldError:
+                    # map_raw_data() will discard this record
+                    continue
+            _last_ts = _ts
+            _count += 1
+            # if the interval of the first record is derived it is taken from
+            # the second record
+            if _count == 1 or (_count == 2 and _start_interval is None):
+                _start_interval = _interval
+            elif _interval != _start_interval:
+                self.confirm_intervals()
+                return
+
+    def confirm_intervals(self):
+        """Warn that the imported records have different intervals.
+
+        Unless the user has already agreed, ask whether to continue, and raise
+        SystemExit if they do not.
+        """
+
+        if self.interval_ans == 'y':
+            return
+        # we had more than one unique value for interval, warn the user
+        _msg = "Warning: Records to be imported contain multiple " \
+               "different 'interval' values."
+        print(_msg)
+        log.info(_msg)
+        print("         This may mean the imported data is missing "
+              "some records and it may lead")
+        print("         to data integrity issues. If the raw data has "
+              "a known, fixed interval")
+        print("         value setting the relevant 'interval' setting "
+              "in wee_import config to")
+        print("         this value may give a better result.")
+        while self.interval_ans not in ['y', 'n']:
+            if self.no_prompt:
+                self.interval_ans = 'y'
+            else:
+                self.interval_ans = input('Are you sure you want to proceed (y/n)? ')
+        if self.interval_ans == 'n':
+            # the user chose to abort, but we may have already
+            # processed some records. So log it then raise a SystemExit()
+            if self.dry_run:
+                print("Dry run import aborted by user. %d records were processed." % self.total_rec_proc)
+            else:
+                if self.total_rec_proc > 0:
+                    if self.update:
+                        print("Some existing database records may have been updated "
+                              "with imported data.")
+                        print("As the import was aborted before completion refer to "
+                              "the weectl log file to")
+                        print("confirm which records were imported.")
+                    else:
+                        print("Those records with a timestamp already in the "
+                              "archive will not have been")
+                        print("imported. As the import was aborted before completion "
+                              "refer to the WeeWX log")
+                        print("file to confirm which records were imported.")
+                    raise SystemExit('Exiting.')
+                else:
+                    print("Import aborted by user. No records saved to archive.")
+                _msg = "User chose to abort import. %d records were processed. " \
+                       "Exiting." % self.total_rec_proc
+                log.info(_msg)
+            raise SystemExit('Exiting. Nothing done.')
 
     def get_interval(self, last_ts, current_ts):
         """Determine an interval value for a record.
@@ -1241,14 +1324,23 @@ class Source:
                      (in dict form) to be written to archive
         """
 
-        # do we have any records?
-        if records and len(records) > 0:
+        # if we can, count the records
+        _num_recs = len(records) if hasattr(records, '__len__') else None
+        # Do we have any records? Records may come from a generator, so look
+        # at the first one, then put it back.
+        records = iter(records) if records is not None else iter(())
+        try:
+            _first_rec = next(records)
+        except StopIteration:
+            _first_rec = None
+        if _first_rec is not None:
+            records = itertools.chain((_first_rec,), records)
             # if this is the first period then give a little summary about what
             # records we have
             # TODO. Check that a single period shows correct and consistent console output
-            if self.first_period and self.last_period:
+            if self.first_period and self.last_period and _num_recs is not None:
                 # there is only 1 period, so we can count them
-                print("%s records identified for import." % len(records))
+                print("%s records identified for import." % _num_recs)
             # we do, confirm the user actually wants to save them
             while self.ans not in ['y', 'n'] and not self.dry_run:
                 if self.no_prompt:
@@ -1260,59 +1352,33 @@ class Source:
                 # we are going to save them
                 # reset record counter
                 nrecs = 0
-                # initialise our list of records for this tranche
+                # the time we started, so we can give a rate
+                _start = time.time()
+                # initialise our list of records for this tranche, the only
+                # records we hold at any one time
                 _tranche = []
-                # initialise a set for use in our dry run, this lets us
-                # give some better stats on records imported
-                unique_set = set()
                 # step through each record in this period
                 for _rec in records:
                     # convert our record
                     _conv_rec = to_std_system(_rec, self.archive_unit_sys)
                     # perform any required QC checks
                     self.qc(_conv_rec, 'Archive')
-                    # add the record to our tranche and increment our count
+                    # add the record to our tranche
                     _tranche.append(_conv_rec)
-                    nrecs += 1
                     # if we have a full tranche then save to archive and reset
                     # the tranche
                     if len(_tranche) >= self.tranche:
-                        # add the record only if it is not a dry run
-                        if not self.dry_run:
-                            # add the record only if it is not a dry run
-                            archive.addRecord(_tranche, update=self.update)
-                        # add our the dateTime for each record in our tranche
-                        # to the dry run set
-                        for _trec in _tranche:
-                            unique_set.add(_trec['dateTime'])
-                        # tell the user what we have done
-                        _msg = "Unique records processed: %d; "\
-                               "Last timestamp: %s\r" % (nrecs,
-                                                         timestamp_to_string(_rec['dateTime']))
-                        print(_msg, end='', file=sys.stdout)
-                        sys.stdout.flush()
+                        nrecs = self._save_tranche(archive, _tranche, nrecs, _start)
                         _tranche = []
                 # we have processed all records but do we have any records left
                 # in the tranche?
                 if len(_tranche) > 0:
                     # we do so process them
-                    if not self.dry_run:
-                        # add the record only if it is not a dry run
-                        archive.addRecord(_tranche, update=self.update)
-                    # add our the dateTime for each record in our tranche to
-                    # the dry run set
-                    for _trec in _tranche:
-                        unique_set.add(_trec['dateTime'])
-                    # tell the user what we have done
-                    _msg = "Unique records processed: %d; "\
-                           "Last timestamp: %s\r" % (nrecs,
-                                                     timestamp_to_string(_rec['dateTime']))
-                    print(_msg, end='', file=sys.stdout)
+                    nrecs = self._save_tranche(archive, _tranche, nrecs, _start)
                 print()
                 sys.stdout.flush()
                 # update our counts
-                self.total_rec_proc += nrecs
-                self.total_unique_rec += len(unique_set)
+                self.total_unique_rec += nrecs
                 # mention any duplicates we encountered
                 num_duplicates = len(self.period_duplicates)
                 self.total_duplicate_rec += num_duplicates
@@ -1354,6 +1420,29 @@ class Source:
             print(_msg)
 
 
+    def _save_tranche(self, archive, tranche, nrecs, start):
+        """Save a tranche of records to archive and report our progress.
+
+        Returns the number of records saved so far in this period.
+        """
+
+        # add the records only if it is not a dry run
+        if not self.dry_run:
+            archive.addRecord(tranche, update=self.update)
+        nrecs += len(tranche)
+        # count them now, in case the import is aborted part way through
+        self.total_rec_proc += len(tranche)
+        # tell the user what we have done
+        _elapsed = time.time() - start
+        _msg = "Unique records processed: %d; Last timestamp: %s; " \
+               "%d records/second\r" % (nrecs,
+                                        timestamp_to_string(tranche[-1]['dateTime']),
+                                        nrecs / _elapsed if _elapsed > 0 else 0)
+        print(_msg, end='', file=sys.stdout)
+        sys.stdout.flush()
+        return nrecs
+
+
 # ============================================================================
 #                             Utility functions
 # ============================================================================
@@ -1369,3 +1458,94 @@ def get_binding(config_dict):
     else:
         db_binding_wx = None
     return db_binding_wx
+
+
+class DateTimeParser:
+    """Convert date-time strings of a given format to timestamps.
+
+    Parsing every row of a large import with time.strptime() is slow. If the
+    format uses only the directives %Y, %m, %d, %H, %M and %S, the fields are
+    instead picked out by a regular expression, and the timestamp of the start
+    of each hour is cached, so only rows of a new hour need time.mktime().
+    Anything the fast path cannot handle falls back to time.strptime(), so the
+    result, including any ValueError, is the same as that of
+    time.mktime(time.strptime(string, format)).
+
+    Example:
+        >>> parse = DateTimeParser('%Y-%m-%d %H:%M:%S')
+        >>> parse('2024-03-01 10:15:30') == time.mktime((2024, 3, 1, 10, 15, 30, 0, 0, -1))
+        True
+        >>> parse('1/3/2024 10:15')
+        Traceback (most recent call last):
+        ...
+        ValueError: time data '1/3/2024 10:15' does not match format '%Y-%m-%d %H:%M:%S'
+        >>> DateTimeParser('%d/%m/%Y %H:%M')('1/3/2024 10:15') - parse('2024-03-01 10:00:00')
+        900
+    """
+
+    _directives = {'Y': r'(?P<Y>\d{4})', 'm': r'(?P<m>\d{1,2})', 'd': r'(?P<d>\d{1,2})',
+                   'H': r'(?P<H>\d{1,2})', 'M': r'(?P<M>\d{1,2})', 'S': r'(?P<S>\d{1,2})'}
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.regex = DateTimeParser._compile(fmt)
+
+    def __call__(self, string):
+        """Return the timestamp of a date-time string."""
+        if self.regex is not None:
+            match = self.regex.fullmatch(string)
+            if match is not None:
+                fields = match.groupdict()
+                minute = int(fields.get('M', 0))
+                second = int(fields.get('S', 0))
+                if minute < 60 and second < 62:
+                    try:
+                        return int(_start_of_hour(int(fields['Y']),
+                                                  int(fields.get('m', 1)),
+                                                  int(fields.get('d', 1)),
+                                                  int(fields.get('H', 0)))) \
+                               + minute * 60 + second
+                    except ValueError:
+                        pass
+        return int(time.mktime(time.strptime(string, self.fmt)))
+
+    @staticmethod
+    def _compile(fmt):
+        """Return a regular expression for a format, or None if the fast path
+        cannot handle it."""
+        pattern = []
+        seen = set()
+        i = 0
+        while i < len(fmt):
+            if fmt[i] == '%':
+                directive = fmt[i + 1:i + 2]
+                if directive == '%':
+                    pattern.append('%')
+                elif directive in DateTimeParser._directives and directive not in seen:
+                    pattern.append(DateTimeParser._directives[directive])
+                    seen.add(directive)
+                else:
+                    return None
+                i += 2
+            elif fmt[i].isspace():
+                # strptime() lets any run of whitespace match whitespace in
+                # the format. Leave anything unusual to strptime().
+                pattern.append(' ')
+                i += 1
+            else:
+                pattern.append(re.escape(fmt[i]))
+                i += 1
+        if 'Y' not in seen:
+            return None
+        return re.compile(''.join(pattern))
+
+
+@functools.lru_cache(maxsize=64)
+def _start_of_hour(year, month, day, hour):
+    """Return the timestamp of the start of an hour, in local time."""
+    if not 0 <= hour < 24:
+        raise ValueError("Hour out of range")
+    # Raises ValueError if the date does not exist
+    datetime.date(year, month, day)
+    return time.mktime((year, month, day, hour, 0, 0, 0, 0, -1))
+
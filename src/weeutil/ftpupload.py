@@ -5,11 +5,15 @@
 #
 """For uploading files to a remove server via FTP"""
 
+import concurrent.futures
 import ftplib
 import hashlib
+import json
 import logging
 import os
 import pickle
+import queue
+import ssl
 import sys
 import time
 
@@ -17,11 +21,46 @@ import time
 log = logging.getLogger(__name__)
 
 
+class ReusedSslSocket(ssl.SSLSocket):
+    def unwrap(self):
+        pass
+
+
+class SessionFTPTLS(ftplib.FTP_TLS):
+    """Explicit FTPS, that can resume the TLS session of another FTP session"""
+
+    # If set, the TLS session to resume when securing the control connection
+    tls_session = None
+
+    def auth(self):
+        """Set up a secure control connection, resuming tls_session if possible."""
+        resp = self.voidcmd('AUTH TLS')
+        self.sock = self.context.wrap_socket(self.sock,
+                                             server_hostname=self.host,
+                                             session=self.tls_session)
+        self.file = self.sock.makefile(mode='r', encoding=self.encoding)
+        return resp
+
+
+class WeeFTPTLS(SessionFTPTLS):
+    """Explicit FTPS, with shared TLS session"""
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            conn = self.context.wrap_socket(conn,
+                                            server_hostname=self.host,
+                                            session=self.sock.session)
+            conn.__class__ = ReusedSslSocket
+        return conn, size
+
+
 class FtpUpload:
     """Uploads a directory and all its descendants to a remote server.
     
-    Keeps track of when a file was last uploaded, so it is uploaded only
-    if its modification time is newer."""
+    Keeps a manifest with the size, modification time and hash of every file
+    uploaded, so a file is uploaded only if it has changed. A file is hashed only
+    if its size or modification time has changed."""
 
     def __init__(self, server,
                  user, password,
@@ -34,7 +73,8 @@ class FtpUpload:
                  secure_data=True,
                  reuse_ssl=False,
                  encoding='utf-8',
-                 ciphers=None):
+                 ciphers=None,
+                 workers=1):
         """Initialize an instance of FtpUpload.
         
         After initializing, call method run() to perform the upload.
@@ -67,6 +107,9 @@ class FtpUpload:
         oddballs that use Latin-1.
 
         ciphers: Explicitly set the cipher(s) to be used by the ssl sockets.
+
+        workers: How many files to upload at the same time, each over its own FTP session.
+        [Optional. Default is 1]
         """
         self.server = server
         self.user = user
@@ -82,6 +125,16 @@ class FtpUpload:
         self.reuse_ssl = reuse_ssl
         self.encoding = encoding
         self.ciphers = ciphers
+        self.workers = max(int(workers), 1)
+
+        # Statistics about the last run
+        self.n_skipped = 0
+        self.n_hashed = 0
+        self.n_bytes = 0
+
+        # The SSL context and TLS session shared by all the sessions of a run
+        self.context = None
+        self.tls_session = None
 
         if self.reuse_ssl and (sys.version_info.major < 3 or sys.version_info.minor < 6):
             raise ValueError("Reusing an SSL connection requires Python version 3.6 or greater")
@@ -91,74 +144,144 @@ class FtpUpload:
         
         returns: the number of files uploaded."""
 
-        # Get the timestamp and members of the last upload:
-        timestamp, fileset, hashdict = self.get_last_upload()
-
+        # Get what was uploaded the last time:
+        manifest = self.get_manifest()
+
+        self.n_skipped = self.n_hashed = self.n_bytes = 0
+        self.context = self.tls_session = None
+        # Files that need to be uploaded. Each is a tuple (relative path, remote path, entry),
+        # where entry is what should be saved in the manifest after a successful upload.
+        uploads = []
+        # FTP sessions that are currently idle, and all sessions, so they can be closed.
+        idle = queue.Queue()
+        sessions = []
         n_uploaded = 0
 
         try:
-            if self.secure:
-                log.debug("Attempting secure connection to %s", self.server)
-                if self.reuse_ssl:
-                    # Activate the workaround for the Python ftplib library.
-                    from ssl import SSLSocket
-
-                    class ReusedSslSocket(SSLSocket):
-                        def unwrap(self):
-                            pass
-
-                    class WeeFTPTLS(ftplib.FTP_TLS):
-                        """Explicit FTPS, with shared TLS session"""
-
-                        def ntransfercmd(self, cmd, rest=None):
-                            conn, size = ftplib.FTP.ntransfercmd(self, cmd, rest)
-                            if self._prot_p:
-                                conn = self.context.wrap_socket(conn,
-                                                                server_hostname=self.host,
-                                                                session=self.sock.session)
-                                conn.__class__ = ReusedSslSocket
-                            return conn, size
-                    log.debug("Reusing SSL connections.")
-                    # Python 3.8 and earlier do not support the encoding 
-                    # parameter. Be prepared to catch the TypeError that may 
-                    # occur with python 3.8 and earlier.
-                    try:
-                        ftp_server = WeeFTPTLS(encoding=self.encoding)
-                    except TypeError:
-                        # we likely have python 3.8 or earlier, so try again
-                        # without encoding
-                        ftp_server = WeeFTPTLS()
-                        log.debug("FTP encoding not supported, ignoring.")
-                else:
-                    # Python 3.8 and earlier do not support the encoding 
-                    # parameter. Be prepared to catch the TypeError that may 
-                    # occur with python 3.8 and earlier.
+            ftp_server = self.connect()
+            sessions.append(ftp_server)
+
+            # Walk the local directory structure
+            for (dirpath, unused_dirnames, filenames) in os.walk(self.local_root):
+
+                # Strip out the common local root directory. What is left
+                # will be the relative directory both locally and remotely.
+                local_rel_dir_path = dirpath.replace(self.local_root, '.')
+                if _skip_this_dir(local_rel_dir_path):
+                    continue
+                # This is the absolute path to the remote directory:
+                remote_dir_path = os.path.normpath(os.path.join(self.remote_root,
+                                                                local_rel_dir_path))
+
+                # Make the remote directory if necessary:
+                _make_remote_dir(ftp_server, remote_dir_path)
+
+                # Now iterate over all members of the local directory:
+                for filename in filenames:
+                    if _skip_this_name(filename):
+                        continue
+
+                    full_local_path = os.path.join(dirpath, filename)
+                    rel_path = os.path.relpath(full_local_path, self.local_root)
+
+                    entry = self.check_file(full_local_path, manifest.get(rel_path))
+                    if entry is None:
+                        # The file has not changed
+                        self.n_skipped += 1
+                        continue
+                    if entry[2] == manifest.get(rel_path, [None, None, None])[2]:
+                        # Only the size or time changed. Keep the new ones, so the file does not
+                        # have to be hashed next time.
+                        manifest[rel_path] = entry
+                        self.n_skipped += 1
+                        continue
+
+                    uploads.append((rel_path, os.path.join(remote_dir_path, filename), entry))
+
+            idle.put(ftp_server)
+
+            def upload(rel_path, full_remote_path):
+                # Use an idle session if there is one. Otherwise, open another one. There are
+                # never more sessions than workers.
+                try:
+                    session = idle.get_nowait()
+                except queue.Empty:
+                    session = self.connect()
+                    sessions.append(session)
+                try:
+                    self.upload_file(session, rel_path, full_remote_path)
+                except BaseException:
+                    # The session may be unusable. Do not give it to another upload.
+                    session.close()
+                    raise
+                idle.put(session)
+
+            errors = []
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(upload, rel_path, full_remote_path): (rel_path, entry)
+                           for rel_path, full_remote_path, entry in uploads}
+                for future in concurrent.futures.as_completed(futures):
+                    rel_path, entry = futures[future]
                     try:
-                        ftp_server = ftplib.FTP_TLS(encoding=self.encoding)
-                    except TypeError:
-                        # we likely have python 3.8 or earlier, so try again
-                        # without encoding
-                        ftp_server = ftplib.FTP_TLS()
-                        log.debug("FTP encoding not supported, ignoring.")
+                        future.result()
+                    except ftplib.all_errors as e:
+                        errors.append(e)
+                    else:
+                        # Success.
+                        n_uploaded += 1
+                        self.n_bytes += entry[0]
+                        manifest[rel_path] = entry
+            if errors:
+                raise errors[0]
+        finally:
+            for session in sessions:
+                try:
+                    session.quit()
+                except Exception:
+                    pass
+            # Remember what was uploaded, even if not all of it could be
+            self.save_manifest(manifest)
+
+        return n_uploaded
+
+    def connect(self):
+        """Open and log in to a new FTP session."""
 
+        if self.secure:
+            log.debug("Attempting secure connection to %s", self.server)
+            if self.reuse_ssl:
+                # Activate the workaround for the Python ftplib library.
+                log.debug("Reusing SSL connections.")
+                ftp_class = WeeFTPTLS
+            else:
+                ftp_class = SessionFTPTLS
+        else:
+            log.debug("Attempting connection to %s", self.server)
+            ftp_class = ftplib.FTP
+
+        # Python 3.8 and earlier do not support the encoding parameter. Be prepared to catch the
+        # TypeError that may occur with python 3.8 and earlier.
+        try:
+            ftp_server = ftp_class(encoding=self.encoding)
+        except TypeError:
+            # we likely have python 3.8 or earlier, so try again
+            # without encoding
+            ftp_server = ftp_class()
+            log.debug("FTP encoding not supported, ignoring.")
+
+        if self.secure:
+            if self.context is None:
                 # If the user has specified one, set a customized cipher:
                 if self.ciphers:
                     ftp_server.context.set_ciphers(self.ciphers)
                     log.debug("Set ciphers to %s", self.ciphers)
-
+                self.context = ftp_server.context
             else:
-                log.debug("Attempting connection to %s", self.server)
-                # Python 3.8 and earlier do not support the encoding parameter. 
-                # Be prepared to catch the TypeError that may occur with 
-                # python 3.8 and earlier.
-                try:
-                    ftp_server = ftplib.FTP(encoding=self.encoding)
-                except TypeError:
-                    # we likely have python 3.8 or earlier, so try again
-                    # without encoding
-                    ftp_server = ftplib.FTP()
-                    log.debug("FTP encoding not supported, ignoring.")
+                # A TLS session can only be resumed with the context that created it
+                ftp_server.context = self.context
+            ftp_server.tls_session = self.tls_session
 
+        try:
             if self.debug >= 2:
                 ftp_server.set_debuglevel(self.debug)
 
@@ -170,120 +293,102 @@ class FtpUpload:
                 log.debug("Secure data connection to %s", self.server)
             else:
                 log.debug("Connected to %s", self.server)
+        except BaseException:
+            ftp_server.close()
+            raise
 
-            # Walk the local directory structure
-            for (dirpath, unused_dirnames, filenames) in os.walk(self.local_root):
+        if self.secure and self.tls_session is None:
+            # Later sessions can resume this one, saving a full handshake
+            self.tls_session = getattr(ftp_server.sock, 'session', None)
 
-                # Strip out the common local root directory. What is left
-                # will be the relative directory both locally and remotely.
-                local_rel_dir_path = dirpath.replace(self.local_root, '.')
-                if _skip_this_dir(local_rel_dir_path):
-                    continue
-                # This is the absolute path to the remote directory:
-                remote_dir_path = os.path.normpath(os.path.join(self.remote_root,
-                                                                local_rel_dir_path))
+        return ftp_server
 
-                # Make the remote directory if necessary:
-                _make_remote_dir(ftp_server, remote_dir_path)
+    def check_file(self, full_local_path, entry):
+        """Check whether a file has changed since it was last uploaded.
 
-                # Now iterate over all members of the local directory:
-                for filename in filenames:
+        full_local_path: The path to the file.
 
-                    full_local_path = os.path.join(dirpath, filename)
+        entry: Its entry in the manifest, or None if it is not there.
 
-                    # calculate hash
-                    filehash=sha256sum(full_local_path)
+        returns: None if the file has not changed. Otherwise, the entry for the file as it is
+        now."""
 
-                    # See if this file can be skipped:
-                    if _skip_this_file(timestamp, fileset, hashdict, full_local_path, filehash):
-                        continue
+        stat = os.stat(full_local_path)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            # Same size and time. No need to look at the contents.
+            return None
+        self.n_hashed += 1
+        return [stat.st_size, stat.st_mtime_ns, sha256sum(full_local_path)]
 
-                    full_remote_path = os.path.join(remote_dir_path, filename)
-                    stor_cmd = "STOR %s" % full_remote_path
-
-                    log.debug("%s %s/%s %s" % (n_uploaded,local_rel_dir_path,filename,filehash))
-
-                    with open(full_local_path, 'rb') as fd:
-                        try:
-                            ftp_server.storbinary(stor_cmd, fd)
-                        except ftplib.all_errors as e:
-                            # Unsuccessful. Log it, then reraise the exception
-                            log.error("Failed uploading %s to server %s. Reason: '%s'",
-                                      full_local_path, self.server, e)
-                            raise
-                    # Success.
-                    n_uploaded += 1
-                    fileset.add(full_local_path)
-                    hashdict[full_local_path]=filehash
-                    log.debug("Uploaded file %s to %s", full_local_path, full_remote_path)
-        finally:
+    def upload_file(self, ftp_server, rel_path, full_remote_path):
+        """Upload a single file, using an FTP session."""
+
+        full_local_path = os.path.join(self.local_root, rel_path)
+        with open(full_local_path, 'rb') as fd:
             try:
-                ftp_server.quit()
-            except Exception:
-                pass
+                ftp_server.storbinary("STOR %s" % full_remote_path, fd)
+            except ftplib.all_errors as e:
+                # Unsuccessful. Log it, then reraise the exception
+                log.error("Failed uploading %s to server %s. Reason: '%s'",
+                          full_local_path, self.server, e)
+                raise
+        log.debug("Uploaded file %s to %s", full_local_path, full_remote_path)
 
-        timestamp = time.time()
-        self.save_last_upload(timestamp, fileset, hashdict)
-        return n_uploaded
+    def get_manifest(self):
+        """Reads the manifest of the last upload from the local root.
 
-    def get_last_upload(self):
-        """Reads the time and members of the last upload from the local root"""
+        returns: A dictionary. The key is the path of a file, relative to the local root. The
+        value is a list with its size, modification time in nanoseconds, and SHA256 hash, when
+        it was last uploaded."""
 
-        timestamp_file_path = os.path.join(self.local_root, "#%s.last" % self.name)
+        manifest_path = os.path.join(self.local_root, "#%s.manifest" % self.name)
 
-        # If the file does not exist, an IOError exception will be raised. 
+        try:
+            with open(manifest_path, "r") as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            # Either the file does not exist, or it is garbled.
+            pass
+
+        # Convert what the last upload of an earlier version of WeeWX recorded, so that files
+        # that have not changed are not uploaded again.
+        manifest = {}
+        timestamp_file_path = os.path.join(self.local_root, "#%s.last" % self.name)
+        # If the file does not exist, an IOError exception will be raised.
         # If the file exists, but is truncated, an EOFError will be raised.
         # Either way, be prepared to catch it.
         try:
             with open(timestamp_file_path, "rb") as f:
-                timestamp = pickle.load(f)
-                fileset = pickle.load(f)
+                pickle.load(f)
+                pickle.load(f)
                 hashdict = pickle.load(f)
-        except (IOError, EOFError, pickle.PickleError, AttributeError):
-            timestamp = 0
-            fileset = set()
-            hashdict = {}
-            # Either the file does not exist, or it is garbled.
-            # Either way, it's safe to remove it.
-            try:
-                os.remove(timestamp_file_path)
-            except OSError:
-                pass
+            for full_local_path, filehash in hashdict.items():
+                rel_path = os.path.relpath(full_local_path, self.local_root)
+                # Without size and time, the file will be hashed, then skipped if unchanged.
+                manifest[rel_path] = [None, None, filehash]
+        except (IOError, EOFError, pickle.PickleError, AttributeError, ValueError):
+            pass
+        # Either way, it is no longer needed.
+        try:
+            os.remove(timestamp_file_path)
+        except OSError:
+            pass
 
-        return timestamp, fileset, hashdict
+        return manifest
 
-    def save_last_upload(self, timestamp, fileset, hashdict):
-        """Saves the time and members of the last upload in the local root."""
-        timestamp_file_path = os.path.join(self.local_root, "#%s.last" % self.name)
-        with open(timestamp_file_path, "wb") as f:
-            pickle.dump(timestamp, f)
-            pickle.dump(fileset, f)
-            pickle.dump(hashdict, f)
-
-
-def _skip_this_file(timestamp, fileset, hashdict, full_local_path, filehash):
-    """Determine whether to skip a specific file."""
-
-    filename = os.path.basename(full_local_path)
-    if filename[-1] == '~' or filename[0] == '#':
-        return True
-
-    if full_local_path not in fileset:
-        return False
-
-    if filehash is not None:
-        # use hash if available
-        if full_local_path not in hashdict:
-            return False
-        if hashdict[full_local_path] != filehash:
-            return False
-    else:
-        # otherwise use file time
-        if os.stat(full_local_path).st_mtime > timestamp:
-            return False
-
-    # Filename is in the set, and is up-to-date.
-    return True
+    def save_manifest(self, manifest):
+        """Saves the manifest of the last upload in the local root."""
+        manifest_path = os.path.join(self.local_root, "#%s.manifest" % self.name)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+
+
+def _skip_this_name(filename):
+    """Determine whether to skip a file because of its name."""
+
+    return filename[-1] == '~' or filename[0] == '#'
 
 
 def _skip_this_dir(local_dir):
@@ -83,11 +83,16 @@ else:
     address = ('localhost', 514)
     facility = 'user'
 
+# The process name given to setup(), so that worker processes can log under the same name
+log_process_name = None
+
 
 def setup(process_name, config_dict=None):
     """Set up the weewx logging facility"""
 
-    global address, facility
+    global address, facility, log_process_name
+
+    log_process_name = process_name
 
     # Create a ConfigObj from the default string. No interpolation (it interferes with the
     # interpolation directives embedded in the string).
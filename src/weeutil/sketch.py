@@ -0,0 +1,185 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+"""A compact summary of a set of values, from which their quantiles can be estimated.
+
+The sketch is a DDSketch. See Masson, Rim, and Lee, "DDSketch: A Fast and Fully-Mergeable
+Quantile Sketch with Relative-Error Guarantees", VLDB 2019. Values are counted in buckets whose
+bounds grow geometrically, so any quantile can be estimated to within a given relative accuracy,
+no matter how many values have been added. Two sketches can be merged without losing accuracy,
+so the sketches of days can be merged into the sketch of a year.
+"""
+
+import json
+import math
+
+
+class QuantileSketch:
+    """Estimates the quantiles of a set of values.
+
+    Examples:
+        >>> sketch = QuantileSketch()
+        >>> for x in range(1, 101):
+        ...     sketch.add(x)
+        >>> sketch.count
+        100
+        >>> print("%.1f" % sketch.quantile(0.5))
+        49.9
+        >>> other = QuantileSketch.from_string(sketch.to_string())
+        >>> other.merge(sketch)
+        >>> print("%d %.1f" % (other.count, other.quantile(0.95)))
+        200 94.6
+    """
+
+    __slots__ = ('relative_accuracy', 'gamma', 'log_gamma', 'positive', 'negative', 'zero_count')
+
+    def __init__(self, relative_accuracy=0.01):
+        """Initialize an empty sketch.
+
+        Args:
+            relative_accuracy (float): The relative error of the estimated quantiles. Default is
+                0.01, that is, within 1 percent.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        # The counts of the buckets of the positive values, and of the negative values. The key
+        # is the index of the bucket.
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+
+    @property
+    def count(self):
+        """The number of values in the sketch."""
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zero_count
+
+    def add(self, value, count=1):
+        """Add a value to the sketch. None and NaN are ignored."""
+        if value is None or value != value:
+            return
+        if value > 0:
+            key = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[key] = self.positive.get(key, 0) + count
+        elif value < 0:
+            key = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[key] = self.negative.get(key, 0) + count
+        else:
+            self.zero_count += count
+
+    def merge(self, other):
+        """Merge the values of another sketch, with the same relative accuracy, into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches of different relative accuracy")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+
+    def quantile(self, q):
+        """Estimate a quantile of the values.
+
+        Args:
+            q (float): The quantile, between 0 and 1. For example, 0.5 for the median.
+
+        Returns:
+            float|None: The estimate, or None if the sketch is empty.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        count = self.count
+        if not count:
+            return None
+        rank = q * (count - 1)
+
+        # Go through the buckets from the lowest value to the highest.
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        # Only reached because of rounding. Return the highest value.
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def _value(self, key):
+        """The value that represents a bucket."""
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def to_string(self):
+        """Return the sketch in a compact string, suitable for a database."""
+        return json.dumps({
+            'a': self.relative_accuracy,
+            'p': [x for key in sorted(self.positive) for x in (key, self.positive[key])],
+            'n': [x for key in sorted(self.negative) for x in (key, self.negative[key])],
+            'z': self.zero_count,
+        }, separators=(',', ':'))
+
+    @classmethod
+    def from_string(cls, sketch_str):
+        """Return a sketch saved by to_string()."""
+        d = json.loads(sketch_str)
+        sketch = cls(d['a'])
+        sketch.positive = dict(zip(d['p'][::2], d['p'][1::2]))
+        sketch.negative = dict(zip(d['n'][::2], d['n'][1::2]))
+        sketch.zero_count = d['z']
+        return sketch
+
+    def __eq__(self, other):
+        return isinstance(other, QuantileSketch) \
+               and self.relative_accuracy == other.relative_accuracy \
+               and self.positive == other.positive \
+               and self.negative == other.negative \
+               and self.zero_count == other.zero_count
+
+    def __repr__(self):
+        return "QuantileSketch(count=%d)" % self.count
+
+
+def quantile(values, q):
+    """Calculate a quantile of a list of values exactly, by interpolating linearly between the
+    two nearest values.
+
+    Example:
+        >>> print(quantile([3.0, 1.0, 4.0, 1.0, 5.0], 0.5))
+        3.0
+        >>> print(quantile([1.0, 2.0], 0.95))
+        1.95
+        >>> print(quantile([], 0.5))
+        None
+
+    Args:
+        values (list[float]): The values. They need not be sorted.
+        q (float): The quantile, between 0 and 1.
+
+    Returns:
+        float|None: The quantile, or None if there are no values.
+    """
+    if not 0 <= q <= 1:
+        raise ValueError("Quantile must be between 0 and 1")
+    if not values:
+        return None
+    values = sorted(values)
+    rank = q * (len(values) - 1)
+    i = int(rank)
+    if i + 1 >= len(values):
+        return values[-1]
+    return values[i] + (values[i + 1] - values[i]) * (rank - i)
+
+
+if __name__ == '__main__':
+    import doctest
+
+    if not doctest.testmod().failed:
+        print("PASSED")
@@ -0,0 +1,87 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+"""Test module weeutil.ftpupload"""
+
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import weeutil.ftpupload
+
+
+class TestFtpUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.local_root = self.tmpdir.name
+        os.mkdir(os.path.join(self.local_root, 'NOAA'))
+        for name in ('index.html', 'NOAA/NOAA-2025.txt', 'NOAA/NOAA-2026.txt'):
+            self.write(name, name)
+        patcher = mock.patch('weeutil.ftpupload.ftplib.FTP')
+        self.mock_ftp = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, contents):
+        with open(os.path.join(self.local_root, name), 'w') as f:
+            f.write(contents)
+
+    def run_upload(self, workers=1):
+        ftp = weeutil.ftpupload.FtpUpload('ftp.example.com', 'user', 'password',
+                                          self.local_root, '/weather', workers=workers)
+        n = ftp.run()
+        stored = sorted(c.args[0] for c in self.mock_ftp.return_value.storbinary.call_args_list)
+        self.mock_ftp.return_value.storbinary.reset_mock()
+        return ftp, n, stored
+
+    def test_changes(self):
+        ftp, n, stored = self.run_upload()
+        self.assertEqual(n, 3)
+        self.assertEqual(stored, ['STOR /weather/NOAA/NOAA-2025.txt',
+                                  'STOR /weather/NOAA/NOAA-2026.txt',
+                                  'STOR /weather/index.html'])
+
+        # Nothing changed. Nothing should be hashed, or uploaded.
+        ftp, n, stored = self.run_upload()
+        self.assertEqual((n, ftp.n_skipped, ftp.n_hashed), (0, 3, 0))
+
+        # Change the contents of one file, and only the time of another
+        self.write('NOAA/NOAA-2026.txt', 'new contents')
+        st = os.stat(os.path.join(self.local_root, 'index.html'))
+        os.utime(os.path.join(self.local_root, 'index.html'),
+                 ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        ftp, n, stored = self.run_upload()
+        self.assertEqual(stored, ['STOR /weather/NOAA/NOAA-2026.txt'])
+        self.assertEqual((ftp.n_skipped, ftp.n_hashed), (2, 2))
+
+        # The new time of index.html has been saved, so it is not hashed again
+        ftp, n, stored = self.run_upload()
+        self.assertEqual((n, ftp.n_hashed), (0, 0))
+
+    def test_workers(self):
+        ftp, n, stored = self.run_upload(workers=2)
+        self.assertEqual(n, 3)
+        self.assertEqual(len(stored), 3)
+        # There should never be more sessions than workers
+        self.assertLessEqual(self.mock_ftp.return_value.login.call_count, 2)
+
+    def test_old_last_upload(self):
+        """Files recorded by the old '#FTP.last' file should not be uploaded again"""
+        path = os.path.join(self.local_root, 'index.html')
+        with open(os.path.join(self.local_root, '#FTP.last'), 'wb') as f:
+            pickle.dump(0, f)
+            pickle.dump({path}, f)
+            pickle.dump({path: weeutil.ftpupload.sha256sum(path)}, f)
+        ftp, n, stored = self.run_upload()
+        self.assertEqual(n, 2)
+        self.assertNotIn('STOR /weather/index.html', stored)
+        self.assertFalse(os.path.exists(os.path.join(self.local_root, '#FTP.last')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+"""Test module weeutil.sketch"""
+
+import random
+import unittest
+
+import weeutil.sketch
+from weeutil.sketch import QuantileSketch
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(42)
+        # Temperatures, on both sides of zero
+        self.values = [rng.gauss(5.0, 10.0) for _ in range(5000)] + [0.0] * 10
+
+    def test_accuracy(self):
+        sketch = QuantileSketch()
+        for value in self.values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(self.values))
+        ordered = sorted(self.values)
+        for q in (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99):
+            expected = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), expected, delta=0.01 * abs(expected),
+                                   msg="quantile %s" % q)
+
+    def test_merge(self):
+        """Merging the sketches of parts should give the sketch of the whole"""
+        whole = QuantileSketch()
+        parts = [QuantileSketch() for _ in range(7)]
+        for i, value in enumerate(self.values):
+            whole.add(value)
+            parts[i % 7].add(value)
+        merged = QuantileSketch()
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged, whole)
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(0.02))
+
+    def test_string(self):
+        sketch = QuantileSketch()
+        for value in self.values:
+            sketch.add(value)
+        self.assertEqual(QuantileSketch.from_string(sketch.to_string()), sketch)
+
+    def test_empty(self):
+        sketch = QuantileSketch()
+        sketch.add(None)
+        sketch.add(float('nan'))
+        self.assertEqual(sketch.count, 0)
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertIsNone(weeutil.sketch.quantile([], 0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,7 @@
 #
 """Test routines for weeutil.weeutil."""
 
+import pickle
 import unittest
 
 from weeutil.weeutil import *  # @UnusedWildImport
@@ -449,6 +450,10 @@ class WeeutilTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             _ = TimeSpan(1231000000, 1230000000)
 
+        # Test pickling
+        self.assertEqual(pickle.loads(pickle.dumps(t)), t)
+        self.assertIsInstance(pickle.loads(pickle.dumps(t)), TimeSpan)
+
     def test_genYearSpans(self):
 
         os.environ['TZ'] = 'America/Los_Angeles'
@@ -15,6 +15,7 @@ import cmath
 import datetime
 import importlib
 import math
+import multiprocessing
 import os
 import re
 import shutil
@@ -171,6 +172,11 @@ class TimeSpan(tuple):
             raise ValueError("start time (%d) is greater than stop time (%d)" % (args[0], args[1]))
         return tuple.__new__(cls, args)
 
+    def __getnewargs__(self):
+        # Needed for pickling, because __new__() takes the start and stop times as separate
+        # arguments.
+        return tuple(self)
+
     @property
     def start(self):
         return self[0]
@@ -465,6 +471,57 @@ def archiveHoursAgoSpan(time_ts, hours_ago=0):
                     int(time.mktime(stop_span_dt.timetuple())))
 
 
+def archiveHourSpan(time_ts):
+    """Returns the one-hour long TimeSpan that includes a given time.
+
+    NB: A timestamp that falls exactly on the hour boundary is considered to belong to the
+    *previous* hour.
+
+    Unlike archiveHoursAgoSpan(), the hours line up with local midnight even in time zones
+    whose offset from UTC is not a whole number of hours, and every hour is exactly 3600 seconds
+    long, even the hour that is repeated when daylight savings time ends.
+
+    Args:
+        time_ts (float|None): A timestamp. An hour long time span will be returned that
+            encompasses this timestamp.
+
+    Returns:
+        TimeSpan: A TimeSpan object one hour long, that includes time_ts.
+
+    Example:
+        >>> os.environ['TZ'] = 'America/Los_Angeles'
+        >>> time.tzset()
+        >>> time_ts = time.mktime(time.strptime("2013-07-04 01:57:35", "%Y-%m-%d %H:%M:%S"))
+        >>> print(archiveHourSpan(time_ts))
+        [2013-07-04 01:00:00 PDT (1372924800) -> 2013-07-04 02:00:00 PDT (1372928400)]
+        >>> print(archiveHourSpan(1372924800))
+        [2013-07-04 00:00:00 PDT (1372921200) -> 2013-07-04 01:00:00 PDT (1372924800)]
+
+        The hour between 01:00 and 02:00 happens twice on 3 November 2013:
+        >>> print(archiveHourSpan(1383467400))
+        [2013-11-03 01:00:00 PDT (1383465600) -> 2013-11-03 01:00:00 PST (1383469200)]
+        >>> print(archiveHourSpan(1383471000))
+        [2013-11-03 01:00:00 PST (1383469200) -> 2013-11-03 02:00:00 PST (1383472800)]
+
+        India is 5 1/2 hours ahead of UTC:
+        >>> os.environ['TZ'] = 'Asia/Kolkata'
+        >>> time.tzset()
+        >>> print(archiveHourSpan(1372924800))
+        [2013-07-04 13:00:00 IST (1372923000) -> 2013-07-04 14:00:00 IST (1372926600)]
+    """
+    if time_ts is None:
+        return None
+
+    # Use the offset from UTC to find the start of the local hour
+    start_ts = int(time_ts - (time_ts + time.localtime(time_ts).tm_gmtoff) % 3600)
+
+    # If we are exactly at an hour boundary, the archive hour is actually the *previous* hour.
+    if start_ts == time_ts:
+        start_ts -= 3600
+
+    return TimeSpan(start_ts, start_ts + 3600)
+
+
 def daySpan(time_ts, days_ago=0, archive=False):
     """Returns a one-day long TimeSpan for x days ago that includes a given time.
 
@@ -1410,6 +1467,19 @@ def get_object(module_class):
 _get_object = get_object
 
 
+def get_worker_context():
+    """Return the multiprocessing context to be used to start worker processes.
+
+    Workers are never forked directly: the process starting them may have other threads, and
+    any lock held by one of those threads would be inherited, locked, by the child. Use a fork
+    server if the platform has one, otherwise spawn a fresh interpreter. Either way, a worker
+    starts without the state of its parent, so it has to be given everything it needs.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
 class GenWithPeek:
     """Generator object which allows a peek at the next object to be returned.
     
@@ -101,6 +101,10 @@ defaults_dict = weeutil.config.config_from_str(DEFAULTS_INI)
 accum_dict = ListOfDicts(defaults_dict['Accumulator'].dict())
 
 
+# How many different sets of observation types an accumulator remembers the add functions for
+MAX_ADDER_SETS = 64
+
+
 class OutOfSpan(ValueError):
     """Raised when attempting to add a record outside the timespan held by an accumulator"""
 
@@ -114,6 +118,8 @@ class FirstLastAccum:
     It can only return the first and last value it has seen, along with their timestamps.
     """
 
+    __slots__ = ('first', 'firsttime', 'last', 'lasttime')
+
     default_init = (None, None, None, None, 0.0, 0, 0.0, 0)
 
     def __init__(self, stats_tuple=None):
@@ -170,6 +176,8 @@ class FirstLastAccum:
 class ScalarStats(FirstLastAccum):
     """Accumulates statistics (min, max, average, etc.) for a scalar value."""
 
+    __slots__ = ('min', 'mintime', 'max', 'maxtime', 'sum', 'count', 'wsum', 'sumtime')
+
     def __init__(self, stats_tuple=None):
         # Call my superclass's version
         FirstLastAccum.__init__(self, stats_tuple)
@@ -218,10 +226,11 @@ class ScalarStats(FirstLastAccum):
         FirstLastAccum.addHiLo(self, val, ts)
 
         # If necessary, convert to float. Be prepared to catch an exception if not possible.
-        try:
-            val = to_float(val)
-        except ValueError:
-            val = None
+        if val.__class__ is not float:
+            try:
+                val = to_float(val)
+            except ValueError:
+                val = None
 
         # Check for None and NaN:
         if val is not None and val == val:
@@ -236,10 +245,11 @@ class ScalarStats(FirstLastAccum):
         """Add a scalar value to my running sum and count."""
 
         # If necessary, convert to float. Be prepared to catch an exception if not possible.
-        try:
-            val = to_float(val)
-        except ValueError:
-            val = None
+        if val.__class__ is not float:
+            try:
+                val = to_float(val)
+            except ValueError:
+                val = None
 
         # Check for None and NaN:
         if val is not None and val == val:
@@ -263,6 +273,10 @@ class VecStats:
     Property 'last' is the last non-None value seen. It is a two-way tuple (mag, dir).
     Property 'lasttime' is the time it was seen. """
 
+    __slots__ = ('min', 'mintime', 'max', 'maxtime', 'sum', 'count', 'wsum', 'sumtime',
+                 'max_dir', 'xsum', 'ysum', 'dirsumtime', 'squaresum', 'wsquaresum',
+                 'last', 'lasttime')
+
     default_init = (None, None, None, None,
                     0.0, 0, 0.0, 0, None, 0.0, 0.0, 0, 0.0, 0.0)
 
@@ -420,22 +434,37 @@ class Accum(dict):
         # first observation comes in for normal operation or pre-set if
         # obtaining a historical accumulator.
         self.unit_system = unit_system
+        # The add functions for each set of observation types seen so far. Packets from a given
+        # station usually have the same types, so they only have to be looked up once.
+        self.adders = {}
 
     def addRecord(self, record, add_hilo=True, weight=1):
-        """Add a record to my running statistics. 
+        """Add a record, or a collection of records, to my running statistics. 
         
-        The record must have keys 'dateTime' and 'usUnits'."""
-
-        # Check to see if the record is within my observation timespan 
-        if not self.timespan.includesArchiveTime(record['dateTime']):
-            raise OutOfSpan("Attempt to add out-of-interval record (%s) to timespan (%s)"
-                            % (timestamp_to_string(record['dateTime']), self.timespan))
-
-        for obs_type in record:
-            # Get the proper function ...
-            func = get_add_function(obs_type)
-            # ... then call it.
-            func(self, record, obs_type, add_hilo, weight)
+        Each record must have keys 'dateTime' and 'usUnits'."""
+
+        # Determine if record is just a single dictionary instance (in which case it will have
+        # method 'keys'). If so, wrap it in something iterable (a list):
+        record_list = [record] if hasattr(record, 'keys') else record
+
+        for record in record_list:
+            # Check to see if the record is within my observation timespan
+            if not self.timespan.includesArchiveTime(record['dateTime']):
+                raise OutOfSpan("Attempt to add out-of-interval record (%s) to timespan (%s)"
+                                % (timestamp_to_string(record['dateTime']), self.timespan))
+
+            # Get the proper functions ...
+            obs_types = tuple(record)
+            adders = self.adders.get(obs_types)
+            if adders is None:
+                if len(self.adders) >= MAX_ADDER_SETS:
+                    # The types keep changing. Do not let the cache grow without limit.
+                    self.adders.clear()
+                adders = [(obs_type, get_add_function(obs_type)) for obs_type in obs_types]
+                self.adders[obs_types] = adders
+            # ... then call them.
+            for obs_type, func in adders:
+                func(self, record, obs_type, add_hilo, weight)
 
     def updateHiLo(self, accumulator):
         """Merge the high/low stats of another accumulator into me."""
@@ -491,11 +520,14 @@ class Accum(dict):
         val = record[obs_type]
 
         # If the type has not been seen before, initialize it
-        self._init_type(obs_type)
+        try:
+            stats = self[obs_type]
+        except KeyError:
+            stats = self[obs_type] = new_accumulator(obs_type)
         # Then add to highs/lows, and to the running sum:
         if add_hilo:
-            self[obs_type].addHiLo(val, record['dateTime'])
-        self[obs_type].addSum(val, weight=weight)
+            stats.addHiLo(val, record['dateTime'])
+        stats.addSum(val, weight=weight)
 
     def add_wind_value(self, record, obs_type, add_hilo, weight):
         """Add a single observation of type wind to myself."""
@@ -8,9 +8,12 @@
 This module can optionally use PyEphem, which offers high quality
 astronomical calculations. See http://rhodesmill.org/pyephem. """
 
+import collections
 import copy
+import functools
 import math
 import sys
+import threading
 import time
 
 import weeutil.Moon
@@ -26,6 +29,68 @@ except ImportError:
 # A list of almanacs. Each entry should be a subclass of AlmanacType.
 almanacs = []
 
+
+class EphemerisCache:
+    """Cache of the times of the daily events of heavenly bodies, such as when the sun rises on
+    a given day, and of the lunations (the times between new moons).
+
+    The time of a daily event depends only on the body, the day, and the observer, so once
+    calculated it can be reused by every tag that asks for it, such as the many in a table of a
+    year of sunrises. Times of events relative to an arbitrary instant, such as
+    $almanac.sun.next_rising, or the position of a body, are always calculated afresh.
+
+    The cache is shared by all threads, and holds at most max_entries events, discarding the
+    least recently used.
+    """
+
+    def __init__(self, max_entries=4096, max_lunations=24):
+        self.max_entries = max_entries
+        self.max_lunations = max_lunations
+        self.events = collections.OrderedDict()
+        self.lunations = collections.deque(maxlen=max_lunations)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_event(self, key, calc_fn):
+        """Return the cached result for key. If there is none, calculate it by calling calc_fn(),
+        and cache it."""
+        with self.lock:
+            if key in self.events:
+                self.events.move_to_end(key)
+                self.hits += 1
+                return self.events[key]
+            self.misses += 1
+        result = calc_fn()
+        with self.lock:
+            self.events[key] = result
+            while len(self.events) > self.max_entries:
+                self.events.popitem(last=False)
+        return result
+
+    def get_lunation(self, time_djd):
+        """Return the times, in Dublin Julian Days, of the new moons before and after a time."""
+        with self.lock:
+            for djd1, djd2 in self.lunations:
+                if djd1 <= time_djd < djd2:
+                    self.hits += 1
+                    return djd1, djd2
+            self.misses += 1
+        lunation = (float(ephem.previous_new_moon(time_djd)), float(ephem.next_new_moon(time_djd)))
+        with self.lock:
+            self.lunations.append(lunation)
+        return lunation
+
+    def clear(self):
+        """Empty the cache."""
+        with self.lock:
+            self.events.clear()
+            self.lunations.clear()
+
+
+# The cache used by all almanacs
+ephemeris_cache = EphemerisCache()
+
 # NB: Have Almanac inherit from 'object'. However, this will cause
 # an 'autocall' bug in Cheetah versions before 2.1.
 class Almanac:
@@ -360,8 +425,7 @@ class PyEphemAlmanacType(AlmanacType):
         elif attr=='moon_fullness':
             return int(almanac_obj.moon.moon_fullness + 0.5)
         elif attr in ('moon_phase','moon_index'):
-            djd1 = ephem.previous_new_moon(time_djd)
-            djd2 = ephem.next_new_moon(time_djd)
+            djd1, djd2 = ephemeris_cache.get_lunation(time_djd)
             position = (time_djd-djd1)/(djd2-djd1)
             moon_index = int((position * 8) + 0.5) & 7
             if attr=='moon_index': return moon_index
@@ -429,7 +493,7 @@ class WeeutilAlmanacType(AlmanacType):
     def get_almanac_data(self, almanac_obj, attr):
         if attr in ('sunrise','sunset'):
             (y, m, d) = time.localtime(almanac_obj.time_ts)[0:3]
-            (sunrise_utc_h, sunset_utc_h) = weeutil.Sun.sunRiseSet(y, m, d, almanac_obj.lon, almanac_obj.lat)
+            (sunrise_utc_h, sunset_utc_h) = _sun_rise_set(y, m, d, almanac_obj.lon, almanac_obj.lat)
             if attr=='sunrise':
                 sunrise_ts = weeutil.weeutil.utc_to_ts(y, m, d, sunrise_utc_h)
                 return weewx.units.ValueHelper(
@@ -454,6 +518,12 @@ class WeeutilAlmanacType(AlmanacType):
         raise weewx.UnknownType('$almanac.%s not known. Try using PyEphem or another almanac extension' % attr)
 
 
+@functools.lru_cache(maxsize=1024)
+def _sun_rise_set(y, m, d, lon, lat):
+    # Sunrise and sunset depend only on the day and location, so cache them
+    return weeutil.Sun.sunRiseSet(y, m, d, lon, lat)
+
+
 fn_map = {'rise': 'next_rising',
           'set': 'next_setting',
           'transit': 'next_transit'}
@@ -486,11 +556,9 @@ class AlmanacBinder:
     @property
     def visible(self):
         """Calculate how long the body has been visible today"""
-        ephem_body = _get_ephem_body(self.heavenly_body)
-        observer = _get_observer(self.almanac, self.sod_djd)
         try:
-            time_rising_djd = observer.next_rising(ephem_body, use_center=self.use_center)
-            time_setting_djd = observer.next_setting(ephem_body, use_center=self.use_center)
+            time_rising_djd = self._day_event('next_rising')
+            time_setting_djd = self._day_event('next_setting')
         except ephem.AlwaysUpError:
             visible = 86400
         except ephem.NeverUpError:
@@ -528,22 +596,12 @@ class AlmanacBinder:
         if attr.startswith('__') or attr in ['mro', 'im_func', 'func_code']:
             raise AttributeError(attr)
 
-        # Many of these functions have the unfortunate side effect of changing the state of the
-        # body being examined. So, create a temporary body and then throw it away
-        ephem_body = _get_ephem_body(self.heavenly_body)
-
         if attr in ['rise', 'set', 'transit']:
             # These verbs refer to the time the event occurs anytime in the day, which
-            # is not necessarily the *next* sunrise.
-            attr = fn_map[attr]
-            # These functions require the time at the start of day
-            observer = _get_observer(self.almanac, self.sod_djd)
-            # Call the function. Be prepared to catch an exception if the body is always up.
+            # is not necessarily the *next* sunrise. Be prepared to catch an exception if the
+            # body is always up.
             try:
-                if attr in ['next_rising', 'next_setting']:
-                    time_djd = getattr(observer, attr)(ephem_body, use_center=self.use_center)
-                else:
-                    time_djd = getattr(observer, attr)(ephem_body)
+                time_djd = self._day_event(fn_map[attr])
             except (ephem.AlwaysUpError, ephem.NeverUpError):
                 time_djd = None
             return weewx.units.ValueHelper(ValueTuple(time_djd, "dublin_jd", "group_time"),
@@ -551,7 +609,11 @@ class AlmanacBinder:
                                            formatter=self.almanac.formatter,
                                            converter=self.almanac.converter)
 
-        elif attr in {'next_rising', 'next_setting', 'next_transit', 'next_antitransit',
+        # Many of these functions have the unfortunate side effect of changing the state of the
+        # body being examined. So, create a temporary body and then throw it away
+        ephem_body = _get_ephem_body(self.heavenly_body)
+
+        if attr in {'next_rising', 'next_setting', 'next_transit', 'next_antitransit',
                       'previous_rising', 'previous_setting', 'previous_transit',
                       'previous_antitransit'}:
             # These functions require the time of the observation
@@ -611,6 +673,31 @@ class AlmanacBinder:
                 # if the attribute does not exist.
                 return getattr(ephem_body, attr)
 
+    def _day_event(self, fn_name):
+        """Return the time of the first event of the day, such as 'next_rising', in Dublin Julian
+        Days. Raises ephem.AlwaysUpError or ephem.NeverUpError if there is no such event."""
+        key = (self.heavenly_body, fn_name, bool(self.use_center), self.sod_djd,
+               self.almanac.lat, self.almanac.lon, self.almanac.altitude, self.almanac.horizon,
+               self.almanac.temperature, self.almanac.pressure)
+
+        def calc_fn():
+            ephem_body = _get_ephem_body(self.heavenly_body)
+            # These functions require the time at the start of day
+            observer = _get_observer(self.almanac, self.sod_djd)
+            try:
+                if fn_name in ['next_rising', 'next_setting']:
+                    return getattr(observer, fn_name)(ephem_body, use_center=self.use_center)
+                else:
+                    return getattr(observer, fn_name)(ephem_body)
+            except (ephem.AlwaysUpError, ephem.NeverUpError) as e:
+                # Cache the kind of exception, so it can be raised again
+                return type(e)
+
+        result = ephemeris_cache.get_event(key, calc_fn)
+        if isinstance(result, type):
+            raise result()
+        return result
+
 
 def _get_observer(almanac_obj, time_ts):
     # Build an ephem Observer object
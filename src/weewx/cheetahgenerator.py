@@ -58,9 +58,13 @@ Example:
 """
 
 import datetime
+import hashlib
+import importlib.util
 import json
 import logging
 import os.path
+import sys
+import threading
 import time
 import unicodedata
 
@@ -97,6 +101,97 @@ default_search_list = [
 ]
 
 
+# =============================================================================
+# TemplateCache
+# =============================================================================
+
+class TemplateCache:
+    """Cache of compiled Cheetah template classes.
+
+    Compiling a template is expensive, but the resulting class does not depend on the search
+    list, so it can be reused for every timespan, and for every report cycle. The classes are
+    kept in memory, keyed by the path of the template. An entry is good as long as the
+    modification time and size of the template file do not change.
+
+    Optionally, the Python code generated by Cheetah can also be saved in a directory, so it
+    survives a restart. The code is loaded through the regular Python import machinery, so its
+    byte code gets cached in the usual __pycache__ subdirectory.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.classes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_class(self, template, cache_dir=None):
+        """Get the compiled class for a template.
+
+        Args:
+            template (str): Path to the template file.
+            cache_dir (str|None): If given, a directory where the generated code is to be kept
+                between restarts.
+
+        Returns:
+            type: A subclass of Cheetah.Template.Template. Instantiate it with a search list,
+                then call its respond() method.
+        """
+        stat = os.stat(template)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entry = self.classes.get(template)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        if cache_dir:
+            template_class = self._load_class(template, signature, cache_dir)
+        else:
+            # Do not let Cheetah cache the class as well. It would never be released.
+            template_class = Cheetah.Template.Template.compile(file=template,
+                                                               cacheCompilationResults=False,
+                                                               useCache=False)
+        with self.lock:
+            self.classes[template] = (signature, template_class)
+        return template_class
+
+    @staticmethod
+    def _load_class(template, signature, cache_dir):
+        """Load the compiled class for a template from the cache directory, generating its
+        code first if necessary."""
+        key = "%s:%s:%s:%s" % (os.path.abspath(template), signature[0], signature[1],
+                               Cheetah.Version)
+        module_name = 'cheetah_%s' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+        module_path = os.path.join(cache_dir, module_name + '.py')
+
+        if not os.path.exists(module_path):
+            code = Cheetah.Template.Template.compile(file=template,
+                                                    returnAClass=False,
+                                                    moduleName=module_name,
+                                                    cacheCompilationResults=False,
+                                                    useCache=False)
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temporary file first, then move it into place, so a half-written file
+            # is never seen.
+            tmpname = module_path + '.tmp'
+            with open(tmpname, mode='wb') as fd:
+                fd.write(code)
+            os.replace(tmpname, module_path)
+            log.debug("Saved compiled template %s as %s", template, module_path)
+
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[module_name] = module
+        # Cheetah names the class after the module
+        return getattr(module, module_name)
+
+
+# The cache is shared by all generators, so it lives across report cycles.
+template_cache = TemplateCache()
+
+
 # =============================================================================
 # CheetahGenerator
 # =============================================================================
@@ -133,6 +228,7 @@ class CheetahGenerator(weewx.reportengine.ReportGenerator):
         weewx.reportengine.ReportGenerator.__init__(self, config_dict, skin_dict, *args, **kwargs)
 
         self.search_list_objs = []
+        self.template_cache_dir = None
         self.formatter = weewx.units.Formatter.fromSkinDict(skin_dict)
         self.converter = weewx.units.Converter.fromSkinDict(skin_dict)
 
@@ -162,11 +258,21 @@ class CheetahGenerator(weewx.reportengine.ReportGenerator):
         # configure the search list extensions
         self.init_extensions(gen_dict[section_name])
 
+        # Optionally, keep the compiled templates on disk
+        cache_dir = search_up(gen_dict[section_name], 'template_cache_dir', None)
+        if cache_dir:
+            self.template_cache_dir = os.path.join(self.config_dict['WEEWX_ROOT'], cache_dir)
+
+        hits, misses = template_cache.hits, template_cache.misses
+
         # Generate any templates in the given dictionary:
         ngen = self.generate(gen_dict[section_name], section_name, self.gen_ts)
 
         self.teardown()
 
+        log.debug("Compiled template cache: %d hits, %d misses",
+                  template_cache.hits - hits, template_cache.misses - misses)
+
         elapsed_time = time.time() - t1
         if log_success:
             log.info("Generated %d files for report %s in %.2f seconds",
@@ -312,14 +418,12 @@ class CheetahGenerator(weewx.reportengine.ReportGenerator):
                                                os.path.dirname(report_dict['template']),
                                                _filename))
 
-            # First, compile the template
+            # First, compile the template. The compiled class comes from the cache if possible.
             try:
-                # TODO: Look into caching the compiled template.
-                compiled_template = Cheetah.Template.Template(
-                    file=template,
-                    searchList=searchList,
-                    filter='AssureUnicode',
-                    filtersLib=weewx.cheetahgenerator)
+                template_class = template_cache.get_class(template, self.template_cache_dir)
+                compiled_template = template_class(searchList=searchList,
+                                                   filter='AssureUnicode',
+                                                   filtersLib=weewx.cheetahgenerator)
             except Exception as e:
                 log.error("Compilation of template %s failed with exception '%s'", template, type(e))
                 log.error("**** Ignoring template %s", template)
@@ -597,7 +701,8 @@ class Stats(SearchList):
             week_start=self.generator.stn_info.week_start,
             rain_year_start=self.generator.stn_info.rain_year_start,
             trend=trend_dict,
-            skin_dict=self.generator.skin_dict)
+            skin_dict=self.generator.skin_dict,
+            aggregate_cache=self.generator.aggregate_cache)
 
         return [stats]
 
@@ -7,9 +7,13 @@
 """Main engine for the weewx weather system."""
 
 # Python imports
+import collections
+import contextlib
 import gc
+import json
 import logging
 import math
+import os.path
 import socket
 import sys
 import threading
@@ -70,9 +74,24 @@ class StdEngine:
         # The callback dictionary:
         self.callbacks = dict()
 
+        # If requested, keep track of how long each callback takes.
+        profiler_dict = config_dict.get('Engine', {}).get('Profiler', {})
+        if to_bool(profiler_dict.get('enable', False)):
+            stats_file = profiler_dict.get('stats_file')
+            if stats_file:
+                stats_file = os.path.join(config_dict.get('WEEWX_ROOT', ''), stats_file)
+            self.profiler = EventProfiler(to_int(profiler_dict.get('log_interval', 3600)),
+                                          stats_file)
+            log.info("Profiling of event callbacks enabled")
+        else:
+            self.profiler = None
+
         # This will hold an instance of the device driver
         self.console = None
 
+        # This will hold the thread reading LOOP packets, if requested
+        self.loop_thread = None
+
         # Set up the database binder
         self.db_binder = weewx.manager.DBBinder(config_dict)
 
@@ -82,6 +101,14 @@ class StdEngine:
         # Set up information about the station
         self.stn_info = weewx.station.StationInfo(self.console, **config_dict['Station'])
 
+        # If requested, read LOOP packets from the console on a thread of their own.
+        loop_thread_dict = config_dict.get('Engine', {}).get('LoopThread', {})
+        if to_bool(loop_thread_dict.get('enable', False)):
+            buffer_size = to_int(loop_thread_dict.get('buffer_size', 100))
+            self.loop_thread = LoopThread(self.console, buffer_size)
+            log.info("LOOP packets will be read on their own thread, buffering up to %d packets",
+                     buffer_size)
+
         # The list of instantiated services
         self.service_obj = []
 
@@ -197,11 +224,20 @@ class StdEngine:
                 # loop and interact with the console.
                 try:
 
+                    # If requested, the packets are read from the console on
+                    # their own thread, which keeps reading while the events
+                    # are dispatched, and after the loop has been broken.
+                    if self.loop_thread:
+                        self.loop_thread.start()
+                        packets = self.loop_thread.get_packets()
+                    else:
+                        packets = self.console.genLoopPackets()
+
                     # And this is the main packet LOOP. It will continuously
                     # generate LOOP packets until some service breaks it by
                     # throwing an exception (usually when an archive period
                     # has passed).
-                    for packet in self.console.genLoopPackets():
+                    for packet in packets:
                         # Package the packet as an event, then dispatch it.
                         self.dispatchEvent(weewx.Event(weewx.NEW_LOOP_PACKET, packet=packet))
 
@@ -213,6 +249,9 @@ class StdEngine:
 
                 except BreakLoop:
 
+                    if self.loop_thread:
+                        self.loop_thread.check_overflows()
+
                     # Send out an event saying the packet LOOP is done:
                     self.dispatchEvent(weewx.Event(weewx.POST_LOOP))
 
@@ -229,6 +268,23 @@ class StdEngine:
         # otherwise append to the existing list:
         self.callbacks.setdefault(event_type, []).append(callback)
 
+    @contextlib.contextmanager
+    def console_access(self):
+        """Context manager to be used by services that talk to the console outside the packet
+        loop, such as to retrieve archive records or set its clock.
+
+        If LOOP packets are being read on a thread of their own, reading is stopped first, so
+        only one thread talks to the console. It is started again when the main loop next
+        needs packets. Packets already read are kept.
+
+        Example:
+            with self.engine.console_access():
+                console_time = self.engine.console.getTime()
+        """
+        if self.loop_thread:
+            self.loop_thread.stop()
+        yield self.console
+
     def dispatchEvent(self, event):
         """Call all registered callbacks for an event."""
         # See if any callbacks have been registered for this event type:
@@ -236,13 +292,26 @@ class StdEngine:
             if self.log_events:
                 log.debug(event)
             # Yes, at least one has been registered. Call them in order:
-            for callback in self.callbacks[event.event_type]:
-                # Call the function with the event as an argument:
-                callback(event)
+            if self.profiler:
+                for callback in self.callbacks[event.event_type]:
+                    self.profiler.call(callback, event)
+                self.profiler.check_report()
+            else:
+                for callback in self.callbacks[event.event_type]:
+                    # Call the function with the event as an argument:
+                    callback(event)
 
     def shutDown(self):
         """Run when an engine shutdown is requested."""
 
+        if self.profiler:
+            self.profiler.report()
+
+        if self.loop_thread:
+            # Do not wait long for the driver. Closing the port should stop it.
+            self.loop_thread.stop(timeout=10)
+            self.loop_thread.check_overflows()
+
         # Shut down all the services
         while self.service_obj:
             # Wrap each individual service shutdown, in case of a problem.
@@ -267,11 +336,244 @@ class StdEngine:
 
     def _get_console_time(self):
         try:
-            return self.console.getTime()
+            with self.console_access():
+                return self.console.getTime()
         except NotImplementedError:
             return int(time.time() + 0.5)
 
 
+# ==============================================================================
+#                    Class LoopThread
+# ==============================================================================
+
+class LoopThread:
+    """Reads LOOP packets from the console on a thread of its own, into a bounded buffer.
+
+    The console keeps being read while the main loop dispatches events for earlier packets,
+    and while archive records are saved, so a console with a small buffer of its own does not
+    overflow. If the main loop falls so far behind that the buffer is full, the oldest packet
+    is discarded, and counted.
+    """
+
+    def __init__(self, console, buffer_size=100):
+        """Initialize an instance of LoopThread.
+
+        Args:
+            console (weewx.drivers.AbstractDevice): The console to read from.
+            buffer_size (int): The most packets to hold. Default is 100.
+        """
+        self.console = console
+        self.buffer_size = max(buffer_size, 1)
+        self.packets = collections.deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        # True when the thread has been asked to stop
+        self.stopping = False
+        # An exception raised by the driver, to be raised again in the main loop
+        self.error = None
+        # True if the driver ran out of packets
+        self.exhausted = False
+        # Counts of packets read, and discarded because the buffer was full
+        self.total = 0
+        self.overflows = 0
+        self.reported_overflows = 0
+        # The most packets there have been in the buffer
+        self.max_depth = 0
+
+    def start(self):
+        """Start reading packets, unless already doing so, or the driver has failed.
+
+        Raises:
+            weewx.WeeWxIOError: If the thread has been asked to stop, but the driver has yet to
+                return. Another thread would read from the console at the same time.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            if self.stopping:
+                raise weewx.WeeWxIOError("Driver is still reading LOOP packets after being "
+                                         "asked to stop")
+            return
+        if self.error is None:
+            self.stopping = False
+            self.exhausted = False
+            self.thread = threading.Thread(target=self._read_packets, name='LoopThread')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self, timeout=None):
+        """Stop reading packets. The thread stops once the driver returns its next packet. Wait
+        for it, at most timeout seconds, if given."""
+        if self.thread is not None:
+            with self.condition:
+                self.stopping = True
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                # Keep the thread, so start() knows it is still reading from the console
+                log.error("Driver did not stop reading LOOP packets within %s seconds", timeout)
+            else:
+                self.thread = None
+
+    def get_packets(self):
+        """Generator function that yields the packets in the buffer, oldest first, waiting for
+        more as needed. If the driver raised an exception, it is raised here."""
+        while True:
+            with self.condition:
+                while not self.packets and self.error is None and not self.exhausted:
+                    self.condition.wait()
+                if self.packets:
+                    packet = self.packets.popleft()
+                elif self.error is not None:
+                    error, self.error = self.error, None
+                    raise error
+                else:
+                    return
+            yield packet
+
+    def check_overflows(self):
+        """Log a warning if any packets have been discarded since the last check."""
+        if self.overflows > self.reported_overflows:
+            log.warning("LOOP buffer full. %d of %d packets discarded so far. "
+                        "Most packets held: %d",
+                        self.overflows, self.total, self.max_depth)
+            self.reported_overflows = self.overflows
+
+    def _read_packets(self):
+        """Read packets from the console, until asked to stop. Runs in its own thread."""
+        generator = self.console.genLoopPackets()
+        try:
+            for packet in generator:
+                with self.condition:
+                    if len(self.packets) >= self.buffer_size:
+                        self.packets.popleft()
+                        self.overflows += 1
+                    self.packets.append(packet)
+                    self.total += 1
+                    self.max_depth = max(self.max_depth, len(self.packets))
+                    self.condition.notify()
+                    if self.stopping:
+                        break
+        except Exception as e:
+            with self.condition:
+                self.error = e
+                self.condition.notify()
+        else:
+            if not self.stopping:
+                with self.condition:
+                    self.exhausted = True
+                    self.condition.notify()
+        finally:
+            generator.close()
+
+
+# ==============================================================================
+#                    Class EventProfiler
+# ==============================================================================
+
+class EventProfiler:
+    """Keeps track of how long each callback takes to handle each type of event.
+
+    For each event type and callback, it keeps the number of calls, the total and maximum time,
+    and the most recent times, from which percentiles are calculated. A summary is logged every
+    log_interval seconds and, optionally, written to a JSON file.
+    """
+
+    # How many of the most recent times to keep, for calculating percentiles
+    max_samples = 1000
+
+    def __init__(self, log_interval=3600, stats_file=None):
+        """Initialize an instance of EventProfiler.
+
+        Args:
+            log_interval (int): How often to log a summary, in seconds.
+            stats_file (str|None): If given, the path of a file where the statistics are
+                written as JSON, every time a summary is logged.
+        """
+        self.log_interval = log_interval
+        self.stats_file = stats_file
+        self.start_time = self.last_report = time.time()
+        # Key is a tuple (event type, callback). Value is a list [count, total, max, samples]
+        self.timings = {}
+
+    def call(self, callback, event):
+        """Call a callback with an event, and record how long it took."""
+        t0 = time.perf_counter()
+        try:
+            callback(event)
+        finally:
+            elapsed = time.perf_counter() - t0
+            key = (event.event_type, callback)
+            timing = self.timings.get(key)
+            if timing is None:
+                timing = [0, 0.0, 0.0, collections.deque(maxlen=self.max_samples)]
+                self.timings[key] = timing
+            timing[0] += 1
+            timing[1] += elapsed
+            if elapsed > timing[2]:
+                timing[2] = elapsed
+            timing[3].append(elapsed)
+
+    def check_report(self):
+        """Log a summary, if it is time to do so."""
+        if time.time() - self.last_report >= self.log_interval:
+            self.report()
+
+    def get_stats(self):
+        """Return the statistics, as a list of dictionaries, with times in seconds. The list is
+        sorted by total time, largest first."""
+        stats = []
+        for (event_type, callback), (count, total, maximum, samples) in self.timings.items():
+            service = getattr(callback, '__self__', None)
+            if service is not None:
+                service_name = "%s.%s" % (type(service).__module__, type(service).__name__)
+            else:
+                service_name = getattr(callback, '__module__', None)
+            sorted_samples = sorted(samples)
+            stats.append({
+                'event': event_type.__name__,
+                'service': service_name,
+                'callback': getattr(callback, '__name__', repr(callback)),
+                'count': count,
+                'total': total,
+                'p50': EventProfiler.percentile(sorted_samples, 50),
+                'p95': EventProfiler.percentile(sorted_samples, 95),
+                'max': maximum,
+            })
+        stats.sort(key=lambda x: x['total'], reverse=True)
+        return stats
+
+    @staticmethod
+    def percentile(sorted_samples, p):
+        """Return the p'th percentile of a sorted list, using the nearest rank method."""
+        if not sorted_samples:
+            return None
+        rank = max(math.ceil(p / 100.0 * len(sorted_samples)), 1)
+        return sorted_samples[rank - 1]
+
+    def report(self):
+        """Log a summary of the statistics and, if requested, write them to the stats file."""
+        now = time.time()
+        self.last_report = now
+        stats = self.get_stats()
+        log.info("Event callback times since %s (milliseconds):",
+                 weeutil.weeutil.timestamp_to_string(self.start_time))
+        for entry in stats:
+            log.info("  %-18s %s.%s: count=%d total=%.0f p50=%.1f p95=%.1f max=%.1f",
+                     entry['event'], entry['service'], entry['callback'], entry['count'],
+                     entry['total'] * 1000.0, entry['p50'] * 1000.0, entry['p95'] * 1000.0,
+                     entry['max'] * 1000.0)
+
+        if self.stats_file:
+            try:
+                # Write to a temporary file first, then move it into place, so a reader never
+                # sees a half-written file.
+                tmpname = self.stats_file + '.tmp'
+                with open(tmpname, 'w') as fd:
+                    json.dump({'start_time': self.start_time, 'time': now, 'stats': stats}, fd,
+                              indent=2)
+                os.replace(tmpname, self.stats_file)
+            except OSError as e:
+                log.error("Unable to write profiler statistics to %s: %s", self.stats_file, e)
+
+
 # ==============================================================================
 #                    Class DummyEngine
 # ==============================================================================
@@ -609,7 +911,8 @@ class StdArchive(StdService):
         else:
             # Not all consoles can do a hardware catchup, so be prepared to catch the exception:
             try:
-                self._catchup(self.engine.console.genStartupRecords)
+                with self.engine.console_access():
+                    self._catchup(self.engine.console.genStartupRecords)
             except NotImplementedError:
                 pass
 
@@ -675,7 +978,8 @@ class StdArchive(StdService):
                 # will be raised if the console does not support it. In that
                 # case, fall back to software generation.
                 try:
-                    self._catchup(self.engine.console.genArchiveRecords)
+                    with self.engine.console_access():
+                        self._catchup(self.engine.console.genArchiveRecords)
                 except NotImplementedError:
                     self._software_catchup()
             else:
@@ -790,18 +1094,19 @@ class StdTimeSynch(StdService):
         if now_ts - self.last_synch_ts >= self.clock_check:
             self.last_synch_ts = now_ts
             try:
-                console_time = self.engine.console.getTime()
-                if console_time is None:
-                    return
-                # getTime can take a long time to run, so we use the current
-                # system time
-                diff = console_time - time.time()
-                log.info("Clock error is %.2f seconds (positive is fast)", diff)
-                if abs(diff) > self.max_drift:
-                    try:
-                        self.engine.console.setTime()
-                    except NotImplementedError:
-                        log.debug("Station does not support setting the time")
+                with self.engine.console_access():
+                    console_time = self.engine.console.getTime()
+                    if console_time is None:
+                        return
+                    # getTime can take a long time to run, so we use the current
+                    # system time
+                    diff = console_time - time.time()
+                    log.info("Clock error is %.2f seconds (positive is fast)", diff)
+                    if abs(diff) > self.max_drift:
+                        try:
+                            self.engine.console.setTime()
+                        except NotImplementedError:
+                            log.debug("Station does not support setting the time")
             except NotImplementedError:
                 log.debug("Station does not support reading the time")
             except weewx.WeeWxIOError as e:
@@ -6,15 +6,21 @@
 """Generate images for up to an effective date.
 Should probably be refactored into smaller functions."""
 
+import concurrent.futures
 import datetime
+import hashlib
+import locale
 import logging
 import os.path
 import time
 
+from PIL import Image, PngImagePlugin
+
 import weeplot.genplot
 import weeplot.utilities
 import weeutil.logger
 import weeutil.weeutil
+import weewx.manager
 import weewx.reportengine
 import weewx.units
 import weewx.xtypes
@@ -70,6 +76,10 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
         # determine how much logging is desired
         log_success = to_bool(search_up(self.image_dict, 'log_success', True))
 
+        # The plots that have to be generated. Each is a tuple (timespan, plotname, plotgen_ts,
+        # img_file)
+        jobs = []
+
         # Loop over each time span class (day, week, month, etc.):
         for timespan in self.image_dict.sections:
 
@@ -96,29 +106,13 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
                 if _skip_this_plot(plotgen_ts, plot_options, img_file):
                     continue
 
-                # Generate the plot.
-                plot = self.gen_plot(plotgen_ts,
-                                     plot_options,
-                                     self.image_dict[timespan][plotname])
-
-                # 'plot' will be None if skip_if_empty was truthy, and the plot contains no data
-                if plot:
-                    # We have a valid plot. Render it onto an image
-                    image = plot.render()
-
-                    # Create the subdirectory that the image is to be put in. Wrap in a try block
-                    # in case it already exists.
-                    try:
-                        os.makedirs(os.path.dirname(img_file))
-                    except OSError:
-                        pass
-
-                    try:
-                        # Now save the image
-                        image.save(img_file)
-                        ngen += 1
-                    except IOError as e:
-                        log.error("Unable to save to file '%s' %s:", img_file, e)
+                jobs.append((timespan, plotname, plotgen_ts, img_file))
+
+        plot_workers = to_int(self.image_dict.get('plot_workers', 1))
+        if plot_workers > 1 and len(jobs) > 1:
+            ngen = self.gen_images_parallel(jobs, plot_workers)
+        else:
+            ngen = sum(self.gen_image(*job) for job in jobs)
 
         t2 = time.time()
 
@@ -127,6 +121,98 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
                      ngen,
                      self.skin_dict['REPORT_NAME'], t2 - t1)
 
+    def gen_images_parallel(self, jobs, plot_workers):
+        """Generate images using a pool of processes.
+
+        Args:
+            jobs (list[tuple]): The arguments to gen_image() for each image.
+            plot_workers (int): How many processes to use.
+
+        Returns:
+            int: The number of images generated.
+        """
+        ngen = 0
+        t_workers = 0.0
+        # The workers do not share the memory of this process, so each one builds a generator of
+        # its own, which works in the same directory and with the same locale as this one.
+        generator_args = (self.config_dict, self.skin_dict, self.gen_ts, self.first_run,
+                          self.stn_info, self.record)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=plot_workers,
+                mp_context=weeutil.weeutil.get_worker_context(),
+                initializer=_init_worker,
+                initargs=(type(self), generator_args, os.getcwd(),
+                          locale.setlocale(locale.LC_ALL),
+                          weeutil.logger.log_process_name)) as executor:
+            for saved, elapsed in executor.map(_gen_image_in_worker, jobs):
+                ngen += saved
+                t_workers += elapsed
+        log.debug("%d plot workers spent %.2f seconds generating %d images",
+                  plot_workers, t_workers, ngen)
+        return ngen
+
+    def gen_image(self, timespan, plotname, plotgen_ts, img_file):
+        """Generate a single image and save it.
+
+        Args:
+            timespan (str): The time span class of the plot (e.g., 'day_images').
+            plotname (str): The name of the plot.
+            plotgen_ts (float): The time for which the plot is valid.
+            img_file (str): The path of the image file.
+
+        Returns:
+            bool: True if the image was saved. False otherwise.
+        """
+        # Accumulate all options from parent nodes:
+        plot_options = accumulateLeaves(self.image_dict[timespan][plotname])
+
+        # Generate the plot.
+        plot = self.gen_plot(plotgen_ts,
+                             plot_options,
+                             self.image_dict[timespan][plotname])
+
+        # 'plot' will be None if skip_if_empty was truthy, and the plot contains no data
+        if not plot:
+            return False
+
+        # If the image would be the same as the existing one, skip it.
+        skip_if_unchanged = to_bool(plot_options.get('skip_if_unchanged', False))
+        if skip_if_unchanged and not img_file.lower().endswith('.png'):
+            # The fingerprint can only be saved in a PNG file
+            log.warning("Option skip_if_unchanged ignored for '%s': not a PNG file", img_file)
+            skip_if_unchanged = False
+        if skip_if_unchanged and plot.fingerprint == _get_fingerprint(img_file):
+            log.debug("Skip '%s': data unchanged", img_file)
+            # Touch the image, so that _skip_this_plot() sees that it is up to date.
+            try:
+                os.utime(img_file)
+            except OSError as e:
+                log.error("Unable to touch file '%s': %s", img_file, e)
+            return False
+
+        # We have a valid plot. Render it onto an image
+        image = plot.render()
+
+        # Create the subdirectory that the image is to be put in. Wrap in a try block
+        # in case it already exists.
+        try:
+            os.makedirs(os.path.dirname(img_file))
+        except OSError:
+            pass
+
+        try:
+            # Now save the image, along with its fingerprint if it will be needed.
+            if skip_if_unchanged:
+                png_info = PngImagePlugin.PngInfo()
+                png_info.add_text(FINGERPRINT_KEY, plot.fingerprint)
+                image.save(img_file, pnginfo=png_info)
+            else:
+                image.save(img_file)
+        except IOError as e:
+            log.error("Unable to save to file '%s' %s:", img_file, e)
+            return False
+        return True
+
     def gen_plot(self, plotgen_ts, plot_options, plot_dict):
         """Generate a single plot image.
 
@@ -142,6 +228,8 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
         Returns:
             An instance of weeplot.genplot.TimePlot or None. If the former, it will be ready
             to render. If None, then skip_if_empty was truthy and no valid data were found.
+            Its attribute 'fingerprint' is a hash of everything that goes into the image,
+            except the bottom label.
         """
 
         # Create a new instance of a time plot and start adding to it
@@ -159,6 +247,9 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
             timeinc = timeinc_user
         plot.setXScaling((x_domain.start, x_domain.stop, timeinc))
 
+        fingerprint = hashlib.sha1(repr((sorted(plot_options.items()),
+                                         tuple(x_domain), timeinc)).encode('utf-8'))
+
         # Set the y-scaling, using any user-supplied hints:
         yscale = plot_options.get('yscale', ['None', 'None', 'None'])
         plot.setYScaling(weeutil.weeutil.convertToFloat(yscale))
@@ -320,6 +411,11 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
             marker_type = line_options.get('marker_type')
             marker_size = to_int(line_options.get('marker_size', 8))
 
+            fingerprint.update(repr((unit_label, label, color, fill_color, width, plot_type,
+                                     line_type, marker_type, marker_size, interval_vec,
+                                     vector_rotate, line_gap_fraction, stop_vec_t[0],
+                                     new_data_vec_t[0])).encode('utf-8'))
+
             # Add the line to the emerging plot:
             plot.addLine(weeplot.genplot.PlotLine(
                 stop_vec_t[0], new_data_vec_t[0],
@@ -335,10 +431,50 @@ class ImageGenerator(weewx.reportengine.ReportGenerator):
                 vector_rotate=vector_rotate,
                 line_gap_fraction=line_gap_fraction))
 
+        plot.fingerprint = fingerprint.hexdigest()
+
         # Return the constructed plot if it has any non-null data, otherwise return None
         return plot if have_data else None
 
 
+# The key of the PNG text chunk holding the fingerprint of the plot
+FINGERPRINT_KEY = 'weewx-fingerprint'
+
+
+def _get_fingerprint(img_file):
+    """Return the fingerprint saved in an image, or None if there is none."""
+    try:
+        with Image.open(img_file) as image:
+            return image.text.get(FINGERPRINT_KEY)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# The generator used by the worker processes of ImageGenerator.gen_images_parallel()
+_worker_generator = None
+
+
+def _init_worker(generator_class, generator_args, cwd, locale_name, log_process_name):
+    """Set up a worker process, then give it a generator of its own."""
+    global _worker_generator
+    weewx.reportengine.init_worker(generator_args[0], log_process_name)
+    os.chdir(cwd)
+    try:
+        locale.setlocale(locale.LC_ALL, locale_name)
+    except locale.Error as e:
+        log.debug("Unable to set locale '%s': %s. Using default.", locale_name, e)
+    _worker_generator = generator_class(*generator_args)
+    _worker_generator.setup()
+
+
+def _gen_image_in_worker(job):
+    """Generate an image in a worker process. Returns whether the image was saved, and how long
+    it took."""
+    t1 = time.time()
+    saved = _worker_generator.gen_image(*job)
+    return saved, time.time() - t1
+
+
 def _skip_this_plot(time_ts, plot_options, img_file):
     """A plot can be skipped if it was generated recently and has not changed. This happens if the
     time since the plot was generated is less than the aggregation interval.
@@ -55,6 +55,8 @@ Example:
         print(row)
 
 """
+import collections
+import concurrent.futures
 import datetime
 import logging
 import os.path
@@ -63,10 +65,11 @@ import time
 
 import weedb
 import weeutil.config
+import weeutil.sketch
 import weeutil.weeutil
 import weewx.accum
 import weewx.xtypes
-from weeutil.weeutil import timestamp_to_string, to_int, TimeSpan
+from weeutil.weeutil import timestamp_to_string, to_float, to_int, TimeSpan
 from weewx.units import GenWithConvert
 
 log = logging.getLogger(__name__)
@@ -99,6 +102,9 @@ class Manager:
         sqlkeys (list[str]): A list of the SQL keys that the database table supports.
     """
 
+    # How many records addRecord() adds at a time, when given a collection of records.
+    batch_size = 1000
+
     def __init__(self, connection, table_name='archive', schema=None):
         """Initialize an object of type Manager.
 
@@ -117,6 +123,8 @@ class Manager:
 
         self.connection = connection
         self.table_name = table_name
+        # The database dictionary used to open the connection, if known
+        self.database_dict = None
         self.first_timestamp = None
         self.last_timestamp = None
         self.std_unit_system = None
@@ -185,6 +193,7 @@ class Manager:
 
         # Create an instance of the right class and return it:
         dbmanager = cls(connection, table_name)
+        dbmanager.database_dict = database_dict
         return dbmanager
 
     @classmethod
@@ -242,6 +251,7 @@ class Manager:
 
         # Create an instance of the right class and return it:
         dbmanager = cls(connection, table_name=table_name, schema=schema)
+        dbmanager.database_dict = database_dict
         return dbmanager
 
     @property
@@ -386,34 +396,65 @@ class Manager:
 
         # Determine if record_obj is just a single dictionary instance (in which case it will have
         # method 'keys'). If so, wrap it in something iterable (a list):
-        record_list = [record_obj] if hasattr(record_obj, 'keys') else record_obj
+        if hasattr(record_obj, 'keys'):
+            record_list = [record_obj]
+            batch_size = 1
+        else:
+            record_list = record_obj
+            # Add a collection of records in batches, unless there is an accumulator.
+            batch_size = 1 if accumulator else Manager.batch_size
 
         min_ts = float('inf')  # A "big number"
         max_ts = 0
         N = 0
         with weedb.Transaction(self.connection) as cursor:
 
-            for record in record_list:
-                try:
-                    # If the accumulator time matches the record we are working with,
-                    # use it to update the highs and lows.
-                    if accumulator and record_obj['dateTime'] == accumulator.timespan.stop:
-                        self._updateHiLo(accumulator, cursor)
-
-                    # Then add the record to the archives:
-                    self._addSingleRecord(record, cursor, log_success, log_failure, update)
-
+            for batch in _gen_batches(record_list, batch_size):
+                if len(batch) > 1:
+                    # Try adding the whole batch at once, but be prepared to undo it, and add the
+                    # records one at a time, if any of them fails.
+                    try:
+                        cursor.execute("SAVEPOINT weewx_batch")
+                        self._addRecordBatch(batch, cursor, log_failure)
+                        cursor.execute("RELEASE SAVEPOINT weewx_batch")
+                    except (weedb.IntegrityError, weedb.OperationalError):
+                        cursor.execute("ROLLBACK TO SAVEPOINT weewx_batch")
+                        cursor.execute("RELEASE SAVEPOINT weewx_batch")
+                        added = None
+                    else:
+                        added = batch
+                        # Only log the batch now that it is certain it will not be added again,
+                        # one record at a time.
+                        if log_success:
+                            self._logRecordBatch(batch)
+                else:
+                    added = None
+
+                if added is None:
+                    added = []
+                    for record in batch:
+                        try:
+                            # If the accumulator time matches the record we are working with,
+                            # use it to update the highs and lows.
+                            if accumulator and record_obj['dateTime'] == accumulator.timespan.stop:
+                                self._updateHiLo(accumulator, cursor)
+
+                            # Then add the record to the archives:
+                            self._addSingleRecord(record, cursor, log_success, log_failure, update)
+                            added.append(record)
+                        except (weedb.IntegrityError, weedb.OperationalError) as e:
+                            if log_failure:
+                                log.error("Unable to add record %s to database '%s': %s",
+                                          timestamp_to_string(record['dateTime']),
+                                          self.database_name, e)
+
+                for record in added:
                     N += 1
                     if progress_fn and N % 1000 == 0:
                         progress_fn(record['dateTime'], N)
 
                     min_ts = min(min_ts, record['dateTime'])
                     max_ts = max(max_ts, record['dateTime'])
-                except (weedb.IntegrityError, weedb.OperationalError) as e:
-                    if log_failure:
-                        log.error("Unable to add record %s to database '%s': %s",
-                                  timestamp_to_string(record['dateTime']),
-                                  self.database_name, e)
 
         # Update the cached timestamps. This has to sit outside the transaction context,
         # in case an exception occurs.
@@ -475,10 +516,40 @@ class Manager:
                              timestamp_to_string(record['dateTime']),
                              self.database_name)
 
+    def _addRecordBatch(self, records, cursor, log_failure=True):
+        """Internal function for adding a batch of records to the main archive table, using one
+        statement for each set of keys. Success is logged by _logRecordBatch()."""
+
+        # Group the records by the keys that can be inserted
+        sqlkey_set = set(self.sqlkeys)
+        groups = {}
+        for record in records:
+            if record['dateTime'] is None:
+                if log_failure:
+                    log.error("Archive record with null time encountered")
+                raise weewx.ViolatedPrecondition("Manager record with null time encountered.")
+            self._check_unit_system(record['usUnits'])
+            key_list = tuple(sorted(sqlkey_set.intersection(record.keys())))
+            groups.setdefault(key_list, []).append(record)
+
+        for key_list, group in groups.items():
+            k_str = ','.join(["`%s`" % k for k in key_list])
+            q_str = ','.join('?' * len(key_list))
+            sql_insert_stmt = "INSERT INTO %s (%s) VALUES (%s)" % (self.table_name, k_str, q_str)
+            cursor.executemany(sql_insert_stmt, [[record[k] for k in key_list]
+                                                 for record in group])
+
+    def _logRecordBatch(self, records):
+        """Internal function for logging a batch of records that has been added."""
+        for record in records:
+            log.info("Added record %s to database '%s'",
+                     timestamp_to_string(record['dateTime']),
+                     self.database_name)
+
     def _updateHiLo(self, accumulator, cursor):
         pass
 
-    def genBatchRows(self, startstamp=None, stopstamp=None):
+    def genBatchRows(self, startstamp=None, stopstamp=None, columns=None, fetch_size=None):
         """Generator function that yields raw rows from the archive database with timestamps within
         an interval.
 
@@ -487,38 +558,56 @@ class Manager:
                 then start at earliest archive record.
             stopstamp (int|None): Inclusive end of the interval in epoch time. If 'None',
                 then end at last archive record.
+            columns (list[str]|None): The columns to be returned, in order. If 'None', then
+                all columns are returned, in the order of self.sqlkeys.
+            fetch_size (int|None): If given, rows are fetched from the database this many at a
+                time, using a server-side cursor if the database supports it. Until the
+                generator has finished, the connection cannot be used for anything else.
 
         Yields:
             list: Each iteration yields a single data row as a list.
         """
 
-        with self.connection.cursor() as cursor:
+        if columns is None:
+            select = '*'
+        else:
+            select = ', '.join('`%s`' % column for column in columns)
+
+        with self.connection.cursor(server_side=bool(fetch_size)) as cursor:
 
             if startstamp is None:
                 if stopstamp is None:
-                    gen = cursor.execute("SELECT * FROM %s "
-                                         "ORDER BY dateTime ASC" % self.table_name)
+                    gen = cursor.execute("SELECT %s FROM %s "
+                                         "ORDER BY dateTime ASC" % (select, self.table_name))
                 else:
-                    gen = cursor.execute("SELECT * FROM %s "
+                    gen = cursor.execute("SELECT %s FROM %s "
                                          "WHERE dateTime <= ? "
-                                         "ORDER BY dateTime ASC" % self.table_name,
+                                         "ORDER BY dateTime ASC" % (select, self.table_name),
                                          (stopstamp,))
             else:
                 if stopstamp is None:
-                    gen = cursor.execute("SELECT * FROM %s "
+                    gen = cursor.execute("SELECT %s FROM %s "
                                          "WHERE dateTime > ? "
-                                         "ORDER BY dateTime ASC" % self.table_name,
+                                         "ORDER BY dateTime ASC" % (select, self.table_name),
                                          (startstamp,))
                 else:
-                    gen = cursor.execute("SELECT * FROM %s "
+                    gen = cursor.execute("SELECT %s FROM %s "
                                          "WHERE dateTime > ? AND dateTime <= ? "
-                                         "ORDER BY dateTime ASC" % self.table_name,
+                                         "ORDER BY dateTime ASC" % (select, self.table_name),
                                          (startstamp, stopstamp))
 
-            for row in gen:
-                yield row
+            if fetch_size:
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+            else:
+                for row in gen:
+                    yield row
 
-    def genBatchRecords(self, startstamp=None, stopstamp=None):
+    def genBatchRecords(self, startstamp=None, stopstamp=None, columns=None, fetch_size=None):
         """Generator function that yields records with timestamps within an interval.
 
         Args:
@@ -526,15 +615,20 @@ class Manager:
                 then start at earliest archive record.
             stopstamp (int|float|None): Inclusive end of the interval in epoch time. If 'None',
                 then end at last archive record.
+            columns (list[str]|None): The observation types to be included in each record. It
+                must include 'dateTime'. If 'None', then all types are included.
+            fetch_size (int|None): If given, rows are fetched from the database this many at a
+                time. See genBatchRows().
 
         Yields:
              dict: A dictionary where key is the observation type (eg, 'outTemp') and the
                 value is the observation value.
         """
 
+        keys = self.sqlkeys if columns is None else columns
         last_time = 0
-        for row in self.genBatchRows(startstamp, stopstamp):
-            record = dict(zip(self.sqlkeys, row))
+        for row in self.genBatchRows(startstamp, stopstamp, columns, fetch_size):
+            record = dict(zip(keys, row))
             # The following is to get around a bug in sqlite when all the
             # tables are in one file:
             if record['dateTime'] <= last_time:
@@ -689,6 +783,18 @@ class Manager:
             self.std_unit_system = unit_system
 
 
+def _gen_batches(records, batch_size):
+    """Generate lists of up to batch_size records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def reconfig(old_db_dict, new_db_dict, new_unit_system=None, new_schema=None, dry_run=False):
     """Copy over an old archive to a new one, using an optionally new unit system and schema.
 
@@ -723,14 +829,17 @@ class DBBinder:
     results.
     """
 
-    def __init__(self, config_dict):
+    def __init__(self, config_dict, reader=False):
         """ Initialize a DBBinder object.
 
         Args:
             config_dict (dict): The configuration dictionary.
+            reader (bool): True if the managers will only be used for reading, such as by the
+                reports. See open_manager(). Default is False.
         """
 
         self.config_dict = config_dict
+        self.reader = reader
         self.default_binding_dict = {}
         self.manager_cache = {}
 
@@ -769,7 +878,8 @@ class DBBinder:
             manager_dict = get_manager_dict_from_config(self.config_dict,
                                                         data_binding,
                                                         default_binding_dict=defaults)
-            self.manager_cache[data_binding] = open_manager(manager_dict, initialize)
+            self.manager_cache[data_binding] = open_manager(manager_dict, initialize,
+                                                            reader=self.reader)
 
         return self.manager_cache[data_binding]
 
@@ -921,8 +1031,25 @@ def get_manager_dict(bindings_dict, databases_dict, data_binding,
                                         default_binding_dict)
 
 
-def open_manager(manager_dict, initialize=False):
+def open_manager(manager_dict, initialize=False, reader=False):
+    """Open the manager of a manager dictionary.
+
+    Args:
+        manager_dict (dict): The manager dictionary. See get_manager_dict_from_config().
+        initialize (bool): True to initialize the database first.
+        reader (bool): True if the manager will only be used for reading. The database driver
+            may then use a connection tuned for reading. For example, a SQLite database in WAL
+            mode gets a read-only connection, from a pool. Not used if initialize is True.
+
+    Returns:
+        Manager: The open manager.
+    """
     manager_cls = weeutil.weeutil.get_object(manager_dict['manager'])
+    if reader and not initialize:
+        database_dict = manager_dict['database_dict']
+        database_dict = dict(database_dict.dict() if hasattr(database_dict, 'dict')
+                             else database_dict, reader=True)
+        return manager_cls.open(database_dict, manager_dict['table_name'])
     if initialize:
         return manager_cls.open_with_create(manager_dict['database_dict'],
                                             manager_dict['table_name'],
@@ -1009,6 +1136,17 @@ class DaySummaryManager(Manager):
     In addition to all the tables for each type, there is one additional table called
     'archive_day__metadata', which currently holds the version number and the time of the last
     update.
+
+    Optionally, the same statistics can also be kept by the hour, and by the month, in tables
+    with names such as 'archive_hour_outTemp' and 'archive_month_outTemp'. These "rollups" allow
+    aggregates over spans that do not fall on day boundaries, or that are many years long, to be
+    calculated without summing the archive records, or thousands of days. Which rollups are kept
+    is set by the key 'rollups' of the schema.
+
+    Optionally, a sketch of the values of each day can also be kept, in tables with names such as
+    'archive_sketch_outTemp'. The sketches of the days in a timespan can be merged to estimate
+    percentiles, such as the median, without reading the archive records. See weeutil.sketch.
+    Which types have sketches is set by the key 'sketches' of the schema.
     """
 
     version = "4.0"
@@ -1045,6 +1183,20 @@ class DaySummaryManager(Manager):
         ]
     }
 
+    # The spans of the optional rollups. The value is a function that returns the TimeSpan of the
+    # rollup that includes an archive timestamp.
+    rollup_spans = {
+        'hour': weeutil.weeutil.archiveHourSpan,
+        'month': weeutil.weeutil.archiveMonthSpan,
+    }
+
+    # Schema used by the sketches of the days. The sketch is saved as a string. See
+    # weeutil.sketch.QuantileSketch.to_string().
+    sketch_schema = [
+        ('dateTime', 'INTEGER NOT NULL UNIQUE PRIMARY KEY'),
+        ('sketch', 'TEXT'),
+    ]
+
     # SQL statements used by the metadata in the daily summaries.
     meta_create_str = "CREATE TABLE %s_day__metadata (name CHAR(20) NOT NULL " \
                       "UNIQUE PRIMARY KEY, value TEXT);"
@@ -1065,6 +1217,9 @@ class DaySummaryManager(Manager):
                 not exist.
             weedb.Uninitialized: If the database exists, but has not been initialized.
         """
+        # The daily summary of the day records are being added to. See _get_current_day_summary()
+        self._day_cache = None
+
         # Initialize my superclass:
         super().__init__(connection, table_name, schema)
 
@@ -1075,6 +1230,8 @@ class DaySummaryManager(Manager):
 
         self.version = None
         self.daykeys = None
+        self.rollupkeys = None
+        self.sketchkeys = None
         DaySummaryManager._create_sync(self)
         self.patch_sums()
 
@@ -1087,6 +1244,9 @@ class DaySummaryManager(Manager):
     def close(self):
         self.version = None
         self.daykeys = None
+        self.rollupkeys = None
+        self.sketchkeys = None
+        self._day_cache = None
         super().close()
 
     def _create_sync(self):
@@ -1098,6 +1258,14 @@ class DaySummaryManager(Manager):
         # Create a set of types that are in the daily summaries:
         self.daykeys = {x[n_prefix:] for x in all_tables
                         if (x.startswith(prefix) and x != meta_name)}
+        # For each span of rollup, the set of types that have one:
+        self.rollupkeys = {}
+        for span in DaySummaryManager.rollup_spans:
+            prefix = "%s_%s_" % (self.table_name, span)
+            self.rollupkeys[span] = {x[len(prefix):] for x in all_tables if x.startswith(prefix)}
+        # The set of types that have sketches:
+        prefix = "%s_sketch_" % self.table_name
+        self.sketchkeys = {x[len(prefix):] for x in all_tables if x.startswith(prefix)}
 
         self.version = self._read_metadata('Version')
         if self.version is None:
@@ -1128,12 +1296,26 @@ class DaySummaryManager(Manager):
             if type(self) == weewx.wxmanager.WXDaySummaryManager or 'windSpeed' in self.sqlkeys:
                 # For backwards compatibility, include 'wind'
                 day_summaries_schemas += [('wind', 'vector')]
+            rollups = []
+            sketches = []
+        else:
+            # Any rollups to be kept, such as ['hour', 'month']
+            rollups = schema.get('rollups', [])
+            for span in rollups:
+                if span not in DaySummaryManager.rollup_spans:
+                    raise ValueError("Unknown rollup '%s'" % span)
+            # Any types whose values are to be sketched, such as ['outTemp', 'windSpeed']
+            sketches = schema.get('sketches', [])
 
         # Create the tables needed for the daily summaries in one transaction:
         with weedb.Transaction(self.connection) as cursor:
             # obs will be a 2-way tuple (obs_type, ('scalar'|'vector'))
             for obs in day_summaries_schemas:
                 self._initialize_day_table(obs[0], obs[1].lower(), cursor)
+                for span in rollups:
+                    self._initialize_day_table(obs[0], obs[1].lower(), cursor, span)
+            for obs_type in sketches:
+                self._initialize_sketch_table(obs_type, cursor)
 
             # Now create the meta table...
             cursor.execute(DaySummaryManager.meta_create_str % self.table_name)
@@ -1142,41 +1324,66 @@ class DaySummaryManager(Manager):
 
             log.info("Created daily summary tables")
 
-    def _initialize_day_table(self, obs_type, day_schema_type, cursor):
-        """Initialize a single daily summary.
+    def _initialize_day_table(self, obs_type, day_schema_type, cursor, span='day'):
+        """Initialize a single daily summary, or rollup.
 
         Args:
 
             obs_type(str): An observation type, such as 'outTemp'
             day_schema_type (str): The schema to be used. Either 'scalar', or 'vector'
             cursor (weedb.Cursor): An open cursor
+            span (str): The span of the summary. Either 'day', 'hour', or 'month'. Default
+                is 'day'.
         """
         s = ', '.join(
             ["%s %s" % column_type
              for column_type in DaySummaryManager.day_schemas[day_schema_type]])
 
-        sql_create_str = "CREATE TABLE %s_day_%s (%s);" % (self.table_name, obs_type, s)
+        sql_create_str = "CREATE TABLE %s_%s_%s (%s);" % (self.table_name, span, obs_type, s)
         cursor.execute(sql_create_str)
 
+    def _initialize_sketch_table(self, obs_type, cursor):
+        """Initialize the table of the sketches of a type."""
+        s = ', '.join(["%s %s" % column_type for column_type in DaySummaryManager.sketch_schema])
+        cursor.execute("CREATE TABLE %s_sketch_%s (%s);" % (self.table_name, obs_type, s))
+
     def _add_column(self, column_name, column_type, cursor):
+        self._day_cache = None
         # First call my superclass's version...
         Manager._add_column(self, column_name, column_type, cursor)
         # ... then do mine
         self._initialize_day_table(column_name, 'scalar', cursor)
+        for span in self._rollups_in_use():
+            self._initialize_day_table(column_name, 'scalar', cursor, span)
 
     def _rename_column(self, old_column_name, new_column_name, cursor):
+        self._day_cache = None
         # First call my superclass's version...
         Manager._rename_column(self, old_column_name, new_column_name, cursor)
         # ... then do mine
         cursor.execute("ALTER TABLE %s_day_%s RENAME TO %s_day_%s;"
                        % (self.table_name, old_column_name, self.table_name, new_column_name))
+        for span in self._rollups_in_use():
+            cursor.execute("ALTER TABLE %s_%s_%s RENAME TO %s_%s_%s;"
+                           % (self.table_name, span, old_column_name,
+                              self.table_name, span, new_column_name))
+        if old_column_name in self.sketchkeys:
+            cursor.execute("ALTER TABLE %s_sketch_%s RENAME TO %s_sketch_%s;"
+                           % (self.table_name, old_column_name, self.table_name, new_column_name))
 
     def _drop_columns(self, column_names, cursor):
+        self._day_cache = None
         # First call my superclass's version...
         Manager._drop_columns(self, column_names, cursor)
         # ... then do mine
         for column_name in column_names:
             cursor.execute("DROP TABLE IF EXISTS %s_day_%s;" % (self.table_name, column_name))
+            for span in self._rollups_in_use():
+                cursor.execute("DROP TABLE IF EXISTS %s_%s_%s;"
+                               % (self.table_name, span, column_name))
+            if column_name in self.sketchkeys:
+                cursor.execute("DROP TABLE IF EXISTS %s_sketch_%s;"
+                               % (self.table_name, column_name))
 
     def _addSingleRecord(self, record, cursor, log_success=True, log_failure=True, update=False):
         """Specialized version that updates the daily summaries, as well as the main archive
@@ -1199,30 +1406,126 @@ class DaySummaryManager(Manager):
                 log.info('*** record ignored')
             return
 
-        # Now add to the daily summary for the appropriate day:
-        _day_summary = self._get_day_summary(_sod_ts, cursor)
-        _day_summary.addRecord(record, weight=_weight)
-        self._set_day_summary(_day_summary, record['dateTime'], cursor)
+        # Now add to the daily summary for the appropriate day, and to any rollups:
+        try:
+            _day_summary = self._get_current_day_summary(_sod_ts, cursor)
+            _day_summary.addRecord(record, weight=_weight)
+            for _span in self._rollups_in_use():
+                _rollup = self._get_current_rollup(_span, record['dateTime'], cursor)
+                _rollup.addRecord(record, weight=_weight)
+                self._set_current_rollup(_span, _rollup, cursor)
+            for _obs_type, _value in self._sketch_values(record):
+                _sketch = self._get_current_sketch(_obs_type, _sod_ts, cursor)
+                _sketch.add(_value)
+                self._write_sketch(_obs_type, _sod_ts, _sketch, cursor)
+            self._set_current_day_summary(_day_summary, record['dateTime'], cursor)
+        except Exception:
+            # The cached daily summary may no longer match the database.
+            self._day_cache = None
+            raise
         if log_success:
             log.info("Added record %s to daily summary in '%s'",
                      timestamp_to_string(record['dateTime']),
                      self.database_name)
 
+    def _addRecordBatch(self, records, cursor, log_failure=True):
+        """Specialized version that updates the daily summaries, as well as the main archive
+        table. Each day is read and written only once.
+        """
+
+        # The batch reads and writes the daily summaries directly, so any cached one will be
+        # out of date.
+        self._day_cache = None
+
+        # First let my superclass handle adding the records to the main archive table:
+        super()._addRecordBatch(records, cursor, log_failure)
+
+        # The daily summaries, keyed by start of day, in the order they were first seen
+        day_summaries = {}
+        # The rollups, keyed by span and start
+        rollups = {}
+        # The sketches, keyed by type and start of day
+        sketches = {}
+        last_ts = None
+        for record in records:
+            # Get the weight. If the value for 'interval' is bad, an exception will be raised.
+            try:
+                _weight = self._calc_weight(record)
+            except IntervalError as e:
+                # Bad value for interval. Ignore this record
+                if log_failure:
+                    log.info(e)
+                    log.info('*** record ignored')
+                continue
+
+            _sod_ts = weeutil.weeutil.startOfArchiveDay(record['dateTime'])
+            if _sod_ts not in day_summaries:
+                day_summaries[_sod_ts] = self._get_day_summary(_sod_ts, cursor)
+            day_summaries[_sod_ts].addRecord(record, weight=_weight)
+            for _span in self._rollups_in_use():
+                _timespan = DaySummaryManager.rollup_spans[_span](record['dateTime'])
+                if (_span, _timespan.start) not in rollups:
+                    rollups[_span, _timespan.start] = self._read_summary(_span, _timespan,
+                                                                         cursor)[0]
+                rollups[_span, _timespan.start].addRecord(record, weight=_weight)
+            for _obs_type, _value in self._sketch_values(record):
+                if (_obs_type, _sod_ts) not in sketches:
+                    sketches[_obs_type, _sod_ts] = self._read_sketch(_obs_type, _sod_ts, cursor)
+                sketches[_obs_type, _sod_ts].add(_value)
+            last_ts = record['dateTime']
+
+        for _day_summary in day_summaries.values():
+            self._set_day_summary(_day_summary, None, cursor)
+        for (_span, _start), _rollup in rollups.items():
+            self._write_summary(_span, _rollup, cursor)
+        for (_obs_type, _sod_ts), _sketch in sketches.items():
+            self._write_sketch(_obs_type, _sod_ts, _sketch, cursor)
+        if last_ts is not None:
+            self._write_metadata('lastUpdate', str(int(last_ts)), cursor)
+
+    def _logRecordBatch(self, records):
+        """Specialized version that also logs the records added to the daily summaries."""
+        super()._logRecordBatch(records)
+        for record in records:
+            # Records with a bad value for 'interval' were not added to the daily summaries
+            try:
+                self._calc_weight(record)
+            except IntervalError:
+                continue
+            log.info("Added record %s to daily summary in '%s'",
+                     timestamp_to_string(record['dateTime']),
+                     self.database_name)
+
     def _updateHiLo(self, accumulator, cursor):
         """Use the contents of an accumulator to update the daily hi/lows."""
 
         # Get the start-of-day for the timespan in the accumulator
         _sod_ts = weeutil.weeutil.startOfArchiveDay(accumulator.timespan.stop)
 
-        # Retrieve the daily summaries seen so far:
-        _stats_dict = self._get_day_summary(_sod_ts, cursor)
-        # Update them with the contents of the accumulator:
-        _stats_dict.updateHiLo(accumulator)
-        # Then save the results:
-        self._set_day_summary(_stats_dict, accumulator.timespan.stop, cursor)
+        try:
+            # Retrieve the daily summaries seen so far:
+            _stats_dict = self._get_current_day_summary(_sod_ts, cursor)
+            # Update them with the contents of the accumulator:
+            _stats_dict.updateHiLo(accumulator)
+            # Do the same with any rollups:
+            for _span in self._rollups_in_use():
+                _rollup = self._get_current_rollup(_span, accumulator.timespan.stop, cursor)
+                try:
+                    _rollup.updateHiLo(accumulator)
+                except weewx.accum.OutOfSpan:
+                    # The accumulator is longer than an hour. The hourly hi/lows have to make do
+                    # with the archive records.
+                    continue
+                self._set_current_rollup(_span, _rollup, cursor)
+            # Then save the results:
+            self._set_current_day_summary(_stats_dict, accumulator.timespan.stop, cursor)
+        except Exception:
+            # The cached daily summary may no longer match the database.
+            self._day_cache = None
+            raise
 
     def backfill_day_summary(self, start_d=None, stop_d=None,
-                             progress_fn=show_progress, trans_days=5):
+                             progress_fn=show_progress, trans_days=5, workers=1):
 
         """Fill the daily summaries from an archive database.
 
@@ -1234,6 +1537,15 @@ class DaySummaryManager(Manager):
         To help prevent database errors for large archives, database transactions are limited to
         trans_days days of archive data. This is a trade-off between speed and memory usage.
 
+        If workers is greater than one, the daily summaries of each tranche are calculated by a
+        pool of worker processes, each with its own connection to the database. The results are
+        still written by this process, one tranche at a time and in order, so an aborted backfill
+        can be resumed, just like a serial one.
+
+        Any hourly rollups and sketches are backfilled from the archive records along with the
+        days. Any monthly rollups are recalculated from the daily summaries of the months in each
+        tranche.
+
         Args:
 
             start_d (datetime.date|None): The first day to be included, specified as a
@@ -1245,6 +1557,8 @@ class DaySummaryManager(Manager):
                 every 1000 records.
             trans_days (int): Number of days of archive data to be used for each daily summaries
                 database transaction. [Optional. Default is 5.]
+            workers (int): Number of worker processes to use. [Optional. Default is 1, that is,
+                do everything in this process.]
 
         Returns:
              tuple[int,int]: A 2-way tuple (nrecs, ndays) where
@@ -1257,6 +1571,7 @@ class DaySummaryManager(Manager):
         #                  if a backfill was aborted.
 
         log.info("Starting backfill of daily summaries")
+        self._day_cache = None
 
         if self.first_timestamp is None:
             # Nothing in the archive database, so there's nothing to do.
@@ -1312,69 +1627,48 @@ class DaySummaryManager(Manager):
         # For what follows, last_d needs to point to the day *after* the last desired day
         last_d += datetime.timedelta(days=1)
 
-        nrecs = 0
-        ndays = 0
-
+        # The time spans of the tranches
+        tranches = []
         mark_d = first_d
-
         while mark_d < last_d:
             # Calculate the last date included in this transaction
             stop_transaction = min(mark_d + tranche_days, last_d)
-            day_accum = None
+            tranches.append((time.mktime(mark_d.timetuple()),
+                             time.mktime(stop_transaction.timetuple())))
+            # Advance to the next tranche
+            mark_d += tranche_days
 
-            with weedb.Transaction(self.connection) as cursor:
-                # Go through all the archive records in the time span, adding them to the
-                # daily summaries
-                start_batch_ts = time.mktime(mark_d.timetuple())
-                stop_batch_ts = time.mktime(stop_transaction.timetuple())
-                for rec in self.genBatchRecords(start_batch_ts, stop_batch_ts):
-                    # If this is the very first record, fetch a new accumulator
-                    if not day_accum:
-                        # Get a TimeSpan that includes the record's timestamp:
-                        timespan = weeutil.weeutil.archiveDaySpan(rec['dateTime'])
-                        # Get an empty day accumulator:
-                        day_accum = weewx.accum.Accum(timespan)
-                    try:
-                        weight = self._calc_weight(rec)
-                    except IntervalError as e:
-                        # Ignore records with bad values for 'interval'
-                        log.info(e)
-                        log.info('***  ignored.')
-                        continue
-                    # Try updating. If the time is out of the accumulator's time span, an
-                    # exception will get raised.
-                    try:
-                        day_accum.addRecord(rec, weight=weight)
-                    except weewx.accum.OutOfSpan:
-                        # The record is out of the time span.
-                        # Save the old accumulator:
-                        self._set_day_summary(day_accum, None, cursor)
-                        ndays += 1
-                        # Get a new accumulator:
-                        timespan = weeutil.weeutil.archiveDaySpan(rec['dateTime'])
-                        day_accum = weewx.accum.Accum(timespan)
-                        # try again
-                        day_accum.addRecord(rec, weight=weight)
+        if workers > 1 and len(tranches) > 1 and self.database_dict \
+                and self.database_dict.get('database_name') != ':memory:':
+            results = self._gen_tranches_parallel(tranches, workers)
+            tranche_progress_fn = progress_fn
+        else:
+            results = self._gen_tranches(tranches, progress_fn)
+            tranche_progress_fn = None
 
-                    if last_daily_ts is None:
-                        last_daily_ts = rec['dateTime']
-                    else:
-                        last_daily_ts = max(last_daily_ts, rec['dateTime'])
-                    nrecs += 1
-                    if progress_fn and nrecs % 1000 == 0:
-                        progress_fn(rec['dateTime'], nrecs)
-
-                # We're done with this transaction. Unless it is empty, save the daily summary for
-                # the last day
-                if day_accum and not day_accum.isEmpty:
+        nrecs = 0
+        ndays = 0
+
+        for day_accums, tranche_nrecs, tranche_last_ts, hour_accums, day_sketches in results:
+            with weedb.Transaction(self.connection) as cursor:
+                for day_accum in day_accums:
                     self._set_day_summary(day_accum, None, cursor)
-                    ndays += 1
+                for hour_accum in hour_accums:
+                    self._write_summary('hour', hour_accum, cursor)
+                for (obs_type, sod_ts), sketch in day_sketches.items():
+                    self._write_sketch(obs_type, sod_ts, sketch, cursor)
+                if day_accums and self.rollupkeys['month']:
+                    self._rebuild_months(day_accums[0].timespan.start,
+                                         day_accums[-1].timespan.stop, cursor)
+                ndays += len(day_accums)
+                nrecs += tranche_nrecs
+                if tranche_last_ts is not None:
+                    last_daily_ts = max(last_daily_ts or 0, tranche_last_ts)
                 # Patch lastUpdate:
                 if last_daily_ts:
                     self._write_metadata('lastUpdate', str(int(last_daily_ts)), cursor)
-
-            # Advance to the next tranche
-            mark_d += tranche_days
+            if tranche_progress_fn and tranche_nrecs:
+                tranche_progress_fn(tranche_last_ts, nrecs)
 
         tdiff = time.time() - t1
         log.info("Processed %d records to backfill %d day summaries in %.2f seconds",
@@ -1382,18 +1676,134 @@ class DaySummaryManager(Manager):
 
         return nrecs, ndays
 
+    def _calc_tranche(self, manager, start_ts, stop_ts, progress_fn=None):
+        """Calculate the daily summaries for the archive records in a tranche.
+
+        Args:
+            manager (Manager): The manager to be used to read the archive records.
+            start_ts (float): The start of the tranche.
+            stop_ts (float): The end of the tranche.
+            progress_fn (function|None): If given, called after every 1000 records.
+
+        Returns:
+            tuple[list[weewx.accum.Accum], int, int|None, list[weewx.accum.Accum], dict]: The
+                day accumulators, the number of records, the timestamp of the last record, the
+                hour accumulators, and the sketches of the days, keyed by type and start of day.
+                The last two are empty, unless there are hourly rollups, or sketches.
+        """
+        day_accums = []
+        day_accum = None
+        hour_accums = []
+        hour_accum = None
+        day_sketches = {}
+        nrecs = 0
+        last_ts = None
+        # Go through all the archive records in the time span, adding them to the
+        # daily summaries
+        for rec in manager.genBatchRecords(start_ts, stop_ts):
+            # If this is the very first record, fetch a new accumulator
+            if not day_accum:
+                # Get a TimeSpan that includes the record's timestamp:
+                timespan = weeutil.weeutil.archiveDaySpan(rec['dateTime'])
+                # Get an empty day accumulator:
+                day_accum = weewx.accum.Accum(timespan)
+            try:
+                weight = self._calc_weight(rec)
+            except IntervalError as e:
+                # Ignore records with bad values for 'interval'
+                log.info(e)
+                log.info('***  ignored.')
+                continue
+            # Try updating. If the time is out of the accumulator's time span, an
+            # exception will get raised.
+            try:
+                day_accum.addRecord(rec, weight=weight)
+            except weewx.accum.OutOfSpan:
+                # The record is out of the time span.
+                # Save the old accumulator:
+                day_accums.append(day_accum)
+                # Get a new accumulator:
+                timespan = weeutil.weeutil.archiveDaySpan(rec['dateTime'])
+                day_accum = weewx.accum.Accum(timespan)
+                # try again
+                day_accum.addRecord(rec, weight=weight)
+
+            if self.rollupkeys['hour']:
+                if not hour_accum or not hour_accum.timespan.includesArchiveTime(rec['dateTime']):
+                    hour_accum = weewx.accum.Accum(
+                        weeutil.weeutil.archiveHourSpan(rec['dateTime']))
+                    hour_accums.append(hour_accum)
+                hour_accum.addRecord(rec, weight=weight)
+
+            for obs_type, value in self._sketch_values(rec):
+                sketch_key = (obs_type, day_accum.timespan.start)
+                if sketch_key not in day_sketches:
+                    day_sketches[sketch_key] = weeutil.sketch.QuantileSketch()
+                day_sketches[sketch_key].add(value)
+
+            last_ts = rec['dateTime'] if last_ts is None else max(last_ts, rec['dateTime'])
+            nrecs += 1
+            if progress_fn and nrecs % 1000 == 0:
+                progress_fn(rec['dateTime'], nrecs)
+
+        # Unless it is empty, save the daily summary for the last day
+        if day_accum and not day_accum.isEmpty:
+            day_accums.append(day_accum)
+        return day_accums, nrecs, last_ts, hour_accums, day_sketches
+
+    def _gen_tranches(self, tranches, progress_fn=None):
+        """Calculate the daily summaries of tranches, one after another.
+
+        Yields the same as _calc_tranche(), for each tranche, in order.
+        """
+        nrecs = 0
+        for start_ts, stop_ts in tranches:
+            tranche_progress_fn = None
+            if progress_fn:
+                def tranche_progress_fn(ts, n, offset=nrecs):
+                    progress_fn(ts, offset + n)
+            result = self._calc_tranche(self, start_ts, stop_ts, tranche_progress_fn)
+            nrecs += result[1]
+            yield result
+
+    def _gen_tranches_parallel(self, tranches, workers):
+        """Calculate the daily summaries of tranches using a pool of worker processes.
+
+        Yields the same as _calc_tranche(), for each tranche, in order.
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=weeutil.weeutil.get_worker_context(),
+                initializer=_init_backfill_worker,
+                initargs=(type(self), self.database_dict, self.table_name,
+                          weewx.accum.accum_dict.maps)) as executor:
+            # Do not let the results get too far ahead of the writer
+            pending = collections.deque()
+            for start_ts, stop_ts in tranches:
+                pending.append(executor.submit(_calc_tranche_in_worker, start_ts, stop_ts))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
     def drop_daily(self):
         """Drop the daily summaries."""
 
+        self._day_cache = None
         log.info("Dropping daily summary tables from '%s' ...", self.connection.database_name)
         try:
             _all_tables = self.connection.tables()
+            # The rollups and sketches go with the daily summaries
+            _prefixes = tuple('%s_%s_' % (self.table_name, span)
+                              for span in ['day', 'sketch'] + list(DaySummaryManager.rollup_spans))
             with weedb.Transaction(self.connection) as _cursor:
                 for _table_name in _all_tables:
-                    if _table_name.startswith('%s_day_' % self.table_name):
+                    if _table_name.startswith(_prefixes):
                         _cursor.execute("DROP TABLE %s" % _table_name)
 
             self.daykeys = None
+            self.rollupkeys = None
+            self.sketchkeys = None
         except weedb.OperationalError as e:
             log.error("Drop daily summary tables failed for database '%s': %s",
                       self.connection.database_name, e)
@@ -1469,6 +1879,8 @@ class DaySummaryManager(Manager):
         if weight_fn is None:
             weight_fn = DaySummaryManager._calc_weight
 
+        self._day_cache = None
+
         # Do all the dates in the tranche as a single transaction
         with weedb.Transaction(self.connection) as cursor:
 
@@ -1478,8 +1890,9 @@ class DaySummaryManager(Manager):
                 next_d = mark_d + datetime.timedelta(days=1)
                 day_span = TimeSpan(time.mktime(mark_d.timetuple()),
                                     time.mktime(next_d.timetuple()))
-                # Get an accumulator for the day
+                # Get an accumulator for the day, and for its hours if there are hourly rollups
                 day_accum = weewx.accum.Accum(day_span)
+                hour_accums = {}
                 # Now populate it with a day's worth of records
                 for rec in self.genBatchRecords(day_span.start, day_span.stop):
                     try:
@@ -1489,19 +1902,32 @@ class DaySummaryManager(Manager):
                         log.info('***  ignored.')
                     else:
                         day_accum.addRecord(rec, weight=weight)
-                # Write out the results of the accumulator
+                        if self.rollupkeys['hour']:
+                            hour_span = weeutil.weeutil.archiveHourSpan(rec['dateTime'])
+                            if hour_span.start not in hour_accums:
+                                hour_accums[hour_span.start] = weewx.accum.Accum(hour_span)
+                            hour_accums[hour_span.start].addRecord(rec, weight=weight)
+                # Write out the results of the accumulators
                 self._set_day_sums(day_accum, cursor)
+                for hour_accum in hour_accums.values():
+                    self._set_day_sums(hour_accum, cursor, 'hour')
                 if progress_fn:
                     # Update our progress
                     progress_fn(day_accum.timespan.stop)
                 # On to the next day
                 mark_d += datetime.timedelta(days=1)
 
-    def _set_day_sums(self, day_accum, cursor):
-        """Replace the weighted sums for all types for a day. Don't touch the mins and maxes."""
+            if self.rollupkeys['month']:
+                self._rebuild_months(time.mktime(start_d.timetuple()),
+                                     time.mktime(last_d.timetuple()), cursor)
+
+    def _set_day_sums(self, day_accum, cursor, span='day'):
+        """Replace the weighted sums for all types for a day, or for an hourly rollup. Don't
+        touch the mins and maxes."""
+        summary_keys = self._summary_keys(span)
         for obs_type in day_accum:
             # Skip any types that are not in the daily summary schema
-            if obs_type not in self.daykeys:
+            if obs_type not in summary_keys:
                 continue
             # This will be list that looks like ['sum=2345.65', 'count=123', ... etc.]
             # It will only include attributes that are in the accumulator for this type.
@@ -1510,8 +1936,9 @@ class DaySummaryManager(Manager):
                                   'xsum', 'ysum', 'dirsumtime',
                                   'squaresum', 'wsquaresum']
                         if hasattr(day_accum[obs_type], k)]
-            update_sql = "UPDATE {archive_table}_day_{obs_type} SET {set_stmt} " \
+            update_sql = "UPDATE {archive_table}_{span}_{obs_type} SET {set_stmt} " \
                          "WHERE dateTime = ?;".format(archive_table=self.table_name,
+                                                      span=span,
                                                       obs_type=obs_type,
                                                       set_stmt=', '.join(set_list))
             # Update this observation type's weighted sums:
@@ -1584,33 +2011,105 @@ class DaySummaryManager(Manager):
         Returns:
             weewx.accum.Accum
         """
+        return self._read_day_summary(sod_ts, cursor)[0]
+
+    def _read_day_summary(self, sod_ts, cursor=None):
+        """Same as _get_day_summary(), but also returns the stats tuples of the types found in
+        the database.
+
+        Returns:
+            tuple[weewx.accum.Accum, dict]: The accumulator, and a dictionary with key
+                observation type, value the stats tuple read from the database.
+        """
 
         # Get the TimeSpan for the day starting with sod_ts:
         _timespan = weeutil.weeutil.daySpan(sod_ts)
 
-        # Get an empty day accumulator:
-        _day_accum = weewx.accum.Accum(_timespan, self.std_unit_system)
+        return self._read_summary('day', _timespan, cursor)
+
+    def _read_summary(self, span, timespan, cursor=None):
+        """Read the daily summary, or rollup, of a timespan.
+
+        Args:
+            span (str): The span of the summary. Either 'day', 'hour', or 'month'.
+            timespan (TimeSpan): The timespan of the summary.
+            cursor(Cursor|None): Optional cursor. If one is not supplied, one will be
+                opened.
+
+        Returns:
+            tuple[weewx.accum.Accum, dict]: Same as _read_day_summary().
+        """
+
+        # Get an empty accumulator:
+        _accum = weewx.accum.Accum(timespan, self.std_unit_system)
+        _found = {}
 
         _cursor = cursor or self.connection.cursor()
 
         try:
             # For each observation type, execute the SQL query and hand the results on to the
             # accumulator.
-            for _day_key in self.daykeys:
+            for _key in self._summary_keys(span):
                 _cursor.execute(
-                    "SELECT * FROM %s_day_%s WHERE dateTime = ?" % (self.table_name, _day_key),
-                    (_day_accum.timespan.start,))
+                    "SELECT * FROM %s_%s_%s WHERE dateTime = ?" % (self.table_name, span, _key),
+                    (_accum.timespan.start,))
                 _row = _cursor.fetchone()
                 # If the date does not exist in the database yet then _row will be None.
                 _stats_tuple = _row[1:] if _row is not None else None
-                _day_accum.set_stats(_day_key, _stats_tuple)
+                _accum.set_stats(_key, _stats_tuple)
+                if _row is not None:
+                    _found[_key] = _accum[_key].getStatsTuple()
 
-            return _day_accum
+            return _accum, _found
         finally:
             if not cursor:
                 _cursor.close()
 
-    def _set_day_summary(self, day_accum, lastUpdate, cursor):
+    def _get_current_day_summary(self, sod_ts, cursor):
+        """Like _get_day_summary(), but the accumulator stays in memory, so it does not have to
+        be read again for the next record of the same day. It is read again if the day changes,
+        or if somebody else has updated the daily summaries since we last did.
+
+        The returned accumulator should be saved with _set_current_day_summary().
+        """
+        _cache = self._day_cache
+        if _cache is not None and _cache.day_accum.timespan.start == sod_ts \
+                and self._read_metadata('lastUpdate', cursor) == _cache.last_update:
+            return _cache.day_accum
+
+        _day_accum, _found = self._read_day_summary(sod_ts, cursor)
+        self._day_cache = _DayCache(_day_accum, _found, self._read_metadata('lastUpdate', cursor))
+        return _day_accum
+
+    def _set_current_day_summary(self, day_accum, lastUpdate, cursor):
+        """Save an accumulator obtained from _get_current_day_summary(). Only the types that
+        have changed since they were last read or written are written."""
+        self._set_day_summary(day_accum, lastUpdate, cursor, self._day_cache.written)
+        if lastUpdate is not None:
+            self._day_cache.last_update = str(int(lastUpdate))
+
+    def _get_current_rollup(self, span, time_ts, cursor):
+        """Like _get_current_day_summary(), but for the rollup that includes an archive
+        timestamp. It must be called after _get_current_day_summary(), which checks whether the
+        cache can still be used.
+
+        The returned accumulator should be saved with _set_current_rollup().
+        """
+        _cached = self._day_cache.rollups.get(span)
+        if _cached is not None and _cached[0].timespan.includesArchiveTime(time_ts):
+            return _cached[0]
+
+        _timespan = DaySummaryManager.rollup_spans[span](time_ts)
+        _accum, _found = self._read_summary(span, _timespan, cursor)
+        self._day_cache.rollups[span] = (_accum, _found)
+        return _accum
+
+    def _set_current_rollup(self, span, accum, cursor):
+        """Save an accumulator obtained from _get_current_rollup(). Only the types that have
+        changed since they were last read or written are written."""
+        self._write_summary(span, accum, cursor, self._day_cache.rollups[span][1])
+
+    def _set_day_summary(self, day_accum, lastUpdate, cursor, written=None):
         """Write all statistics for a day to the database in a single transaction.
 
         Args:
@@ -1619,34 +2118,120 @@ class DaySummaryManager(Manager):
                 None. Normally, this is the timestamp of the last archive record added to the
                 instance day_accum.
             cursor (Cursor): An open cursor.
+            written (dict|None): If given, the stats tuples already in the database, keyed by
+                observation type. Types whose stats tuple has not changed are not written. The
+                dictionary is updated with what gets written.
             """
 
+        self._write_summary('day', day_accum, cursor, written)
+
+        # If requested, update the time of the last daily summary update:
+        if lastUpdate is not None:
+            self._write_metadata('lastUpdate', str(int(lastUpdate)), cursor)
+
+    def _write_summary(self, span, accum, cursor, written=None):
+        """Write all statistics of a daily summary, or rollup, to the database.
+
+        Args:
+            span (str): The span of the summary. Either 'day', 'hour', or 'month'.
+            accum (weewx.accum.Accum): An accumulator with the summary.
+            cursor (Cursor): An open cursor.
+            written (dict|None): Same as for _set_day_summary().
+        """
+
         # Make sure the new data uses the same unit system as the database.
-        self._check_unit_system(day_accum.unit_system)
+        self._check_unit_system(accum.unit_system)
 
-        _sod = day_accum.timespan.start
+        _start = accum.timespan.start
+        _summary_keys = self._summary_keys(span)
 
-        # For each daily summary type...
-        for _summary_type in day_accum:
+        # For each summary type...
+        for _summary_type in accum:
             # Don't try an update for types not in the database:
-            if _summary_type not in self.daykeys:
+            if _summary_type not in _summary_keys:
                 continue
             # ... get the stats tuple to be written to the database...
-            _write_tuple = (_sod,) + day_accum[_summary_type].getStatsTuple()
+            _stats_tuple = accum[_summary_type].getStatsTuple()
+            if written is not None and written.get(_summary_type) == _stats_tuple:
+                continue
+            _write_tuple = (_start,) + _stats_tuple
             # ... and an appropriate SQL command with the correct number of question marks ...
             _qmarks = ','.join(len(_write_tuple) * '?')
-            _sql_replace_str = "REPLACE INTO %s_day_%s VALUES(%s)" % (
-                self.table_name, _summary_type, _qmarks)
+            _sql_replace_str = "REPLACE INTO %s_%s_%s VALUES(%s)" % (
+                self.table_name, span, _summary_type, _qmarks)
             # ... and write to the database. In case the type doesn't appear in the database,
             # be prepared to catch an exception:
             try:
                 cursor.execute(_sql_replace_str, _write_tuple)
             except weedb.OperationalError as e:
                 log.error("Replace failed for database %s: %s", self.database_name, e)
-
-        # If requested, update the time of the last daily summary update:
-        if lastUpdate is not None:
-            self._write_metadata('lastUpdate', str(int(lastUpdate)), cursor)
+            else:
+                if written is not None:
+                    written[_summary_type] = _stats_tuple
+
+    def _rebuild_months(self, start_ts, stop_ts, cursor):
+        """Recalculate the monthly rollups of the months in a timespan from the daily
+        summaries."""
+        for _month_span in weeutil.weeutil.genMonthSpans(start_ts, stop_ts):
+            _month_accum = weewx.accum.Accum(_month_span, self.std_unit_system)
+            for _obs_type in self.rollupkeys['month'] & self.daykeys:
+                _rows = list(cursor.execute(
+                    "SELECT * FROM %s_day_%s WHERE dateTime >= ? AND dateTime < ? "
+                    "ORDER BY dateTime ASC" % (self.table_name, _obs_type),
+                    (_month_span.start, _month_span.stop)))
+                if not _rows:
+                    cursor.execute("DELETE FROM %s_month_%s WHERE dateTime = ?"
+                                   % (self.table_name, _obs_type), (_month_span.start,))
+                    continue
+                _month_accum.set_stats(_obs_type, None)
+                for _row in _rows:
+                    _day_stats = weewx.accum.new_accumulator(_obs_type)
+                    _day_stats.setStats(_row[1:])
+                    _month_accum[_obs_type].mergeHiLo(_day_stats)
+                    _month_accum[_obs_type].mergeSum(_day_stats)
+            self._write_summary('month', _month_accum, cursor)
+
+    def _sketch_values(self, record):
+        """Return the values of a record that go in the sketches, as (type, value) pairs."""
+        values = []
+        for obs_type in self.sketchkeys:
+            try:
+                value = to_float(record.get(obs_type))
+            except ValueError:
+                continue
+            if value is not None:
+                values.append((obs_type, value))
+        return values
+
+    def _read_sketch(self, obs_type, sod_ts, cursor):
+        """Return the sketch of a type for a day. It is empty if there is none yet."""
+        cursor.execute("SELECT sketch FROM %s_sketch_%s WHERE dateTime = ?"
+                       % (self.table_name, obs_type), (sod_ts,))
+        row = cursor.fetchone()
+        if row is None or row[0] is None:
+            return weeutil.sketch.QuantileSketch()
+        return weeutil.sketch.QuantileSketch.from_string(row[0])
+
+    def _write_sketch(self, obs_type, sod_ts, sketch, cursor):
+        """Write the sketch of a type for a day."""
+        cursor.execute("REPLACE INTO %s_sketch_%s VALUES(?, ?)" % (self.table_name, obs_type),
+                       (sod_ts, sketch.to_string()))
+
+    def _get_current_sketch(self, obs_type, sod_ts, cursor):
+        """Like _get_current_rollup(), but for the sketch of a type for a day."""
+        _sketches = self._day_cache.sketches
+        if obs_type not in _sketches:
+            _sketches[obs_type] = self._read_sketch(obs_type, sod_ts, cursor)
+        return _sketches[obs_type]
+
+    def _rollups_in_use(self):
+        """Return the spans of the rollups that are kept for at least one type."""
+        return [span for span in self.rollupkeys if self.rollupkeys[span]]
+
+    def _summary_keys(self, span):
+        """Return the set of types that have a summary of a span ('day', 'hour', or
+        'month')."""
+        return self.daykeys if span == 'day' else self.rollupkeys[span]
 
     def _calc_weight(self, record):
         """Returns the weighting to be used, depending on the version of the daily summaries."""
@@ -1694,6 +2279,41 @@ class DaySummaryManager(Manager):
                 _cursor.close()
 
 
+# The manager used by a worker process of DaySummaryManager._gen_tranches_parallel()
+_backfill_manager = None
+
+
+def _init_backfill_worker(manager_class, database_dict, table_name, accum_maps):
+    """Give a backfill worker its own manager, and the accumulator configuration of the process
+    that started it."""
+    global _backfill_manager
+    weewx.accum.accum_dict.maps = list(accum_maps)
+    # The version of the daily summaries, and which types have rollups and sketches, are read
+    # from the database, so they are the same as in the process that started the worker.
+    _backfill_manager = manager_class.open(database_dict, table_name)
+
+
+def _calc_tranche_in_worker(start_ts, stop_ts):
+    return _backfill_manager._calc_tranche(_backfill_manager, start_ts, stop_ts)
+
+
+class _DayCache:
+    """The daily summary of the day records are being added to, as it is in the database."""
+
+    def __init__(self, day_accum, written, last_update):
+        # The accumulator with the daily summary
+        self.day_accum = day_accum
+        # The stats tuples in the database, keyed by observation type
+        self.written = written
+        # The value of 'lastUpdate' in the metadata
+        self.last_update = last_update
+        # The current rollups, keyed by span. The value is a tuple (accumulator, stats tuples in
+        # the database).
+        self.rollups = {}
+        # The sketches of the day, keyed by type
+        self.sketches = {}
+
+
 if __name__ == '__main__':
     import doctest
 
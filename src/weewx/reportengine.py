@@ -6,6 +6,7 @@
 """Engine for generating reports"""
 
 # System imports:
+import concurrent.futures
 import datetime
 import ftplib
 import glob
@@ -23,9 +24,13 @@ import configobj
 # WeeWX imports:
 import weeutil.config
 import weeutil.logger
+import weeutil.startup
 import weeutil.weeutil
+import weewx
 import weewx.defaults
+import weewx.engine
 import weewx.manager
+import weewx.tags
 import weewx.units
 from weeutil.weeutil import to_bool, to_int
 
@@ -158,115 +163,346 @@ class StdReportEngine(threading.Thread):
         # all of them may be enabled).
         run_reports = reports or self.config_dict['StdReport'].sections
 
-        # Iterate over each requested report
-        for report in run_reports:
+        # How many reports can be run at the same time. Each one is run in a worker process, so
+        # the working directory and locale of one report cannot affect another.
+        report_workers = to_int(self.config_dict['StdReport'].get('report_workers', 1))
+
+        # Aggregates calculated by one report can be reused by the others during this run.
+        aggregate_cache = weewx.tags.AggregateCache()
+
+        # The pool of worker processes, and the reports given to it
+        executor = None
+        futures = []
+        if report_workers > 1:
+            # The workers do not share the memory of this process. They are given what they need
+            # to set themselves up, and each one has its own aggregate cache.
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=report_workers,
+                mp_context=weeutil.weeutil.get_worker_context(),
+                initializer=_init_report_worker,
+                initargs=(self.config_dict, self.stn_info, self.record, self.gen_ts,
+                          self.first_run, weeutil.logger.log_process_name))
 
-            # Ignore the [[Defaults]] section
-            if report == 'Defaults':
-                continue
+        try:
+            # Iterate over each requested report
+            for report in run_reports:
 
-            # If reports is None, then we need to check whether this particular report has
-            # been enabled.
-            if reports is None:
-                enabled = to_bool(self.config_dict['StdReport'][report].get('enable', True))
-                if not enabled:
-                    log.debug("Report '%s' not enabled. Skipping.", report)
+                # Ignore the [[Defaults]] section
+                if report == 'Defaults':
                     continue
 
-            log.debug("Running report '%s'", report)
+                # If reports is None, then we need to check whether this particular report has
+                # been enabled.
+                if reports is None:
+                    enabled = to_bool(self.config_dict['StdReport'][report].get('enable', True))
+                    if not enabled:
+                        log.debug("Report '%s' not enabled. Skipping.", report)
+                        continue
 
-            # Fetch and build the skin_dict:
-            try:
-                skin_dict = build_skin_dict(self.config_dict, report)
-            except SyntaxError as e:
-                log.error("Syntax error: %s", e)
-                log.error("   ****       Report ignored")
-                continue
-
-            # Default action is to run the report. Only reason to not run it is
-            # if we have a valid report report_timing, and it did not trigger.
-            if self.record:
-                # StdReport called us not "weectl report run" so look for a report_timing
-                # entry if we have one.
-                timing_line = skin_dict.get('report_timing')
-                if timing_line:
-                    # Get a ReportTiming object.
-                    timing = ReportTiming(timing_line)
-                    if timing.is_valid:
-                        # Get timestamp and interval, so we can check if the
-                        # report timing is triggered.
-                        _ts = self.record['dateTime']
-                        _interval = self.record['interval'] * 60
-                        # Is our report timing triggered? timing.is_triggered
-                        # returns True if triggered, False if not triggered
-                        # and None if an invalid report timing line.
-                        if timing.is_triggered(_ts, _ts - _interval) is False:
-                            # report timing was valid but not triggered so do
-                            # not run the report.
-                            log.debug("Report '%s' skipped due to report_timing setting", report)
-                            continue
-                    else:
-                        log.debug("Invalid report_timing setting for report '%s', "
-                                  "running report anyway", report)
-                        log.debug("       ****  %s", timing.validation_error)
-
-            # We are using two "with" statements below:
-            # 1. Set the current working directory to the skin's location. This allows #include
-            # statements to work.
-            # 2. Set the locale to 'lang'. If 'lang' was not specified, set it to the user's
-            # default locale.
-            with set_cwd(os.path.join(self.config_dict['WEEWX_ROOT'],
-                                      skin_dict['SKIN_ROOT'],
-                                      skin_dict['skin'])) as cwd, \
-                    set_locale(skin_dict.get('lang', '')) as loc:
-                log.debug("Running generators for report '%s' in directory '%s' with locale '%s'",
-                          report, cwd, loc)
-
-                if 'Generators' in skin_dict and 'generator_list' in skin_dict['Generators']:
-                    for generator in weeutil.weeutil.option_as_list(
-                            skin_dict['Generators']['generator_list']):
-
-                        try:
-                            # Instantiate an instance of the class.
-                            obj = weeutil.weeutil.get_object(generator)(
-                                self.config_dict,
-                                skin_dict,
-                                self.gen_ts,
-                                self.first_run,
-                                self.stn_info,
-                                self.record)
-                        except Exception as e:
-                            log.error("Unable to instantiate generator '%s'", generator)
-                            log.error("        ****  %s", e)
-                            weeutil.logger.log_traceback(log.error, "        ****  ")
-                            log.error("        ****  Generator ignored")
-                            traceback.print_exc()
-                            continue
-
-                        try:
-                            # Call its start() method
-                            obj.start()
-
-                        except Exception as e:
-                            # Caught unrecoverable error. Log it, continue on to the
-                            # next generator.
-                            log.error("Caught unrecoverable exception in generator '%s'",
-                                      generator)
-                            log.error("        ****  %s", e)
-                            weeutil.logger.log_traceback(log.error, "        ****  ")
-                            log.error("        ****  Generator terminated")
-                            traceback.print_exc()
-                            continue
-
-                        finally:
-                            obj.finalize()
+                skin_dict = self.prepare_report(report)
+                if skin_dict is None:
+                    continue
+
+                if executor:
+                    if wait_for_reports(skin_dict):
+                        log.debug("Report '%s' waiting for earlier reports to finish", report)
+                        StdReportEngine.wait_for_workers(futures)
+                    try:
+                        futures.append((report, executor.submit(_run_report_in_worker,
+                                                                report, skin_dict)))
+                    except concurrent.futures.BrokenExecutor as e:
+                        log.error("Unable to run report '%s': %s", report, e)
+                else:
+                    self.run_generators(report, skin_dict, aggregate_cache)
+        finally:
+            if executor:
+                StdReportEngine.wait_for_workers(futures)
+                executor.shutdown()
+
+        if not executor:
+            log.debug("Aggregate cache: %d hits, %d misses", aggregate_cache.hits,
+                      aggregate_cache.misses)
+
+    def prepare_report(self, report):
+        """Build the skin dictionary for a report.
 
+        Args:
+            report(str): The name of the report.
+
+        Returns:
+            dict|None: The skin dictionary, or None if the report should not be run.
+        """
+
+        log.debug("Running report '%s'", report)
+
+        # Fetch and build the skin_dict:
+        try:
+            skin_dict = build_skin_dict(self.config_dict, report)
+        except SyntaxError as e:
+            log.error("Syntax error: %s", e)
+            log.error("   ****       Report ignored")
+            return None
+
+        # Default action is to run the report. Only reason to not run it is
+        # if we have a valid report report_timing, and it did not trigger.
+        if self.record:
+            # StdReport called us not "weectl report run" so look for a report_timing
+            # entry if we have one.
+            timing_line = skin_dict.get('report_timing')
+            if timing_line:
+                # Get a ReportTiming object.
+                timing = ReportTiming(timing_line)
+                if timing.is_valid:
+                    # Get timestamp and interval, so we can check if the
+                    # report timing is triggered.
+                    _ts = self.record['dateTime']
+                    _interval = self.record['interval'] * 60
+                    # Is our report timing triggered? timing.is_triggered
+                    # returns True if triggered, False if not triggered
+                    # and None if an invalid report timing line.
+                    if timing.is_triggered(_ts, _ts - _interval) is False:
+                        # report timing was valid but not triggered so do
+                        # not run the report.
+                        log.debug("Report '%s' skipped due to report_timing setting", report)
+                        return None
                 else:
-                    log.debug("No generators specified for report '%s'", report)
+                    log.debug("Invalid report_timing setting for report '%s', "
+                              "running report anyway", report)
+                    log.debug("       ****  %s", timing.validation_error)
+
+        return skin_dict
+
+    def run_generators(self, report, skin_dict, aggregate_cache=None):
+        """Run the generators of a report, one after another.
+
+        Args:
+            report(str): The name of the report.
+            skin_dict(dict): The skin dictionary of the report.
+            aggregate_cache(weewx.tags.AggregateCache|None): Cache to be used by the generators.
+        """
+
+        # We are using two "with" statements below:
+        # 1. Set the current working directory to the skin's location. This allows #include
+        # statements to work.
+        # 2. Set the locale to 'lang'. If 'lang' was not specified, set it to the user's
+        # default locale.
+        with set_cwd(os.path.join(self.config_dict['WEEWX_ROOT'],
+                                  skin_dict['SKIN_ROOT'],
+                                  skin_dict['skin'])) as cwd, \
+                set_locale(skin_dict.get('lang', '')) as loc:
+            log.debug("Running generators for report '%s' in directory '%s' with locale '%s'",
+                      report, cwd, loc)
+
+            if 'Generators' in skin_dict and 'generator_list' in skin_dict['Generators']:
+                for generator in weeutil.weeutil.option_as_list(
+                        skin_dict['Generators']['generator_list']):
+
+                    try:
+                        # Instantiate an instance of the class.
+                        obj = weeutil.weeutil.get_object(generator)(
+                            self.config_dict,
+                            skin_dict,
+                            self.gen_ts,
+                            self.first_run,
+                            self.stn_info,
+                            self.record)
+                    except Exception as e:
+                        log.error("Unable to instantiate generator '%s'", generator)
+                        log.error("        ****  %s", e)
+                        weeutil.logger.log_traceback(log.error, "        ****  ")
+                        log.error("        ****  Generator ignored")
+                        traceback.print_exc()
+                        continue
+
+                    obj.aggregate_cache = aggregate_cache
+
+                    try:
+                        # Call its start() method
+                        obj.start()
+
+                    except Exception as e:
+                        # Caught unrecoverable error. Log it, continue on to the
+                        # next generator.
+                        log.error("Caught unrecoverable exception in generator '%s'",
+                                  generator)
+                        log.error("        ****  %s", e)
+                        weeutil.logger.log_traceback(log.error, "        ****  ")
+                        log.error("        ****  Generator terminated")
+                        traceback.print_exc()
+                        continue
+
+                    finally:
+                        obj.finalize()
+
+            else:
+                log.debug("No generators specified for report '%s'", report)
+
+    @staticmethod
+    def wait_for_workers(futures):
+        """Wait for the reports given to the worker processes to finish.
+
+        Args:
+            futures(list[tuple[str, concurrent.futures.Future]]): The name of each report, and
+                the future of its run. The list is emptied.
+        """
+        for report, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                log.error("Report '%s' failed in its worker process: %s", report, e)
+        del futures[:]
+
+
+# The engine holding the xtype services of a worker process
+_worker_services = None
+
+
+def init_worker(config_dict, log_process_name=None):
+    """Set up a worker process, the way weewxd sets itself up: logging, the user extensions, and
+    the services that extend the xtypes system. A worker does not inherit any of these from the
+    process that started it.
+
+    Args:
+        config_dict(dict): The configuration dictionary.
+        log_process_name(str|None): The process name to log under. If None, logging is not set
+            up.
+    """
+    global _worker_services
+    if log_process_name:
+        weeutil.logger.setup(log_process_name, config_dict)
+    else:
+        weewx.debug = to_int(config_dict.get('debug', 0))
+    weeutil.startup.initialize(config_dict)
+    if 'Engine' in config_dict:
+        # Load only the xtype services. Nothing is read from a station, archived, or uploaded.
+        engine_dict = weeutil.config.deep_copy(config_dict)
+        services = engine_dict['Engine']['Services']
+        for group in weewx.all_service_groups:
+            if group != 'xtype_services':
+                services[group] = ''
+        _worker_services = weewx.engine.DummyEngine(engine_dict)
+
+
+# The report engine of a worker process of StdReportEngine.run(), and the aggregate cache shared
+# by the reports it runs
+_worker_engine = None
+_worker_cache = None
+
+
+def _init_report_worker(config_dict, stn_info, record, gen_ts, first_run, log_process_name):
+    global _worker_engine, _worker_cache
+    init_worker(config_dict, log_process_name)
+    _worker_engine = StdReportEngine(config_dict, stn_info, record, gen_ts, first_run)
+    _worker_cache = weewx.tags.AggregateCache()
+
+
+def _run_report_in_worker(report, skin_dict):
+    """Run a report in a worker process."""
+    _worker_engine.run_generators(report, skin_dict, _worker_cache)
+    log.debug("Aggregate cache of the worker after report '%s': %d hits, %d misses", report,
+              _worker_cache.hits, _worker_cache.misses)
+
+
+def wait_for_reports(skin_dict):
+    """Should a report wait for all earlier reports to finish before starting?
+
+    This is the case if the report sets option 'wait_for_reports', or, if the option is not
+    set, if any of its generators sets the class attribute of the same name. Generators that
+    upload the results of other reports, such as FtpGenerator, do.
+    """
+    if 'wait_for_reports' in skin_dict:
+        return to_bool(skin_dict['wait_for_reports'])
+    generator_list = skin_dict.get('Generators', {}).get('generator_list')
+    for generator in weeutil.weeutil.option_as_list(generator_list) or []:
+        try:
+            generator_class = weeutil.weeutil.get_object(generator)
+        except Exception:
+            # The error will be logged when the report is run.
+            continue
+        if getattr(generator_class, 'wait_for_reports', False):
+            return True
+    return False
+
+
+# =============================================================================
+#                    Class SkinDictCache
+# =============================================================================
+
+class SkinDictCache:
+    """Cache of skin dictionaries.
+
+    Building a skin dictionary means copying the defaults, then parsing and merging the skin's
+    configuration file and localization files, then the report's options in the configuration
+    dictionary. The result is kept in memory, keyed by the name of the report. An entry is good
+    as long as the [StdReport] section of the configuration dictionary is unchanged, and the
+    modification time and size of the files it was built from do not change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.skin_dicts = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_skin_dict(self, config_dict, report):
+        """Get the skin dictionary for a report.
+
+        Args:
+            config_dict (dict): The configuration dictionary.
+            report (str): The name of the report.
+
+        Returns:
+            configobj.ConfigObj: A copy of the skin dictionary, which the caller may modify.
+
+        Raises:
+            configobj.SyntaxError: If a skin configuration or localization file contains a
+                syntax error.
+        """
+        config_key = (config_dict['WEEWX_ROOT'],
+                      config_dict.get('log_success'),
+                      config_dict.get('log_failure'))
+        with self.lock:
+            entry = self.skin_dicts.get(report)
+            if entry and entry[0] == config_key and entry[1] == config_dict['StdReport'] \
+                    and all(get_file_signature(path) == signature
+                            for path, signature in entry[2].items()):
+                self.hits += 1
+                return weeutil.config.deep_copy(entry[3])
+            self.misses += 1
+
+        # Take a copy of the section, so later changes to it can be detected.
+        std_report = weeutil.config.deep_copy(config_dict['StdReport'])
+        files = {}
+        skin_dict = _build_skin_dict(config_dict, report, files)
+        with self.lock:
+            self.skin_dicts[report] = (config_key, std_report, files, skin_dict)
+        return weeutil.config.deep_copy(skin_dict)
+
+
+def get_file_signature(path):
+    """Return the modification time and size of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+skin_dict_cache = SkinDictCache()
 
 
 def build_skin_dict(config_dict, report):
-    """Find and build the skin_dict for the given report"""
+    """Find and build the skin_dict for the given report.
+
+    The result is cached, so the files of the skin are only read again if they change. Each call
+    returns a new copy, which the caller may modify.
+    """
+    return skin_dict_cache.get_skin_dict(config_dict, report)
+
+
+def _build_skin_dict(config_dict, report, files):
+    """Build the skin_dict for the given report. The signature of each file that is read is
+    added to the dictionary 'files', keyed by its path."""
 
     #######################################################################
     # Start with the defaults in the defaults module. Because we will be modifying it, we need
@@ -298,6 +534,7 @@ def build_skin_dict(config_dict, report):
     # Retrieve the configuration dictionary for the skin. Wrap it in a try block in case we
     # fail.  It is ok if there is no file - everything for a skin might be defined in the weewx
     # configuration.
+    files[skin_config_path] = get_file_signature(skin_config_path)
     try:
         merge_dict = configobj.ConfigObj(skin_config_path,
                                          encoding='utf-8',
@@ -314,7 +551,7 @@ def build_skin_dict(config_dict, report):
         log.debug("Found configuration file %s for report '%s'", skin_config_path, report)
         # If a language is specified, honor it.
         if 'lang' in merge_dict:
-            merge_lang(merge_dict['lang'], config_dict, report, skin_dict)
+            merge_lang(merge_dict['lang'], config_dict, report, skin_dict, files)
         # If the file has a unit_system specified, honor it.
         if 'unit_system' in merge_dict:
             merge_unit_system(merge_dict['unit_system'], skin_dict)
@@ -325,10 +562,10 @@ def build_skin_dict(config_dict, report):
     # Merge in the [[Defaults]] section
     if 'Defaults' in config_dict['StdReport']:
         # Because we will be modifying the results, make a deep copy of the section.
-        merge_dict = weeutil.config.deep_copy(config_dict)['StdReport']['Defaults']
+        merge_dict = weeutil.config.deep_copy(config_dict['StdReport']['Defaults'])
         # If a language is specified, honor it
         if 'lang' in merge_dict:
-            merge_lang(merge_dict['lang'], config_dict, report, skin_dict)
+            merge_lang(merge_dict['lang'], config_dict, report, skin_dict, files)
         # If a unit_system is specified, honor it
         if 'unit_system' in merge_dict:
             merge_unit_system(merge_dict['unit_system'], skin_dict)
@@ -341,10 +578,10 @@ def build_skin_dict(config_dict, report):
     # Finally the report-specific section.
     if report in config_dict['StdReport']:
         # Because we will be modifying the results, make a deep copy of the section.
-        merge_dict = weeutil.config.deep_copy(config_dict)['StdReport'][report]
+        merge_dict = weeutil.config.deep_copy(config_dict['StdReport'][report])
         # If a language is specified, honor it
         if 'lang' in merge_dict:
-            merge_lang(merge_dict['lang'], config_dict, report, skin_dict)
+            merge_lang(merge_dict['lang'], config_dict, report, skin_dict, files)
         # If a unit_system is specified, honor it
         if 'unit_system' in merge_dict:
             merge_unit_system(merge_dict['unit_system'], skin_dict)
@@ -370,7 +607,7 @@ def merge_unit_system(report_units_base, skin_dict):
     skin_dict['Units']['Groups'].update(units_dict)
 
 
-def get_lang_dict(lang_spec, config_dict, report):
+def get_lang_dict(lang_spec, config_dict, report, files=None):
     """Given a language specification, return its corresponding locale dictionary.
 
     Args:
@@ -378,6 +615,8 @@ def get_lang_dict(lang_spec, config_dict, report):
             Can be of the form 'en', 'en_AU', or 'en_AU.utf8.
         config_dict (dict): Configuration dictionary.
         report (str): The name of the report for which the locale dicationary will be returned.
+        files (dict|None): If given, the signature of each file that is read is added to it,
+            keyed by its path.
     Returns:
         dict: The locale dictionary as a ConfigObj
     Raises:
@@ -413,6 +652,8 @@ def get_lang_dict(lang_spec, config_dict, report):
         # Retrieve the language dictionary for the skin and requested language. Wrap it in a
         # try block in case we fail.  It is ok if there is no file - everything for a skin
         # might be defined in the weewx configuration.
+        if files is not None:
+            files[lang_config_path] = get_file_signature(lang_config_path)
         try:
             merge_dict = configobj.ConfigObj(lang_config_path,
                                              encoding='utf-8',
@@ -436,8 +677,8 @@ def get_lang_dict(lang_spec, config_dict, report):
     return lang_dict
 
 
-def merge_lang(lang_spec, config_dict, report, skin_dict):
-    lang_dict = get_lang_dict(lang_spec, config_dict, report)
+def merge_lang(lang_spec, config_dict, report, skin_dict, files=None):
+    lang_dict = get_lang_dict(lang_spec, config_dict, report, files)
     # There may or may not be a unit system specified. If so, honor it.
     if 'unit_system' in lang_dict:
         merge_unit_system(lang_dict['unit_system'], skin_dict)
@@ -452,6 +693,10 @@ def merge_lang(lang_spec, config_dict, report, skin_dict):
 class ReportGenerator:
     """Base class for all report generators."""
 
+    # Set to True if the generator uses the results of other reports. When reports are run
+    # in parallel, a report with such a generator waits for all earlier reports to finish.
+    wait_for_reports = False
+
     def __init__(self, config_dict, skin_dict, gen_ts, first_run, stn_info, record=None):
         self.config_dict = config_dict
         self.skin_dict = skin_dict
@@ -459,7 +704,10 @@ class ReportGenerator:
         self.first_run = first_run
         self.stn_info = stn_info
         self.record = record
-        self.db_binder = weewx.manager.DBBinder(self.config_dict)
+        # Reports only read the database. The writer is StdArchive.
+        self.db_binder = weewx.manager.DBBinder(self.config_dict, reader=True)
+        # Set by the report engine to an instance of weewx.tags.AggregateCache
+        self.aggregate_cache = None
 
     def start(self):
         self.run()
@@ -480,6 +728,8 @@ class FtpGenerator(ReportGenerator):
 
     This will ftp everything in the public_html subdirectory to a webserver."""
 
+    wait_for_reports = True
+
     def run(self):
         import weeutil.ftpupload
 
@@ -507,7 +757,8 @@ class FtpGenerator(ReportGenerator):
                 secure_data=to_bool(self.skin_dict.get('secure_data', True)),
                 reuse_ssl=to_bool(self.skin_dict.get('reuse_ssl', False)),
                 encoding=self.skin_dict.get('ftp_encoding', 'utf-8'),
-                ciphers=self.skin_dict.get('ciphers')
+                ciphers=self.skin_dict.get('ciphers'),
+                workers=to_int(self.skin_dict.get('ftp_workers', 1))
             )
         except KeyError:
             log.debug("ftpgenerator: FTP upload not requested. Skipped.")
@@ -523,7 +774,11 @@ class FtpGenerator(ReportGenerator):
             else:
                 if log_success:
                     t2 = time.time()
-                    log.info("ftpgenerator: Ftp'd %d files in %0.2f seconds", n, (t2 - t1))
+                    log.info("ftpgenerator: Ftp'd %d files (%d kB, %0.1f kB/s) in %0.2f seconds",
+                             n, ftp_data.n_bytes // 1024,
+                             ftp_data.n_bytes / 1024.0 / max(t2 - t1, 0.001), (t2 - t1))
+                    log.debug("ftpgenerator: Skipped %d unchanged files; hashed %d files",
+                              ftp_data.n_skipped, ftp_data.n_hashed)
                 break
         else:
             # The loop completed normally, meaning the upload failed.
@@ -540,6 +795,8 @@ class RsyncGenerator(ReportGenerator):
 
     This will rsync everything in the public_html subdirectory to a server."""
 
+    wait_for_reports = True
+
     def run(self):
         import weeutil.rsyncupload
         log_success = to_bool(weeutil.config.search_up(self.skin_dict, 'log_success', True))
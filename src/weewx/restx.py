@@ -48,9 +48,9 @@ should only have to implement a few functions. In particular,
 
  - post_request(self, request, data). This function takes an urllib.request.Request object
    and is responsible for performing the HTTP GET or POST. The default version
-   simply uses urllib.request.urlopen(request) and returns the result. If the
-   post could raise an unusual exception, override this function and catch the
-   exception. See the WOWThread implementation for an example.
+   simply uses urlopen(request) and returns the result. If the post could raise
+   an unusual exception, override this function and catch the exception. See
+   the WOWThread implementation for an example.
    
  - check_response(self, response). After an HTTP request gets posted, the
    webserver sends back a "response." This response may contain clues
@@ -58,7 +58,9 @@ should only have to implement a few functions. In particular,
    actual posting of data might fail, with the reason indicated in the
    response.  The uploader can then take appropriate action, such as raising
    a FailedPost exception, which results in logging the failure but not
-   retrying the post.  See the StationRegistry uploader as an example.
+   retrying the post.  See the StationRegistry uploader as an example. If the
+   post might succeed if tried again later, raise a PostDeferred exception
+   instead. If the uploader uses a spool, the record will be kept and retried.
    
    
 In some cases, you might also have to implement the following:
@@ -85,12 +87,16 @@ of various RESTful services.
 
 import datetime
 import http.client
+import io
+import json
 import logging
+import os
 import platform
 import queue
 import random
 import re
 import socket
+import sqlite3
 import ssl
 import sys
 import threading
@@ -98,6 +104,7 @@ import time
 import urllib.error
 import urllib.parse
 import urllib.request
+import urllib.response
 
 import weedb
 import weeutil.logger
@@ -115,6 +122,11 @@ class FailedPost(Exception):
     """Raised when a post fails, and is unlikely to succeed if retried."""
 
 
+class PostDeferred(FailedPost):
+    """Raised when a post fails, but might succeed if tried again later, for example, because
+    the server could not be reached."""
+
+
 class AbortedPost(Exception):
     """Raised when a post is aborted by the client."""
 
@@ -187,7 +199,12 @@ class RESTThread(threading.Thread):
                  retry_ssl=3600,
                  softwaretype="weewx-%s" % weewx.__version__,
                  skip_upload=False,
-                 delay_post=None):
+                 delay_post=None,
+                 keep_alive=False,
+                 spool_file=None,
+                 spool_max=10000,
+                 spool_retry=300,
+                 catchup_wait=1):
         """Initializer for the class RESTThread
 
         Args:
@@ -225,6 +242,16 @@ class RESTThread(threading.Thread):
             interfere with the downstream data service.  Default is False.
           delay_post (float|None): How long to sleep before actually doing the post. Default
             is None (no delay).
+          keep_alive (bool): If True, keep the HTTP connection to the server open after a post,
+            so it can be reused by the next post. Default is False.
+          spool_file (str|None): Path to an SQLite database where records are kept until they
+            have been posted, so they survive an outage or a restart. Default is None (no spool).
+          spool_max (int): How many records the spool may hold before the oldest are discarded.
+            Default is 10000.
+          spool_retry (float): With a spool, how long to wait before trying again after a post
+            fails. Default is 300 seconds.
+          catchup_wait (float): With a spool, how long to wait between posts while working off
+            a backlog. Default is 1 second.
           """
         # Initialize my superclass:
         threading.Thread.__init__(self, name=protocol_name)
@@ -248,6 +275,11 @@ class RESTThread(threading.Thread):
         self.lastpost = 0
         self.skip_upload = to_bool(skip_upload)
         self.delay_post = to_float(delay_post)
+        self.keep_alive = to_bool(keep_alive)
+        self.spool_file = spool_file
+        self.spool_max = to_int(spool_max)
+        self.spool_retry = to_float(spool_retry)
+        self.catchup_wait = to_float(catchup_wait)
 
     def get_record(self, record, dbmanager):
         """Augment record data with additional data from the archive.
@@ -353,7 +385,7 @@ class RESTThread(threading.Thread):
         # Open up the archive. Use a 'with' statement. This will automatically
         # close the archive in the case of an exception:
         if self.manager_dict is not None:
-            with weewx.manager.open_manager(self.manager_dict) as _manager:
+            with weewx.manager.open_manager(self.manager_dict, reader=True) as _manager:
                 self.run_loop(_manager)
         else:
             self.run_loop()
@@ -363,6 +395,10 @@ class RESTThread(threading.Thread):
         then processing them.
         """
 
+        if self.spool_file:
+            self.run_spool_loop(dbmanager)
+            return
+
         while True:
             while True:
                 # This will block until something appears in the queue:
@@ -375,50 +411,122 @@ class RESTThread(threading.Thread):
                 if self.queue.qsize() <= self.max_backlog:
                     break
 
-            if self.skip_this_post(_record['dateTime']):
-                continue
+            self.post_record(_record, dbmanager)
 
-            try:
-                # Process the record, using whatever method the specializing
-                # class provides
-                self.process_record(_record, dbmanager)
-            except AbortedPost as e:
-                if self.log_success:
-                    _time_str = timestamp_to_string(_record['dateTime'])
-                    log.info("%s: Skipped record %s: %s", self.protocol_name, _time_str, e)
-            except BadLogin:
-                if self.retry_login:
-                    log.error("%s: Bad login; waiting %s minutes then retrying",
-                              self.protocol_name, self.retry_login / 60.0)
-                    time.sleep(self.retry_login)
-                else:
-                    log.error("%s: Bad login; no retry specified. Terminating", self.protocol_name)
-                    raise
-            except FailedPost as e:
-                if self.log_failure:
-                    _time_str = timestamp_to_string(_record['dateTime'])
-                    log.error("%s: Failed to publish record %s: %s"
-                              % (self.protocol_name, _time_str, e))
-            except ssl.SSLError as e:
-                if self.retry_ssl:
-                    log.error("%s: SSL error (%s); waiting %s minutes then retrying",
-                              self.protocol_name, e, self.retry_ssl / 60.0)
-                    time.sleep(self.retry_ssl)
+    def run_spool_loop(self, dbmanager=None):
+        """Like run_loop(), except that records are first saved in the spool, and are removed
+        from it only after they have been dealt with. If a post fails because the server could
+        not be reached, the record stays in the spool and is tried again after spool_retry
+        seconds. A backlog is worked off at no more than one post every catchup_wait seconds.
+        """
+
+        with Spool(self.spool_file, self.protocol_name, self.spool_max) as spool:
+            if len(spool):
+                log.info("%s: %d records in spool, lagging by %d seconds",
+                         self.protocol_name, len(spool), spool.lag())
+            next_post = 0
+            posted = 0
+            while True:
+                # Move everything that has arrived into the spool. Block only if there is
+                # nothing to post.
+                timeout = max(next_post - time.time(), 0) if len(spool) else None
+                try:
+                    _record = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    pass
                 else:
-                    log.error("%s: SSL error (%s); no retry specified. Terminating",
-                              self.protocol_name, e)
-                    raise
-            except Exception as e:
-                # Some unknown exception occurred. This is probably a serious
-                # problem. Exit.
-                log.error("%s: Unexpected exception of type %s", self.protocol_name, type(e))
-                weeutil.logger.log_traceback(log.error, '*** ')
-                log.critical("%s: Thread terminating. Reason: %s", self.protocol_name, e)
+                    # A None record is our signal to exit:
+                    if _record is None:
+                        return
+                    spool.append(_record)
+                    continue
+
+                _id, _record = spool.oldest()
+                try:
+                    did_post = self.post_record(_record, dbmanager, defer=True)
+                except PostDeferred as e:
+                    if self.log_failure:
+                        log.error("%s: Failed to publish record %s: %s. %d records in spool, "
+                                  "lagging by %d seconds. Retrying in %d seconds",
+                                  self.protocol_name, timestamp_to_string(_record['dateTime']),
+                                  e, len(spool), spool.lag(), self.spool_retry)
+                    next_post = time.time() + self.spool_retry
+                    continue
+
+                spool.remove(_id)
+                if did_post:
+                    posted += 1
+                    next_post = time.time() + self.catchup_wait
+                if not len(spool):
+                    if posted > 1:
+                        log.info("%s: Caught up. Published %d records from spool",
+                                 self.protocol_name, posted)
+                    posted = 0
+                    next_post = 0
+
+    def post_record(self, record, dbmanager, defer=False):
+        """Post a single record, and log the outcome.
+
+        Args:
+            record (dict): The record to be posted.
+            dbmanager (weewx.manager.Manager|None): Database manager used to augment the record.
+            defer (bool): If True, a PostDeferred exception is raised to the caller, instead of
+                being logged.
+
+        Returns:
+            bool: False if the post was skipped because of its timestamp, True otherwise.
+        """
+
+        _lastpost = self.lastpost
+        if self.skip_this_post(record['dateTime']):
+            return False
+
+        try:
+            # Process the record, using whatever method the specializing
+            # class provides
+            self.process_record(record, dbmanager)
+        except AbortedPost as e:
+            if self.log_success:
+                _time_str = timestamp_to_string(record['dateTime'])
+                log.info("%s: Skipped record %s: %s", self.protocol_name, _time_str, e)
+        except BadLogin:
+            if self.retry_login:
+                log.error("%s: Bad login; waiting %s minutes then retrying",
+                          self.protocol_name, self.retry_login / 60.0)
+                time.sleep(self.retry_login)
+            else:
+                log.error("%s: Bad login; no retry specified. Terminating", self.protocol_name)
+                raise
+        except FailedPost as e:
+            if defer and isinstance(e, PostDeferred):
+                # The record will be tried again, so it must not count as posted
+                self.lastpost = _lastpost
                 raise
+            if self.log_failure:
+                _time_str = timestamp_to_string(record['dateTime'])
+                log.error("%s: Failed to publish record %s: %s"
+                          % (self.protocol_name, _time_str, e))
+        except ssl.SSLError as e:
+            if self.retry_ssl:
+                log.error("%s: SSL error (%s); waiting %s minutes then retrying",
+                          self.protocol_name, e, self.retry_ssl / 60.0)
+                time.sleep(self.retry_ssl)
             else:
-                if self.log_success:
-                    _time_str = timestamp_to_string(_record['dateTime'])
-                    log.info("%s: Published record %s" % (self.protocol_name, _time_str))
+                log.error("%s: SSL error (%s); no retry specified. Terminating",
+                          self.protocol_name, e)
+                raise
+        except Exception as e:
+            # Some unknown exception occurred. This is probably a serious
+            # problem. Exit.
+            log.error("%s: Unexpected exception of type %s", self.protocol_name, type(e))
+            weeutil.logger.log_traceback(log.error, '*** ')
+            log.critical("%s: Thread terminating. Reason: %s", self.protocol_name, e)
+            raise
+        else:
+            if self.log_success:
+                _time_str = timestamp_to_string(record['dateTime'])
+                log.info("%s: Published record %s" % (self.protocol_name, _time_str))
+        return True
 
     def process_record(self, record, dbmanager):
         """Default version of process_record.
@@ -505,7 +613,7 @@ class RESTThread(threading.Thread):
             # This is executed only if the loop terminates normally, meaning
             # the upload failed max_tries times. Raise an exception. Caller
             # can decide what to do with it.
-            raise FailedPost("Failed upload after %d tries" % self.max_tries)
+            raise PostDeferred("Failed upload after %d tries" % self.max_tries)
 
     def check_this_record(self, record):
         """Raises exception AbortedPost if the record should not be posted.
@@ -528,7 +636,7 @@ class RESTThread(threading.Thread):
         # If it's a 429 error ("TOO MANY REQUESTS") don't bother retrying.
         if getattr(e, 'code', None) == 429:
             log.debug("%s: Posting too frequently: %s" % (self.protocol_name, e))
-            raise FailedPost(str(e))
+            raise PostDeferred(str(e))
         else:
             # Otherwise, log it and move on.
             log.debug("%s: Failed upload attempt %d: %s" % (self.protocol_name, count, e))
@@ -550,9 +658,15 @@ class RESTThread(threading.Thread):
             data = data.encode('utf-8')
         if weewx.debug >= 2:
             log.debug("%s url: '%s'", self.protocol_name, request.get_full_url())
-        _response = urllib.request.urlopen(request, data=data, timeout=self.timeout)
+        _response = self.urlopen(request, data=data)
         return _response
 
+    def urlopen(self, request, data=None):
+        """Open a request object, using a connection that is kept open, if so requested."""
+        if self.keep_alive:
+            return get_keepalive_opener().open(request, data=data, timeout=self.timeout)
+        return urllib.request.urlopen(request, data=data, timeout=self.timeout)
+
     def skip_this_post(self, time_ts):
         """Check whether the post is current"""
         # Don't post if this record is too old
@@ -658,6 +772,11 @@ class StdWunderground(StdRESTful):
             _ambient_dict.setdefault('max_backlog', 0)
             _ambient_dict.setdefault('max_tries', 1)
             _ambient_dict.setdefault('rtfreq', 2.5)
+            # Posts are frequent enough that it pays to keep the connection open
+            _ambient_dict.setdefault('keep_alive', True)
+            # Rapidfire posts are soon out of date, so they are never spooled
+            for option in ('spool_file', 'spool_max', 'spool_retry', 'catchup_wait'):
+                _ambient_dict.pop(option, None)
             self.cached_values = CachedValues()
             self.loop_queue = queue.Queue()
             self.loop_thread = AmbientLoopThread(
@@ -793,7 +912,12 @@ class AmbientThread(RESTThread):
                  retry_ssl=3600,
                  softwaretype="weewx-%s" % weewx.__version__,
                  skip_upload=False,
-                 force_direction=False):
+                 force_direction=False,
+                 keep_alive=False,
+                 spool_file=None,
+                 spool_max=10000,
+                 spool_retry=300,
+                 catchup_wait=1):
 
         """
         Initializer for the AmbientThread class.
@@ -822,7 +946,12 @@ class AmbientThread(RESTThread):
                          retry_login=retry_login,
                          retry_ssl=retry_ssl,
                          softwaretype=softwaretype,
-                         skip_upload=skip_upload)
+                         skip_upload=skip_upload,
+                         keep_alive=keep_alive,
+                         spool_file=spool_file,
+                         spool_max=spool_max,
+                         spool_retry=spool_retry,
+                         catchup_wait=catchup_wait)
         self.station = station
         self.password = password
         self.server_url = server_url
@@ -961,6 +1090,11 @@ class AmbientLoopThread(AmbientThread):
                  softwaretype="weewx-%s" % weewx.__version__,
                  skip_upload=False,
                  force_direction=False,
+                 keep_alive=False,
+                 spool_file=None,
+                 spool_max=10000,
+                 spool_retry=300,
+                 catchup_wait=1,
                  rtfreq=2.5  # This is the only one added by AmbientLoopThread
                  ):
         """
@@ -991,7 +1125,12 @@ class AmbientLoopThread(AmbientThread):
                          retry_ssl=retry_ssl,
                          softwaretype=softwaretype,
                          skip_upload=skip_upload,
-                         force_direction=force_direction)
+                         force_direction=force_direction,
+                         keep_alive=keep_alive,
+                         spool_file=spool_file,
+                         spool_max=spool_max,
+                         spool_retry=spool_retry,
+                         catchup_wait=catchup_wait)
 
         self.rtfreq = float(rtfreq)
         self.formats.update(AmbientLoopThread.WUONLY_FORMATS)
@@ -1070,7 +1209,7 @@ class WOWThread(AmbientThread):
         """Version of post_request() for the WOW protocol, which
         uses a response error code to signal a bad login."""
         try:
-            _response = urllib.request.urlopen(request, timeout=self.timeout)
+            _response = self.urlopen(request)
         except urllib.error.HTTPError as e:
             # WOW signals a bad login with an HTML Error 403 code:
             if e.code == 403:
@@ -1736,7 +1875,8 @@ class AWEKASThread(RESTThread):
                  post_interval=300, max_backlog=sys.maxsize, stale=None,
                  log_success=True, log_failure=True,
                  timeout=10, max_tries=3, retry_wait=5,
-                 retry_login=3600, retry_ssl=3600, skip_upload=False):
+                 retry_login=3600, retry_ssl=3600, skip_upload=False, keep_alive=False,
+                 spool_file=None, spool_max=10000, spool_retry=300, catchup_wait=1):
         """Initialize an instances of AWEKASThread.
 
         Parameters specific to this class:
@@ -1781,7 +1921,12 @@ class AWEKASThread(RESTThread):
                          retry_wait=retry_wait,
                          retry_login=retry_login,
                          retry_ssl=retry_ssl,
-                         skip_upload=skip_upload)
+                         skip_upload=skip_upload,
+                         keep_alive=keep_alive,
+                         spool_file=spool_file,
+                         spool_max=spool_max,
+                         spool_retry=spool_retry,
+                         catchup_wait=catchup_wait)
         self.username = username
         # Calculate and save the password hash
         m = hashlib.md5()
@@ -1892,6 +2037,208 @@ class AWEKASThread(RESTThread):
                 raise FailedPost("Server returned '%s'" % line)
 
 
+# ==============================================================================
+#                    Keep-alive connections
+# ==============================================================================
+
+class ConnectionPool:
+    """A thread-safe pool of idle HTTP connections, kept open so they can be reused."""
+
+    # How long to keep an idle connection, in seconds. Servers usually close them after a while.
+    max_idle = 30
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Key is the host. Value is a list of tuples (connection, time it became idle).
+        self.idle = {}
+
+    def get(self, host):
+        """Return an idle connection to a host, or None if there is none."""
+        now = time.time()
+        with self.lock:
+            connections = self.idle.get(host, [])
+            while connections:
+                conn, idle_since = connections.pop()
+                if now - idle_since < self.max_idle:
+                    return conn
+                conn.close()
+        return None
+
+    def put(self, host, conn):
+        """Return a connection to the pool, so it can be reused."""
+        with self.lock:
+            self.idle.setdefault(host, []).append((conn, time.time()))
+
+    def close_all(self):
+        """Close all idle connections."""
+        with self.lock:
+            for connections in self.idle.values():
+                for conn, _ in connections:
+                    conn.close()
+            self.idle.clear()
+
+
+class KeepAliveMixin:
+    """Mixin for urllib handlers that reuse connections, instead of opening a new connection,
+    with a new TLS handshake, for every request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ConnectionPool()
+
+    def keepalive_open(self, http_class, req, **http_conn_args):
+        if req._tunnel_host:
+            # Do not try to reuse connections tunneled through a proxy
+            return self.do_open(http_class, req, **http_conn_args)
+
+        host = req.host
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+
+        conn = self.pool.get(host)
+        try:
+            if conn is not None:
+                conn.timeout = req.timeout
+                if conn.sock:
+                    conn.sock.settimeout(req.timeout)
+                try:
+                    response, body = KeepAliveMixin._request(conn, req, headers)
+                except ConnectionError:
+                    # The server closed the connection while it was idle. Try again, using a
+                    # new connection.
+                    conn.close()
+                    conn = None
+            if conn is None:
+                conn = http_class(host, timeout=req.timeout, **http_conn_args)
+                response, body = KeepAliveMixin._request(conn, req, headers)
+        except OSError as e:
+            conn.close()
+            raise urllib.error.URLError(e)
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.put(host, conn)
+
+        # The body has already been read, so return something that looks like what urlopen()
+        # returns, but that does not depend on the connection.
+        result = urllib.response.addinfourl(io.BytesIO(body), response.msg, req.get_full_url(),
+                                            response.status)
+        result.msg = response.reason
+        return result
+
+    @staticmethod
+    def _request(conn, req, headers):
+        conn.request(req.get_method(), req.selector, req.data, headers,
+                     encode_chunked=req.has_header('Transfer-encoding'))
+        response = conn.getresponse()
+        # Read the whole body, so the connection can be used again.
+        return response, response.read()
+
+
+class KeepAliveHTTPHandler(KeepAliveMixin, urllib.request.HTTPHandler):
+    def http_open(self, req):
+        return self.keepalive_open(http.client.HTTPConnection, req)
+
+
+class KeepAliveHTTPSHandler(KeepAliveMixin, urllib.request.HTTPSHandler):
+    def https_open(self, req):
+        return self.keepalive_open(http.client.HTTPSConnection, req, context=self._context)
+
+
+_keepalive_opener = None
+_keepalive_lock = threading.Lock()
+
+
+def get_keepalive_opener():
+    """Return an urllib opener that keeps connections open. It is shared by all threads, so
+    uploaders that post to the same host share connections."""
+    global _keepalive_opener
+    with _keepalive_lock:
+        if _keepalive_opener is None:
+            _keepalive_opener = urllib.request.build_opener(KeepAliveHTTPHandler(),
+                                                            KeepAliveHTTPSHandler())
+        return _keepalive_opener
+
+
+# ==============================================================================
+#                    Spool
+# ==============================================================================
+
+class Spool:
+    """Records waiting to be posted, kept in an SQLite database, so they survive an outage or
+    a restart. Several uploaders can share the same database, each under its own name.
+
+    An SQLite connection can only be used by the thread that created it, so a spool should be
+    opened by the thread that uses it."""
+
+    def __init__(self, path, name, max_records=10000):
+        self.name = name
+        self.max_records = max_records
+        _dir = os.path.dirname(path)
+        if _dir:
+            os.makedirs(_dir, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS spool "
+                                    "(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                                    "dateTime INTEGER NOT NULL, record TEXT NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS spool_name ON spool (name, id)")
+        self.count = self.connection.execute("SELECT COUNT(*) FROM spool WHERE name=?",
+                                             (name,)).fetchone()[0]
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        """Add a record at the end of the spool. If the spool is full, the oldest records are
+        discarded."""
+        with self.connection:
+            self.connection.execute("INSERT INTO spool (name, dateTime, record) VALUES (?, ?, ?)",
+                                    (self.name, record['dateTime'], json.dumps(record)))
+            self.count += 1
+            excess = self.count - self.max_records
+            if excess > 0:
+                self.connection.execute("DELETE FROM spool WHERE id IN (SELECT id FROM spool "
+                                        "WHERE name=? ORDER BY id LIMIT ?)", (self.name, excess))
+                self.count -= excess
+                log.error("%s: Spool full; discarded %d oldest records", self.name, excess)
+
+    def oldest(self):
+        """Return a tuple (id, record) with the oldest record in the spool, or None if the spool
+        is empty."""
+        row = self.connection.execute("SELECT id, record FROM spool WHERE name=? "
+                                      "ORDER BY id LIMIT 1", (self.name,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def remove(self, record_id):
+        """Remove a record from the spool."""
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM spool WHERE id=?", (record_id,))
+            self.count -= cursor.rowcount
+
+    def lag(self):
+        """Return how old, in seconds, the oldest record in the spool is. Zero if it is empty."""
+        row = self.connection.execute("SELECT MIN(dateTime) FROM spool WHERE name=?",
+                                      (self.name,)).fetchone()
+        return time.time() - row[0] if row[0] is not None else 0
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etyp, einst, etb):
+        self.close()
+
+
 ###############################################################################
 
 def get_site_dict(config_dict, service, *args):
@@ -1931,6 +2278,11 @@ def get_site_dict(config_dict, service, *args):
     site_dict.setdefault('log_success', to_bool(config_dict.get('log_success', True)))
     site_dict.setdefault('log_failure', to_bool(config_dict.get('log_failure', True)))
 
+    # A relative path to a spool is relative to WEEWX_ROOT
+    if site_dict.get('spool_file'):
+        site_dict['spool_file'] = os.path.join(config_dict.get('WEEWX_ROOT', ''),
+                                               site_dict['spool_file'])
+
     # Get rid of the no longer needed key 'enable':
     site_dict.pop('enable', None)
 
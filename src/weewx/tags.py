@@ -5,6 +5,8 @@
 #
 """Classes for implementing the weewx tag 'code' codes."""
 
+import threading
+
 import weeutil.weeutil
 import weewx.units
 import weewx.xtypes
@@ -240,8 +242,14 @@ class TimespanBinder:
     # Static method used to implement the iteration:
     @staticmethod
     def _seqGenerator(genSpanFunc, timespan, *args, **option_dict):
-        """Generator function that returns TimespanBinder for the appropriate timespans"""
-        for span in genSpanFunc(timespan.start, timespan.stop):
+        """Generator function that returns TimespanBinder for the appropriate timespans.
+
+        The binders share a prefetch. An aggregate that can be calculated from the daily
+        summaries, such as $day.outTemp.max inside a loop over $month.days, is then calculated
+        for all the days with one query the first time it is asked for."""
+        spans = list(genSpanFunc(timespan.start, timespan.stop))
+        option_dict['prefetch'] = weewx.xtypes.SpanPrefetch(spans)
+        for span in spans:
             yield TimespanBinder(span, *args, **option_dict)
 
     # Return the start time of the time period as a ValueHelper
@@ -488,12 +496,19 @@ class AggTypeBinder:
         except weewx.UnknownBinding:
             # Don't recognize the binding.
             raise AttributeError(self.data_binding)
+        # If an aggregate cache has been supplied, use it. It is not an option for the
+        # xtypes system, so take it out of the options.
+        option_dict = dict(self.option_dict)
+        aggregate_cache = option_dict.pop('aggregate_cache', None)
+        if aggregate_cache is not None:
+            get_aggregate = aggregate_cache.get_aggregate
+        else:
+            get_aggregate = weewx.xtypes.get_aggregate
         try:
             # If we cannot perform the aggregation, we will get an UnknownType or
             # UnknownAggregation error. Be prepared to catch it.
-            result = weewx.xtypes.get_aggregate(self.obs_type, self.timespan,
-                                                self.aggregate_type,
-                                                db_manager, **self.option_dict)
+            result = get_aggregate(self.obs_type, self.timespan, self.aggregate_type,
+                                   db_manager, **option_dict)
         except (weewx.UnknownType, weewx.UnknownAggregation):
             # Signal Cheetah that we don't know how to do this by raising an AttributeError.
             raise AttributeError(self.obs_type)
@@ -510,6 +525,88 @@ class AggTypeBinder:
         return getattr(vh, attr)
 
 
+# ===============================================================================
+#                             Class AggregateCache
+# ===============================================================================
+
+class AggregateCache:
+    """Memoizes the aggregates calculated by the tag system.
+
+    A single instance is shared by all the generators of all the reports in one run of the report
+    engine. An aggregate such as $day.outTemp.max is then calculated only once, no matter how many
+    templates use it.
+
+    Results are keyed by database, table, observation type, timespan, aggregation type, and
+    options. The skin dictionary is not part of the key, except for the section
+    [Units][[DegreeDays]], which is what the built-in xtypes use. If the last timestamp of a
+    database changes, everything cached for that database is forgotten.
+    """
+
+    # The parts of the skin dictionary that can affect the value of an aggregate
+    skin_keys = (('Units', 'DegreeDays'),)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = {}
+        self.last_timestamps = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_aggregate(self, obs_type, timespan, aggregate_type, db_manager, **option_dict):
+        """Same as weewx.xtypes.get_aggregate(), except the result may come from the cache."""
+        database = (db_manager.database_name, db_manager.table_name)
+        try:
+            key = (database, obs_type, tuple(timespan), aggregate_type,
+                   self._get_option_key(option_dict))
+            hash(key)
+        except TypeError:
+            # Some option cannot be part of a key. Do not use the cache.
+            return weewx.xtypes.get_aggregate(obs_type, timespan, aggregate_type, db_manager,
+                                              **option_dict)
+
+        with self.lock:
+            if self.last_timestamps.get(database) != db_manager.last_timestamp:
+                # The database has changed. Forget everything we know about it.
+                self.results = {k: v for k, v in self.results.items() if k[0] != database}
+                self.last_timestamps[database] = db_manager.last_timestamp
+            if key in self.results:
+                self.hits += 1
+                return self.results[key]
+            self.misses += 1
+
+        result = weewx.xtypes.get_aggregate(obs_type, timespan, aggregate_type, db_manager,
+                                            **option_dict)
+        with self.lock:
+            self.results[key] = result
+        return result
+
+    @staticmethod
+    def _get_option_key(option_dict):
+        """Convert the options into something that can be used as part of a key."""
+        options = dict(option_dict)
+        # A prefetch does not change the value of an aggregate, only how it is calculated.
+        options.pop('prefetch', None)
+        skin_dict = options.pop('skin_dict', None)
+        if skin_dict:
+            sections = []
+            for path in AggregateCache.skin_keys:
+                section = skin_dict
+                for name in path:
+                    section = section.get(name, {})
+                sections.append(section)
+            options['skin_dict'] = sections
+        return AggregateCache._freeze(options)
+
+    @staticmethod
+    def _freeze(obj):
+        """Convert dictionaries and lists into (hashable) tuples."""
+        if isinstance(obj, dict):
+            return tuple(sorted((k, AggregateCache._freeze(v)) for k, v in obj.items()))
+        if isinstance(obj, (list, tuple)):
+            return tuple(AggregateCache._freeze(v) for v in obj)
+        return obj
+
+
 # ===============================================================================
 #                             Class RecordBinder
 # ===============================================================================
@@ -171,6 +171,18 @@ class AccumTest(unittest.TestCase):
                 rain_sum += rec['rain']
         self.assertEqual(extracted['rain'], rain_sum)
 
+    def test_Accum_batch(self):
+        """Adding a collection of records should give the same results as adding them one by one"""
+        accum1 = weewx.accum.Accum(TimeSpan(start_ts, stop_ts))
+        for record in self.dataset:
+            accum1.addRecord(record)
+        accum2 = weewx.accum.Accum(TimeSpan(start_ts, stop_ts))
+        accum2.addRecord(self.dataset)
+        self.assertEqual(accum1.getRecord(), accum2.getRecord())
+        self.assertEqual(set(accum1), set(accum2))
+        for obs_type in accum1:
+            self.assertEqual(accum1[obs_type].getStatsTuple(), accum2[obs_type].getStatsTuple())
+
     def test_Accum_with_string(self):
         """Test records with string literals in them."""
         for i, record in enumerate(self.dataset):
@@ -163,6 +163,29 @@ class AlmanacTest(unittest.TestCase):
         # Try sun rise again, to make sure the horizon value cleared:
         self.assertAlmostEqual(atlanta.sun.previous_rising.raw, 1252235697, 0)
 
+    @unittest.skipIf(not pyephem_installed, "Skipping test_ephemeris_cache: no pyephem")
+    def test_ephemeris_cache(self):
+        ephemeris_cache.clear()
+        # A week of sunrises and sunsets, twice. The second time should come from the cache.
+        days = [self.almanac(almanac_time=self.ts_ue + i * 86400) for i in range(7)]
+        first = [(day.sun.rise.raw, day.sun.set.raw, day.sun.visible.raw) for day in days]
+        misses = ephemeris_cache.misses
+        second = [(day.sun.rise.raw, day.sun.set.raw, day.sun.visible.raw) for day in days]
+        self.assertEqual(first, second)
+        self.assertEqual(ephemeris_cache.misses, misses)
+
+        # The cache must distinguish the observers
+        self.assertEqual(str(self.almanac.sun.rise), "06:56:36")
+        self.assertNotEqual(str(self.almanac(horizon=-6).sun(use_center=1).rise), "06:56:36")
+        self.assertEqual(str(self.almanac(lat=47.0).sun.rise), "06:56:06")
+
+        # The moon phase should be reused within a lunation
+        self.assertEqual(self.almanac(almanac_time=self.ts_ue + 86400).moon_phase,
+                         'waxing crescent (increasing to full)')
+        misses = ephemeris_cache.misses
+        self.assertEqual(self.almanac.moon_phase, 'new (totally dark)')
+        self.assertEqual(ephemeris_cache.misses, misses)
+
     @unittest.skipIf(pyephem_installed, "Skipping test_exceptions: using pyephem version instead")
     def test_exceptions(self):
         # Try a nonsense tag
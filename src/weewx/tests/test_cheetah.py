@@ -7,6 +7,8 @@
 """Test functions in cheetahgenerator"""
 
 import logging
+import os
+import tempfile
 import unittest
 
 import weeutil.logger
@@ -99,5 +101,50 @@ class TestHelpers(unittest.TestCase):
         self.assertIsNone(weewx.cheetahgenerator.JSONHelpers.to_int(None))
 
 
+class TestTemplateCache(unittest.TestCase):
+    "Test the cache of compiled templates"
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.template = os.path.join(self.tmpdir.name, 'test.txt.tmpl')
+        self.write_template("Hello $name")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_template(self, text, mtime=None):
+        with open(self.template, 'w') as fd:
+            fd.write(text)
+        if mtime:
+            os.utime(self.template, (mtime, mtime))
+
+    def respond(self, template_class):
+        return template_class(searchList=[{'name': 'world'}],
+                              filter='AssureUnicode',
+                              filtersLib=weewx.cheetahgenerator).respond()
+
+    def test_memory(self):
+        cache = weewx.cheetahgenerator.TemplateCache()
+        template_class = cache.get_class(self.template)
+        self.assertEqual(self.respond(template_class), "Hello world")
+        # The second time, the same class should be returned
+        self.assertIs(cache.get_class(self.template), template_class)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # Change the template. It should get recompiled.
+        self.write_template("Goodbye $name", mtime=1000000000)
+        self.assertEqual(self.respond(cache.get_class(self.template)), "Goodbye world")
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_disk(self):
+        cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        cache = weewx.cheetahgenerator.TemplateCache()
+        self.assertEqual(self.respond(cache.get_class(self.template, cache_dir)), "Hello world")
+        self.assertEqual(len([f for f in os.listdir(cache_dir) if f.endswith('.py')]), 1)
+        # A new cache, as if after a restart, should use the saved code
+        cache = weewx.cheetahgenerator.TemplateCache()
+        self.assertEqual(self.respond(cache.get_class(self.template, cache_dir)), "Hello world")
+        self.assertEqual(len([f for f in os.listdir(cache_dir) if f.endswith('.py')]), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
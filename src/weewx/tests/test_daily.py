@@ -14,6 +14,7 @@ import shutil
 import sys
 import time
 import unittest
+from unittest import mock
 
 import configobj
 
@@ -198,6 +199,26 @@ class Common:
                                                   'sum', 'count', 'wsum', 'sumtime',
                                                   'last', 'lasttime')]))
 
+    def testRebuildParallel(self):
+        with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as manager:
+            start_d = datetime.date(2010, 3, 10)
+            stop_d = datetime.date(2010, 3, 20)
+            sql = "SELECT * FROM archive_day_outTemp WHERE dateTime >= ? AND dateTime <= ?"
+            span = (time.mktime(start_d.timetuple()), time.mktime(stop_d.timetuple()))
+            orig_rows = list(manager.genSql(sql, span))
+
+            # Rebuild those days, using several tranches and workers:
+            with mock.patch.object(weewx.manager.DaySummaryManager, '_gen_tranches_parallel',
+                                   side_effect=weewx.manager.DaySummaryManager
+                                   ._gen_tranches_parallel, autospec=True) as parallel:
+                nrecs, ndays = manager.backfill_day_summary(start_d=start_d, stop_d=stop_d,
+                                                            progress_fn=None, trans_days=2,
+                                                            workers=3)
+            parallel.assert_called_once()
+            self.assertEqual(ndays, 11)
+
+            self.assertEqual(list(manager.genSql(sql, span)), orig_rows)
+
     def testTags(self):
         """Test common tags."""
         global skin_dict
@@ -373,6 +394,78 @@ class Common:
         self.assertEqual(str(tagStats.year().heatdeg.sum), "5125.1°F-day")
         self.assertEqual(str(tagStats.year().cooldeg.sum), "1026.5°F-day")
 
+    def test_aggregate_cache(self):
+        db_binder = weewx.manager.DBBinder(self.config_dict)
+        db_lookup = db_binder.bind_default()
+        stop_ts = time.mktime((2010, 3, 16, 0, 0, 0, 0, 0, -1))
+        aggregate_cache = weewx.tags.AggregateCache()
+
+        tagStats = weewx.tags.TimeBinder(db_lookup, stop_ts,
+                                         formatter=default_formatter,
+                                         skin_dict=skin_dict,
+                                         aggregate_cache=aggregate_cache)
+        uncached = weewx.tags.TimeBinder(db_lookup, stop_ts,
+                                         formatter=default_formatter,
+                                         skin_dict=skin_dict)
+        for aggregate in ('min', 'max', 'avg', 'sum', 'count'):
+            self.assertEqual(str(getattr(tagStats.day().outTemp, aggregate)),
+                             str(getattr(uncached.day().outTemp, aggregate)))
+        self.assertEqual((aggregate_cache.hits, aggregate_cache.misses), (0, 5))
+
+        # Asking again should hit the cache, but different options should not.
+        self.assertEqual(str(tagStats.day().outTemp.max), str(uncached.day().outTemp.max))
+        tagStats.day().outTemp.max_ge((50, 'degree_F', 'group_temperature')).raw
+        self.assertEqual((aggregate_cache.hits, aggregate_cache.misses), (1, 6))
+
+        # A new record in the database should invalidate the cache
+        manager = db_lookup()
+        manager.last_timestamp += 300
+        self.assertEqual(str(tagStats.day().outTemp.max), str(uncached.day().outTemp.max))
+        self.assertEqual((aggregate_cache.hits, aggregate_cache.misses), (1, 7))
+
+
+    def test_prefetch(self):
+        """Aggregates of the days of a month, or the months of a year, are prefetched. They
+        should come out the same as when they are calculated one by one."""
+        db_binder = weewx.manager.DBBinder(self.config_dict)
+        db_lookup = db_binder.bind_default()
+        stop_ts = time.mktime((2010, 3, 16, 0, 0, 0, 0, 0, -1))
+        tagStats = weewx.tags.TimeBinder(db_lookup, stop_ts,
+                                         formatter=default_formatter,
+                                         skin_dict=skin_dict)
+        max_ge = (50, 'degree_F', 'group_temperature')
+
+        for period, children in ((tagStats.month(), 'days'), (tagStats.year(), 'months')):
+            prefetch = None
+            nspans = 0
+            for child in getattr(period, children)():
+                prefetch = child.option_dict['prefetch']
+                nspans += 1
+                alone = weewx.tags.TimespanBinder(child.timespan, db_lookup,
+                                                  context=child.context,
+                                                  formatter=default_formatter,
+                                                  skin_dict=skin_dict)
+                for obs_type, aggregate in (('outTemp', 'avg'), ('outTemp', 'max'),
+                                            ('outTemp', 'maxtime'), ('outTemp', 'meanmin'),
+                                            ('outTemp', 'mintime'), ('rain', 'sum'),
+                                            ('wind', 'vecdir'), ('wind', 'gustdir'),
+                                            ('barometer', 'not_null'), ('heatdeg', 'sum'),
+                                            ('outTemp', 'meanmax'), ('outTemp', 'minmax'),
+                                            ('outTemp', 'count'), ('wind', 'rms'),
+                                            ('wind', 'vecavg'), ('rain', 'maxsum')):
+                    self.assertEqual(str(getattr(getattr(child, obs_type), aggregate)),
+                                     str(getattr(getattr(alone, obs_type), aggregate)),
+                                     msg="%s.%s.%s" % (child.timespan, obs_type, aggregate))
+                self.assertEqual(child.outTemp.max_ge(max_ge).raw,
+                                 alone.outTemp.max_ge(max_ge).raw)
+                self.assertEqual(child.outTemp.avg_le(max_ge).raw,
+                                 alone.outTemp.avg_le(max_ge).raw)
+            # One query per aggregate, not one per aggregate per child. The degree days of days
+            # come from the prefetched averages. The degree days of months are prefetched by
+            # month.
+            self.assertEqual(prefetch.queries, 17)
+            self.assertGreater(nspans, 1)
+
 
 class TestSqlite(Common, unittest.TestCase):
 
@@ -5,9 +5,12 @@
 #
 """Test the accumulators by using the simulator wx station"""
 
+import json
 import logging
 import os.path
 import sys
+import tempfile
+import threading
 import time
 import unittest
 
@@ -85,6 +88,153 @@ class TestEngine(unittest.TestCase):
                     self.assertAlmostEqual(obs_avg[obs_type], record[obs_type], 2)
 
 
+class TestEventProfiler(unittest.TestCase):
+    """Test the profiler of event callbacks"""
+
+    class Service:
+        def __init__(self):
+            self.packets = 0
+
+        def new_loop_packet(self, event):
+            self.packets += 1
+
+        def bad_callback(self, event):
+            raise ValueError("Bad callback")
+
+    def test_profiler(self):
+        service = TestEventProfiler.Service()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stats_file = os.path.join(tmpdir, 'profiler.json')
+            profiler = weewx.engine.EventProfiler(log_interval=3600, stats_file=stats_file)
+            for i in range(10):
+                profiler.call(service.new_loop_packet,
+                              weewx.Event(weewx.NEW_LOOP_PACKET, packet={}))
+            # An exception should propagate, but the time still gets recorded
+            with self.assertRaises(ValueError):
+                profiler.call(service.bad_callback, weewx.Event(weewx.NEW_ARCHIVE_RECORD))
+            self.assertEqual(service.packets, 10)
+
+            stats = {entry['callback']: entry for entry in profiler.get_stats()}
+            self.assertEqual(len(stats), 2)
+            entry = stats['new_loop_packet']
+            self.assertEqual(entry['event'], 'NEW_LOOP_PACKET')
+            self.assertEqual(entry['service'], __name__ + '.Service')
+            self.assertEqual(entry['count'], 10)
+            self.assertLessEqual(entry['p50'], entry['p95'])
+            self.assertLessEqual(entry['p95'], entry['max'])
+            self.assertLessEqual(entry['max'], entry['total'])
+            self.assertEqual(stats['bad_callback']['count'], 1)
+
+            # Not time to report yet
+            profiler.check_report()
+            self.assertFalse(os.path.exists(stats_file))
+            profiler.report()
+            with open(stats_file) as fd:
+                saved = json.load(fd)
+            self.assertEqual(len(saved['stats']), 2)
+
+    def test_percentile(self):
+        samples = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual(weewx.engine.EventProfiler.percentile(samples, 50), 5)
+        self.assertEqual(weewx.engine.EventProfiler.percentile(samples, 95), 10)
+        self.assertEqual(weewx.engine.EventProfiler.percentile(samples, 0), 1)
+        self.assertIsNone(weewx.engine.EventProfiler.percentile([], 50))
+
+
+class TestLoopThread(unittest.TestCase):
+    """Test reading LOOP packets on a thread of their own"""
+
+    class Console:
+        def __init__(self, count=None, fail_after=None, gate=None):
+            self.count = count
+            self.fail_after = fail_after
+            # If given, a threading.Event to wait for after each packet
+            self.gate = gate
+            self.generators = 0
+            self.closed = 0
+
+        def genLoopPackets(self):
+            self.generators += 1
+            i = 0
+            try:
+                while self.count is None or i < self.count:
+                    if i == self.fail_after:
+                        raise weewx.WeeWxIOError("Console went away")
+                    i += 1
+                    yield {'dateTime': i, 'usUnits': weewx.US}
+                    if self.gate:
+                        self.gate.wait()
+                    if self.count is None:
+                        time.sleep(0.001)
+            finally:
+                self.closed += 1
+
+    def test_overflow(self):
+        console = TestLoopThread.Console(count=50)
+        loop_thread = weewx.engine.LoopThread(console, buffer_size=10)
+        loop_thread.start()
+        loop_thread.thread.join()
+        # Only the newest packets are kept
+        packets = list(loop_thread.get_packets())
+        self.assertEqual([p['dateTime'] for p in packets], list(range(41, 51)))
+        self.assertEqual(loop_thread.total, 50)
+        self.assertEqual(loop_thread.overflows, 40)
+        self.assertEqual(loop_thread.max_depth, 10)
+
+    def test_error(self):
+        console = TestLoopThread.Console(fail_after=3)
+        loop_thread = weewx.engine.LoopThread(console)
+        loop_thread.start()
+        packets = []
+        with self.assertRaises(weewx.WeeWxIOError):
+            for packet in loop_thread.get_packets():
+                packets.append(packet)
+        self.assertEqual(len(packets), 3)
+
+    def test_stop(self):
+        console = TestLoopThread.Console()
+        loop_thread = weewx.engine.LoopThread(console)
+        loop_thread.start()
+        packets = loop_thread.get_packets()
+        self.assertEqual([next(packets)['dateTime'] for _ in range(5)], [1, 2, 3, 4, 5])
+        loop_thread.stop()
+        self.assertEqual(console.closed, 1)
+        # Packets read before stopping are kept
+        remaining = len(loop_thread.packets)
+        self.assertGreaterEqual(remaining, 1)
+        # Starting again asks the driver for a new generator
+        loop_thread.start()
+        packets = loop_thread.get_packets()
+        for _ in range(remaining + 3):
+            next(packets)
+        loop_thread.stop()
+        self.assertEqual(console.generators, 2)
+        self.assertEqual(console.closed, 2)
+
+    def test_stop_timeout(self):
+        gate = threading.Event()
+        console = TestLoopThread.Console(gate=gate)
+        loop_thread = weewx.engine.LoopThread(console)
+        loop_thread.start()
+        packets = loop_thread.get_packets()
+        self.assertEqual(next(packets)['dateTime'], 1)
+        # The driver does not return its next packet in time
+        loop_thread.stop(timeout=0.1)
+        self.assertTrue(loop_thread.thread.is_alive())
+        # So another thread must not read from the console
+        with self.assertRaises(weewx.WeeWxIOError):
+            loop_thread.start()
+        self.assertEqual(console.generators, 1)
+        # Once the driver returns, the thread stops, and reading can start again
+        gate.set()
+        loop_thread.stop()
+        self.assertIsNone(loop_thread.thread)
+        loop_thread.start()
+        loop_thread.stop()
+        self.assertEqual(console.generators, 2)
+        self.assertEqual(console.closed, 2)
+
+
 def _get_first_last(config_dict):
     """Get the first and last archive record timestamps."""
     run_length = to_int(config_dict['Stopper']['run_length'])
@@ -0,0 +1,160 @@
+#
+#    Copyright (c) 2026 Tom Keffer <tkeffer@gmail.com>
+#
+#    See the file LICENSE.txt for your full rights.
+#
+"""Test the image generator"""
+
+import logging
+import os.path
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import gen_fake_data
+import weeutil.config
+import weeutil.logger
+import weeutil.weeutil
+import weewx
+import weewx.imagegenerator
+import weewx.manager
+import weewx.station
+from weewx.reportengine import build_skin_dict
+
+log = logging.getLogger(__name__)
+weewx.debug = 1
+
+with weeutil.weeutil.get_resource_path('weewx_data', 'skins') as skin_resource:
+    SKIN_DIR = skin_resource
+
+CONFIG_DICT_INI = f"""
+[Station]
+    location = Test
+    latitude = 45.686
+    longitude = -121.566
+    altitude = 700, foot
+    station_type = Simulator
+
+[StdReport]
+    SKIN_ROOT = {SKIN_DIR}
+    HTML_ROOT = public_html
+    [[SeasonsReport]]
+        skin = Seasons
+    [[Defaults]]
+
+[DataBindings]
+    [[wx_binding]]
+        database = archive_sqlite
+        table_name = archive
+        manager = weewx.manager.DaySummaryManager
+        schema = schemas.wview_extended.schema
+
+[Databases]
+    [[archive_sqlite]]
+        database_name = weewx.sdb
+        database_type = SQLite
+
+[DatabaseTypes]
+    [[SQLite]]
+        driver = weedb.sqlite
+        SQLITE_ROOT = archive
+"""
+
+weeutil.logger.setup('weetest_imagegenerator')
+
+# Two days of data, ending at the end of the test database of gen_fake_data
+stop_ts = gen_fake_data.stop_ts
+start_ts = stop_ts - 2 * 86400
+
+
+class TestImageGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dict = weeutil.config.config_from_str(CONFIG_DICT_INI)
+        self.config_dict['WEEWX_ROOT'] = tempfile.mkdtemp()
+        with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding',
+                                                    initialize=True) as db_manager:
+            db_manager.addRecord(gen_fake_data.genFakeRecords(start_ts, stop_ts,
+                                                              gen_fake_data.interval))
+        self.skin_dict = build_skin_dict(self.config_dict, 'SeasonsReport')
+        self.skin_dict['REPORT_NAME'] = 'SeasonsReport'
+        self.stn_info = weewx.station.StationInfo(**self.config_dict['Station'])
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dict['WEEWX_ROOT'], ignore_errors=True)
+
+    def get_generator(self):
+        generator = weewx.imagegenerator.ImageGenerator(self.config_dict, self.skin_dict,
+                                                        stop_ts, True, self.stn_info)
+        generator.setup()
+        return generator
+
+    def gen_images(self):
+        """Generate all the images of the skin afresh. Return their contents, keyed by name."""
+        image_root = os.path.join(self.config_dict['WEEWX_ROOT'], 'public_html')
+        shutil.rmtree(image_root, ignore_errors=True)
+        generator = self.get_generator()
+        try:
+            generator.gen_images(stop_ts)
+        finally:
+            generator.finalize()
+        images = {}
+        for name in os.listdir(image_root):
+            with open(os.path.join(image_root, name), 'rb') as f:
+                images[name] = f.read()
+        return images
+
+    def check_plot_workers(self):
+        expected = self.gen_images()
+        self.assertTrue(expected)
+        self.skin_dict['ImageGenerator']['plot_workers'] = 2
+        with mock.patch.object(weewx.imagegenerator.ImageGenerator, 'gen_images_parallel',
+                               side_effect=weewx.imagegenerator.ImageGenerator.gen_images_parallel,
+                               autospec=True) as parallel:
+            images = self.gen_images()
+        parallel.assert_called_once()
+        self.assertEqual(sorted(images), sorted(expected))
+        for name in expected:
+            self.assertEqual(images[name], expected[name], name)
+
+    def test_plot_workers(self):
+        """The images generated by worker processes should be the same as those generated one
+        after another"""
+        self.check_plot_workers()
+
+    def test_plot_workers_spawn(self):
+        """Without a fork server, the workers are spawned"""
+        with mock.patch('multiprocessing.get_all_start_methods', return_value=['fork', 'spawn']):
+            self.assertEqual(weeutil.weeutil.get_worker_context().get_start_method(), 'spawn')
+            self.check_plot_workers()
+
+    def test_skip_if_unchanged(self):
+        self.skin_dict['ImageGenerator']['day_images']['daybarometer']['skip_if_unchanged'] \
+            = True
+        img_file = os.path.join(self.config_dict['WEEWX_ROOT'], 'public_html', 'daybarometer.png')
+        job = ('day_images', 'daybarometer', stop_ts, img_file)
+
+        generator = self.get_generator()
+        try:
+            self.assertTrue(generator.gen_image(*job))
+            # Pretend the image was made an hour ago
+            old_mtime = os.stat(img_file).st_mtime - 3600
+            os.utime(img_file, (old_mtime, old_mtime))
+
+            # The data have not changed, so the image should not be saved again, but it should
+            # look up to date.
+            self.assertFalse(generator.gen_image(*job))
+            self.assertGreater(os.stat(img_file).st_mtime, old_mtime)
+
+            # Change the data, then try again. This time, the image should be saved.
+            with weewx.manager.open_manager_with_config(self.config_dict,
+                                                        'wx_binding') as db_manager:
+                db_manager.updateValue(stop_ts - 3600, 'barometer', 29.0)
+            self.assertTrue(generator.gen_image(*job))
+        finally:
+            generator.finalize()
+
+
+if __name__ == '__main__':
+    unittest.main()
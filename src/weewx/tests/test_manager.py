@@ -18,14 +18,19 @@ It also tests the V4.3 and v4.4 patches.
 import datetime
 import logging
 import os
+import tempfile
 import time
 import unittest
+from unittest import mock
 
 import gen_fake_data
 import weewx.schemas.wview_small
 import weedb
 import weeutil.logger
+import weeutil.sketch
+import weeutil.weeutil
 import weewx.manager
+import weewx.xtypes
 
 log = logging.getLogger(__name__)
 
@@ -135,6 +140,295 @@ class TestSqliteWeights(CommonWeightTests, unittest.TestCase):
         # Make sure the version was set to V4.0 after the patch
         self.assertEqual(self.db_manager.version, weewx.manager.DaySummaryManager.version)
 
+    def test_batch(self):
+        """Check that adding records in batches gives the same results as one at a time"""
+        records = list(gen_fake_data.genFakeRecords(start_ts, stop_ts, interval=interval_secs))
+        db_dict = {'driver': 'weedb.sqlite', 'database_name': ':memory:'}
+        batch_manager = weewx.manager.DaySummaryManager.open_with_create(db_dict, schema=schema)
+        single_manager = weewx.manager.DaySummaryManager.open_with_create(db_dict, schema=schema)
+        self.assertEqual(batch_manager.addRecord(records[:100]), 100)
+        # This includes some duplicates, which cause the batch to be added one record at a time.
+        self.assertEqual(batch_manager.addRecord(records[90:], log_failure=False),
+                         len(records) - 100)
+        for record in records:
+            single_manager.addRecord(record)
+        for table in ['archive'] + ['archive_day_%s' % key for key in batch_manager.daykeys]:
+            sql = "SELECT * FROM %s ORDER BY dateTime" % table
+            self.assertEqual(list(batch_manager.genSql(sql)), list(single_manager.genSql(sql)),
+                             msg="table %s" % table)
+
+    def test_batch_log(self):
+        """Each record added should be logged once, even if its batch failed after the records
+        were added to the archive table, and had to be added again one record at a time"""
+        records = list(gen_fake_data.genFakeRecords(start_ts, start_ts + 20 * interval_secs,
+                                                    interval=interval_secs))
+        db_dict = {'driver': 'weedb.sqlite', 'database_name': ':memory:'}
+        db_manager = weewx.manager.DaySummaryManager.open_with_create(db_dict, schema=schema)
+        write_metadata = db_manager._write_metadata
+        calls = []
+
+        def fail_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise weedb.OperationalError("Simulated failure")
+            return write_metadata(*args, **kwargs)
+
+        with mock.patch.object(db_manager, '_write_metadata', side_effect=fail_once), \
+                self.assertLogs('weewx.manager', level='INFO') as logs:
+            self.assertEqual(db_manager.addRecord(records), len(records))
+        added = [line for line in logs.output if 'Added record' in line]
+        self.assertEqual(len(added), 2 * len(records))
+        self.assertEqual(len(set(added)), len(added))
+
+    def test_projection(self):
+        """Check reading only some of the columns of the archive"""
+        columns = ['dateTime', 'usUnits', 'interval', 'outTemp']
+        expected = [{key: record[key] for key in columns}
+                    for record in self.db_manager.genBatchRecords(mid_ts, stop_ts)]
+        self.assertTrue(expected)
+        self.assertEqual(list(self.db_manager.genBatchRecords(mid_ts, stop_ts, columns)),
+                         expected)
+        self.assertEqual(list(self.db_manager.genBatchRecords(mid_ts, stop_ts, columns,
+                                                              fetch_size=7)),
+                         expected)
+        self.assertEqual([list(row) for row in self.db_manager.genBatchRows(mid_ts, stop_ts,
+                                                                            columns)],
+                         [[record[key] for key in columns] for record in expected])
+
+    def test_day_cache(self):
+        """Check the daily summary kept in memory, when adding one record at a time"""
+        records = list(gen_fake_data.genFakeRecords(start_ts, start_ts + 2 * 86400,
+                                                    interval=interval_secs))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_dict = {'driver': 'weedb.sqlite',
+                       'database_name': os.path.join(tmpdir, 'test_cache.sdb')}
+            manager1 = weewx.manager.DaySummaryManager.open_with_create(db_dict, schema=schema)
+            manager2 = weewx.manager.DaySummaryManager.open(db_dict)
+            statements = []
+            manager1.connection.connection.set_trace_callback(statements.append)
+            # Take turns adding records, so each manager has to notice the changes made by the
+            # other.
+            for i, record in enumerate(records):
+                (manager1 if i % 4 < 2 else manager2).addRecord(record)
+            single_manager = weewx.manager.DaySummaryManager.open_with_create(
+                {'driver': 'weedb.sqlite', 'database_name': ':memory:'}, schema=schema)
+            single_manager.addRecord(records)
+            for table in ['archive_day_%s' % key for key in single_manager.daykeys]:
+                sql = "SELECT * FROM %s ORDER BY dateTime" % table
+                self.assertEqual(list(manager1.genSql(sql)), list(single_manager.genSql(sql)),
+                                 msg="table %s" % table)
+            # For the second record in a row, only the types that changed get written
+            replaces = [sql for sql in statements if sql.startswith('REPLACE INTO archive_day_')]
+            self.assertLess(len(replaces), len(records) // 2 * len(manager1.daykeys))
+            manager1.close()
+            manager2.close()
+
+
+class TestRollups(unittest.TestCase):
+    """Test the hourly and monthly rollups"""
+
+    rollup_schema = dict(schema, rollups=['hour', 'month'])
+
+    def setUp(self):
+        # Every 15 minutes, over the end of daylight savings time and the end of a month
+        self.records = list(gen_fake_data.genFakeRecords(start_ts, stop_ts, interval=900))
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_dict = {'driver': 'weedb.sqlite',
+                        'database_name': os.path.join(tmpdir.name, 'test_rollups.sdb')}
+        self.db_manager = weewx.manager.DaySummaryManager.open_with_create(
+            self.db_dict, schema=self.rollup_schema)
+        self.addCleanup(self.db_manager.close)
+        self.db_manager.addRecord(self.records)
+
+    def get_rows(self, db_manager, span):
+        return {key: list(db_manager.genSql("SELECT * FROM archive_%s_%s ORDER BY dateTime"
+                                            % (span, key)))
+                for key in db_manager.rollupkeys[span]}
+
+    def assertRowsAlmostEqual(self, rows1, rows2):
+        self.assertEqual(rows1.keys(), rows2.keys())
+        for key in rows1:
+            self.assertEqual(len(rows1[key]), len(rows2[key]), msg="type %s" % key)
+            for row1, row2 in zip(rows1[key], rows2[key]):
+                for x1, x2 in zip(row1, row2):
+                    if isinstance(x1, float):
+                        self.assertAlmostEqual(x1, x2, 6, msg="type %s" % key)
+                    else:
+                        self.assertEqual(x1, x2, msg="type %s" % key)
+
+    def test_tables(self):
+        self.assertEqual(self.db_manager.rollupkeys,
+                         {'hour': self.db_manager.daykeys, 'month': self.db_manager.daykeys})
+        # 01:00 happens twice on 1 November 2020. It gets two rows.
+        hours = [row[0] for row in self.db_manager.genSql(
+            "SELECT dateTime FROM archive_hour_outTemp ORDER BY dateTime")]
+        # The first record falls on the hour, so it belongs to the hour before.
+        self.assertEqual(self.records[0]['dateTime'], start_ts)
+        self.assertEqual(len(hours), (stop_ts - start_ts) // 3600 + 1)
+        self.assertEqual(set(hour % 3600 for hour in hours), {0})
+        months = [row[0] for row in self.db_manager.genSql(
+            "SELECT dateTime FROM archive_month_outTemp ORDER BY dateTime")]
+        self.assertEqual(months, [int(time.mktime((2020, 10, 1, 0, 0, 0, 0, 0, -1))),
+                                  int(time.mktime((2020, 11, 1, 0, 0, 0, 0, 0, -1)))])
+        expected = self.db_manager.getSql("SELECT COUNT(outTemp), COUNT(outTemp) * 900 "
+                                          "FROM archive")
+        for span in ('day', 'hour', 'month'):
+            self.assertEqual(self.db_manager.getSql("SELECT SUM(count), SUM(sumtime) "
+                                                    "FROM archive_%s_outTemp" % span),
+                             expected)
+
+    def test_single(self):
+        """Adding records one at a time should give the same results as a batch"""
+        single_manager = weewx.manager.DaySummaryManager.open_with_create(
+            {'driver': 'weedb.sqlite', 'database_name': ':memory:'}, schema=self.rollup_schema)
+        for record in self.records:
+            single_manager.addRecord(record)
+        for span in ('hour', 'month'):
+            self.assertEqual(self.get_rows(single_manager, span),
+                             self.get_rows(self.db_manager, span))
+        single_manager.close()
+
+    def test_backfill(self):
+        hour_rows = self.get_rows(self.db_manager, 'hour')
+        month_rows = self.get_rows(self.db_manager, 'month')
+        self.db_manager.drop_daily()
+        self.assertFalse([table for table in self.db_manager.connection.tables()
+                          if table != 'archive'])
+        self.db_manager.close()
+        self.db_manager = weewx.manager.DaySummaryManager.open_with_create(
+            self.db_dict, schema=self.rollup_schema)
+        self.db_manager.backfill_day_summary(progress_fn=None, trans_days=3)
+        self.assertRowsAlmostEqual(self.get_rows(self.db_manager, 'hour'), hour_rows)
+        self.assertRowsAlmostEqual(self.get_rows(self.db_manager, 'month'), month_rows)
+
+    def test_aggregates(self):
+        """Aggregates from the rollups should be the same as from the archive table"""
+        # The rollups do not have to be used. Check that they are.
+        span = weeutil.weeutil.TimeSpan(int(time.mktime((2020, 10, 30, 18, 0, 0, 0, 0, -1))),
+                                        int(time.mktime((2020, 11, 2, 6, 0, 0, 0, 0, -1))))
+        self.assertEqual(weewx.xtypes.DailySummaries.plan_summaries('outTemp', span,
+                                                                    self.db_manager, 'avg'),
+                         [('day', span.start + 6 * 3600, span.stop - 6 * 3600),
+                          ('hour', span.start, span.start + 6 * 3600),
+                          ('hour', span.stop - 6 * 3600, span.stop)])
+        all_span = weeutil.weeutil.TimeSpan(int(time.mktime((2020, 10, 1, 0, 0, 0, 0, 0, -1))),
+                                            int(time.mktime((2020, 12, 1, 0, 0, 0, 0, 0, -1))))
+        self.assertEqual(weewx.xtypes.DailySummaries.plan_summaries('outTemp', all_span,
+                                                                    self.db_manager, 'max'),
+                         [('month', all_span.start, all_span.stop)])
+        # Day aggregates, such as 'meanmax', cannot use the rollups
+        with self.assertRaises(weewx.UnknownAggregation):
+            weewx.xtypes.DailySummaries.get_aggregate('outTemp', span, 'meanmax',
+                                                      self.db_manager)
+
+        for timespan in (span, all_span):
+            for aggregate_type in ('min', 'mintime', 'max', 'maxtime', 'sum', 'count', 'avg'):
+                expected = weewx.xtypes.ArchiveTable.get_aggregate('outTemp', timespan,
+                                                                   aggregate_type,
+                                                                   self.db_manager)
+                result = weewx.xtypes.DailySummaries.get_aggregate('outTemp', timespan,
+                                                                   aggregate_type,
+                                                                   self.db_manager)
+                self.assertAlmostEqual(result[0], expected[0], 6, msg=aggregate_type)
+
+    def test_series(self):
+        """A series with hourly aggregates should use the hourly rollups"""
+        stamps = list(weeutil.weeutil.intervalgen(start_ts + 3600, stop_ts - 3600, 3 * 3600))
+        expected = weewx.xtypes.ArchiveTable.get_batch_aggregates('outTemp', stamps, 'avg',
+                                                                  self.db_manager, False)
+        statements = []
+        self.db_manager.connection.connection.set_trace_callback(statements.append)
+        result = weewx.xtypes.ArchiveTable.get_batch_aggregates('outTemp', stamps, 'avg',
+                                                                self.db_manager, True)
+        self.db_manager.connection.connection.set_trace_callback(None)
+        for vt1, vt2 in zip(result, expected):
+            self.assertAlmostEqual(vt1[0], vt2[0], 6)
+        self.assertTrue(any('FROM archive_hour_outTemp' in sql for sql in statements))
+        self.assertFalse(any('FROM archive ' in sql for sql in statements))
+
+
+class TestSketches(unittest.TestCase):
+    """Test the sketches of the days, and the percentiles calculated from them"""
+
+    sketch_schema = dict(schema, sketches=['outTemp', 'windSpeed'])
+
+    def setUp(self):
+        self.records = list(gen_fake_data.genFakeRecords(start_ts, stop_ts, interval=900))
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.db_dict = {'driver': 'weedb.sqlite',
+                        'database_name': os.path.join(tmpdir.name, 'test_sketches.sdb')}
+        self.db_manager = weewx.manager.DaySummaryManager.open_with_create(
+            self.db_dict, schema=self.sketch_schema)
+        self.addCleanup(self.db_manager.close)
+        self.db_manager.addRecord(self.records)
+
+    @staticmethod
+    def get_rows(db_manager):
+        return {key: list(db_manager.genSql("SELECT * FROM archive_sketch_%s ORDER BY dateTime"
+                                            % key))
+                for key in db_manager.sketchkeys}
+
+    def test_tables(self):
+        self.assertEqual(self.db_manager.sketchkeys, {'outTemp', 'windSpeed'})
+        days = self.db_manager.getSql("SELECT COUNT(*) FROM archive_day_outTemp")[0]
+        rows = self.get_rows(self.db_manager)['outTemp']
+        self.assertEqual(len(rows), days)
+        count = sum(weeutil.sketch.QuantileSketch.from_string(row[1]).count for row in rows)
+        self.assertEqual(count, self.db_manager.getSql("SELECT COUNT(outTemp) FROM archive")[0])
+
+    def test_single(self):
+        """Adding records one at a time should give the same sketches as a batch"""
+        single_manager = weewx.manager.DaySummaryManager.open_with_create(
+            {'driver': 'weedb.sqlite', 'database_name': ':memory:'}, schema=self.sketch_schema)
+        for record in self.records:
+            single_manager.addRecord(record)
+        self.assertEqual(self.get_rows(single_manager), self.get_rows(self.db_manager))
+        single_manager.close()
+
+    def test_backfill(self):
+        rows = self.get_rows(self.db_manager)
+        self.db_manager.drop_daily()
+        self.assertFalse([table for table in self.db_manager.connection.tables()
+                          if table != 'archive'])
+        self.db_manager.close()
+        self.db_manager = weewx.manager.DaySummaryManager.open_with_create(
+            self.db_dict, schema=self.sketch_schema)
+        self.db_manager.backfill_day_summary(progress_fn=None, trans_days=3)
+        self.assertEqual(self.get_rows(self.db_manager), rows)
+
+    def test_percentiles(self):
+        """Percentiles from the sketches should be close to the exact ones"""
+        span = weeutil.weeutil.TimeSpan(int(time.mktime((2020, 10, 30, 0, 0, 0, 0, 0, -1))),
+                                        int(time.mktime((2020, 11, 3, 0, 0, 0, 0, 0, -1))))
+        for obs_type in ('outTemp', 'windSpeed'):
+            for aggregate_type in ('p5', 'median', 'p95'):
+                expected = weewx.xtypes.ArchiveTable.get_aggregate(obs_type, span,
+                                                                   aggregate_type,
+                                                                   self.db_manager)
+                result = weewx.xtypes.DailySummaries.get_aggregate(obs_type, span,
+                                                                   aggregate_type,
+                                                                   self.db_manager)
+                self.assertEqual(result[1:], expected[1:])
+                self.assertAlmostEqual(result[0], expected[0],
+                                       delta=0.03 * abs(expected[0]),
+                                       msg="%s %s" % (obs_type, aggregate_type))
+
+        # The sketches are by day
+        hour_span = weeutil.weeutil.TimeSpan(span.start, span.start + 3600)
+        with self.assertRaises(weewx.UnknownAggregation):
+            weewx.xtypes.DailySummaries.get_aggregate('outTemp', hour_span, 'p95',
+                                                      self.db_manager)
+        # ... so the archive table gets used instead
+        self.assertEqual(weewx.xtypes.get_aggregate('outTemp', hour_span, 'p95',
+                                                    self.db_manager),
+                         weewx.xtypes.ArchiveTable.get_aggregate('outTemp', hour_span, 'p95',
+                                                                 self.db_manager))
+        # Other percentiles are not aggregates
+        with self.assertRaises(weewx.UnknownAggregation):
+            weewx.xtypes.get_aggregate('outTemp', span, 'p100', self.db_manager)
+
 
 class TestMySQLWeights(CommonWeightTests, unittest.TestCase):
     """Test using the MySQL database"""
@@ -7,13 +7,15 @@
 
 import logging
 import os.path
+import tempfile
 import unittest
 
 import weeutil.config
 import weeutil.logger
 import weeutil.weeutil
 import weewx
-from weewx.reportengine import build_skin_dict
+import weewx.reportengine
+from weewx.reportengine import build_skin_dict, wait_for_reports
 
 log = logging.getLogger(__name__)
 weewx.debug = 1
@@ -198,6 +200,53 @@ class TestReportEngine(unittest.TestCase):
         skin_dict = build_skin_dict(self.config_dict, 'SeasonsReport')
         self.assertFalse(skin_dict['log_success'])
 
+    def test_wait_for_reports(self):
+        """Test which reports wait for earlier reports when run in parallel"""
+        skin_dict = build_skin_dict(self.config_dict, 'SeasonsReport')
+        self.assertFalse(wait_for_reports(skin_dict))
+        skin_dict['Generators']['generator_list'] = ['weewx.reportengine.FtpGenerator']
+        self.assertTrue(wait_for_reports(skin_dict))
+        # The option overrides the generators
+        skin_dict['wait_for_reports'] = 'false'
+        self.assertFalse(wait_for_reports(skin_dict))
+
+    def test_skin_dict_cache(self):
+        """Test that skin dictionaries are reused until one of their files changes"""
+        cache = weewx.reportengine.skin_dict_cache
+        with tempfile.TemporaryDirectory() as skin_root:
+            os.makedirs(os.path.join(skin_root, 'Test', 'lang'))
+            skin_path = os.path.join(skin_root, 'Test', 'skin.conf')
+            lang_path = os.path.join(skin_root, 'Test', 'lang', 'xx.conf')
+            with open(skin_path, 'w') as fd:
+                fd.write("lang = xx\n[Extras]\n    color = red\n")
+            with open(lang_path, 'w') as fd:
+                fd.write("[Texts]\n    Greeting = Hello\n")
+            self.config_dict['StdReport']['SKIN_ROOT'] = skin_root
+            self.config_dict['StdReport']['TestReport'] = {'skin': 'Test'}
+
+            skin_dict = build_skin_dict(self.config_dict, 'TestReport')
+            self.assertEqual(skin_dict['Extras']['color'], 'red')
+            self.assertEqual(skin_dict['Texts']['Greeting'], 'Hello')
+            # Changes to the copy must not make it into the cache
+            skin_dict['Extras']['color'] = 'green'
+            hits = cache.hits
+            skin_dict = build_skin_dict(self.config_dict, 'TestReport')
+            self.assertEqual(cache.hits, hits + 1)
+            self.assertEqual(skin_dict['Extras']['color'], 'red')
+
+            # Change the localization file. Make sure its size changes, in case the
+            # modification time does not.
+            with open(lang_path, 'w') as fd:
+                fd.write("[Texts]\n    Greeting = Bonjour\n")
+            skin_dict = build_skin_dict(self.config_dict, 'TestReport')
+            self.assertEqual(skin_dict['Texts']['Greeting'], 'Bonjour')
+
+            # Change the configuration dictionary
+            self.config_dict['StdReport']['TestReport']['Extras'] = {'color': 'blue'}
+            skin_dict = build_skin_dict(self.config_dict, 'TestReport')
+            self.assertEqual(skin_dict['Extras']['color'], 'blue')
+            self.assertEqual(cache.hits, hits + 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,13 +6,19 @@
 """Test restx services"""
 
 import http.client
+import http.server
 import os
 import queue
+import tempfile
+import threading
 import time
 import unittest
+import urllib.error
 import urllib.parse
 from unittest import mock
 
+import configobj
+
 import weewx
 import weewx.restx
 
@@ -247,5 +253,214 @@ class TestAmbient(unittest.TestCase):
         return matcher
 
 
+class TestSpool(unittest.TestCase):
+    """Test the on-disk spool"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.spool_file = os.path.join(self.tmpdir.name, 'spool.sdb')
+
+    def test_spool(self):
+        record = get_record()
+        with weewx.restx.Spool(self.spool_file, 'A', max_records=3) as spool:
+            for i in range(5):
+                spool.append(dict(record, dateTime=record['dateTime'] + i * 300))
+            # The oldest records should have been discarded
+            self.assertEqual(len(spool), 3)
+            _id, oldest = spool.oldest()
+            self.assertEqual(oldest, dict(record, dateTime=record['dateTime'] + 600))
+            spool.remove(_id)
+            self.assertEqual(len(spool), 2)
+
+        # The records should still be there, but not for another uploader
+        with weewx.restx.Spool(self.spool_file, 'A') as spool:
+            self.assertEqual(len(spool), 2)
+            self.assertEqual(spool.oldest()[1]['dateTime'], record['dateTime'] + 900)
+        with weewx.restx.Spool(self.spool_file, 'B') as spool:
+            self.assertEqual(len(spool), 0)
+            self.assertIsNone(spool.oldest())
+
+    def get_thread(self, q):
+        return weewx.restx.AmbientThread(q,
+                                         manager_dict=None,
+                                         station=TestAmbient.station,
+                                         password=TestAmbient.password,
+                                         server_url=TestAmbient.server_url,
+                                         protocol_name=TestAmbient.protocol_name,
+                                         max_tries=1,
+                                         spool_file=self.spool_file,
+                                         spool_retry=0.1,
+                                         catchup_wait=0)
+
+    def test_outage(self):
+        """Records posted during an outage should be kept, and posted once it is over"""
+        response = mock.MagicMock()
+        response.code = 200
+        response.__iter__.return_value = iter([])
+        with mock.patch('weewx.restx.urllib.request.urlopen') as mock_urlopen:
+            # The server cannot be reached for the first two tries
+            mock_urlopen.side_effect = [urllib.error.URLError('down'),
+                                        urllib.error.URLError('down'),
+                                        response, response, response]
+            q = queue.Queue()
+            obj = self.get_thread(q)
+            record = get_record()
+            for i in range(3):
+                q.put(dict(record, dateTime=record['dateTime'] + i * 300))
+            with mock.patch('weewx.restx.log.error') as mock_logerr:
+                obj.start()
+                for _ in range(100):
+                    if mock_urlopen.call_count >= 5:
+                        break
+                    time.sleep(0.05)
+                q.put(None)
+                obj.join(5)
+                self.assertEqual(mock_logerr.call_count, 2)
+
+        self.assertEqual(mock_urlopen.call_count, 5)
+        with weewx.restx.Spool(self.spool_file, TestAmbient.protocol_name) as spool:
+            self.assertEqual(len(spool), 0)
+
+    def test_restart(self):
+        """Records not yet posted at shutdown should be posted after a restart"""
+        q = queue.Queue()
+        q.put(get_record())
+        q.put(None)
+        self.get_thread(q).run()
+        with weewx.restx.Spool(self.spool_file, TestAmbient.protocol_name) as spool:
+            self.assertEqual(len(spool), 1)
+
+        with mock.patch('weewx.restx.urllib.request.urlopen') as mock_urlopen:
+            mock_urlopen.return_value.code = 200
+            mock_urlopen.return_value.__iter__.return_value = iter([])
+            q = queue.Queue()
+            obj = self.get_thread(q)
+            obj.start()
+            for _ in range(100):
+                if mock_urlopen.call_count:
+                    break
+                time.sleep(0.05)
+            q.put(None)
+            obj.join(5)
+
+        matcher = TestAmbient.get_matcher(TestAmbient.server_url, TestAmbient.station,
+                                          TestAmbient.password)
+        mock_urlopen.assert_called_once_with(matcher, data=None, timeout=10)
+
+    def test_rapidfire(self):
+        """Rapidfire posts should not be spooled, but archive posts should"""
+        config_dict = configobj.ConfigObj({
+            'WEEWX_ROOT': self.tmpdir.name,
+            'StdRESTful': {
+                'Wunderground': {
+                    'station': TestAmbient.station,
+                    'password': TestAmbient.password,
+                    'rapidfire': True,
+                    'archive_post': True,
+                    'spool_file': self.spool_file,
+                    'catchup_wait': 0,
+                }
+            },
+            'DataBindings': {
+                'wx_binding': {'database': 'archive_sqlite'}
+            },
+            'Databases': {
+                'archive_sqlite': {'database_name': 'weewx.sdb', 'database_type': 'SQLite'}
+            },
+            'DatabaseTypes': {
+                'SQLite': {'driver': 'weedb.sqlite', 'SQLITE_ROOT': self.tmpdir.name}
+            },
+        })
+        with mock.patch.object(weewx.restx.AmbientThread, 'start'):
+            service = weewx.restx.StdWunderground(mock.MagicMock(), config_dict)
+        self.assertEqual(service.archive_thread.spool_file, self.spool_file)
+        self.assertEqual(service.archive_thread.catchup_wait, 0)
+        self.assertIsNone(service.loop_thread.spool_file)
+        self.assertEqual(service.loop_thread.catchup_wait, 1)
+        self.assertEqual(service.loop_thread.max_backlog, 0)
+
+
+class CountingHandler(http.server.BaseHTTPRequestHandler):
+    """Handler that counts connections and requests. After close_after requests on a connection,
+    it closes it without telling the client."""
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    requests = 0
+    close_after = None
+
+    def setup(self):
+        super().setup()
+        CountingHandler.connections += 1
+        self.served = 0
+
+    def do_GET(self):
+        CountingHandler.requests += 1
+        self.served += 1
+        body = b'success'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if self.close_after and self.served >= self.close_after:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class TestKeepAlive(unittest.TestCase):
+    """Test reusing connections"""
+
+    def setUp(self):
+        CountingHandler.connections = CountingHandler.requests = 0
+        CountingHandler.close_after = None
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.server_url = 'http://127.0.0.1:%d/testapi' % self.server.server_port
+
+    def tearDown(self):
+        for handler in weewx.restx.get_keepalive_opener().handlers:
+            if isinstance(handler, weewx.restx.KeepAliveMixin):
+                handler.pool.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def post_records(self, n):
+        q = queue.Queue()
+        obj = weewx.restx.AmbientThread(q,
+                                        manager_dict=None,
+                                        station=TestAmbient.station,
+                                        password=TestAmbient.password,
+                                        server_url=self.server_url,
+                                        protocol_name=TestAmbient.protocol_name,
+                                        max_tries=1,
+                                        keep_alive=True)
+        for i in range(n):
+            record = get_record()
+            record['dateTime'] += i * 300
+            q.put(record)
+        q.put(None)
+        with mock.patch('weewx.restx.log.info') as mock_loginf:
+            with mock.patch('weewx.restx.log.error') as mock_logerr:
+                obj.run()
+                mock_logerr.assert_not_called()
+                self.assertEqual(mock_loginf.call_count, n)
+
+    def test_reuse(self):
+        self.post_records(3)
+        self.assertEqual(CountingHandler.requests, 3)
+        self.assertEqual(CountingHandler.connections, 1)
+
+    def test_closed_by_server(self):
+        # The server closes the connection after each request. The client should notice, and
+        # open a new connection.
+        CountingHandler.close_after = 1
+        self.post_records(3)
+        self.assertEqual(CountingHandler.requests, 3)
+        self.assertEqual(CountingHandler.connections, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
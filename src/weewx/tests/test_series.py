@@ -176,6 +176,33 @@ class Common:
         self.assertEqual((["%.2f" % d for d in data_vec[0]], data_vec[1], data_vec[2]),
                          (["%.2f" % d for d in right_answer], 'inch', 'group_rain'))
 
+    def test_get_series_archive_agg_batch(self):
+        """Test that series calculated in a single pass give the same results as aggregating
+        each interval separately."""
+        # The first time span lies on midnight boundaries, so the daily summaries will be used.
+        # The second does not, so the main archive table will be used.
+        spans = [(TimeSpan(start_ts, stop_ts), 'day'),
+                 (TimeSpan(start_ts + 3 * 3600, start_ts + 10 * 86400 + 3 * 3600), 3 * 3600)]
+        with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as db_manager:
+            for timespan, aggregate_interval in spans:
+                for aggregate_type in ('sum', 'count', 'avg', 'max', 'min', 'first', 'last'):
+                    self.assertIsNotNone(weewx.xtypes.ArchiveTable.batch_plan('outTemp',
+                                                                              aggregate_type,
+                                                                              db_manager))
+                    start_vec, stop_vec, data_vec \
+                        = weewx.xtypes.ArchiveTable.get_series('outTemp',
+                                                               timespan,
+                                                               db_manager,
+                                                               aggregate_type,
+                                                               aggregate_interval)
+                    for start, stop, data in zip(start_vec[0], stop_vec[0], data_vec[0]):
+                        expected = weewx.xtypes.get_aggregate('outTemp',
+                                                              TimeSpan(start, stop),
+                                                              aggregate_type,
+                                                              db_manager)
+                        self.assertAlmostEqual(data, expected[0], 6)
+                        self.assertEqual(data_vec[1:], expected[1:])
+
     def test_get_series_archive_windvec(self):
         """Test a series of 'windvec', with no aggregation, run against the main archive table"""
         with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as db_manager:
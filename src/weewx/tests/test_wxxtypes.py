@@ -121,6 +121,31 @@ class TestSimpleFunctions(unittest.TestCase):
         with self.assertRaises(weewx.UnknownType):
             self.wx_calc.get_scalar('foo', self.record, None)
 
+    def test_get_scalar_array(self):
+        """Make sure get_scalar_array() agrees with get_scalar(), in all unit systems"""
+        for unit_system in (weewx.US, weewx.METRIC, weewx.METRICWX):
+            record = weewx.units.to_std_system(self.record, unit_system)
+            other = dict(record, outTemp=None, windSpeed=0.0)
+            columns = {k: [record[k], other[k]] for k in record if k != 'usUnits'}
+            columns['usUnits'] = unit_system
+            for key in correct:
+                result = self.wx_calc.get_scalar_array(key, columns, None)
+                expected = [self.wx_calc.get_scalar(key, rec, None) for rec in (record, other)]
+                self.assertEqual(len(result[0]), 2)
+                for actual, expected_vt in zip(result[0], expected):
+                    if expected_vt[0] is None:
+                        self.assertIsNone(actual)
+                    else:
+                        self.assertAlmostEqual(actual, expected_vt[0], 6)
+                self.assertEqual(result[1:], expected[0][1:])
+
+        # A missing column should raise an exception
+        del columns['outTemp']
+        with self.assertRaises(weewx.CannotCalculate):
+            self.wx_calc.get_scalar_array('dewpoint', columns, None)
+        with self.assertRaises(weewx.UnknownType):
+            self.wx_calc.get_scalar_array('foo', columns, None)
+
 
 # Test values for the PressureCooker test:
 record_2 = {
@@ -10,6 +10,7 @@ import os.path
 import sys
 import time
 import unittest
+from unittest import mock
 
 import configobj
 
@@ -138,6 +139,35 @@ class Common:
         self.assertAlmostEqual(vt[0], 8.13691, 5)
         self.assertEqual(vt[1], 'mile_per_hour', 'group_speed')
 
+    def test_gen_columns(self):
+        """The records should be yielded a chunk at a time, as they are read"""
+        with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as db_manager:
+            # Keep track of how many rows have been read
+            rows_read = []
+            gen_batch_rows = db_manager.genBatchRows
+
+            def counting_gen_batch_rows(*args, **kwargs):
+                for row in gen_batch_rows(*args, **kwargs):
+                    rows_read.append(row[0])
+                    yield row
+
+            db_manager.genBatchRows = counting_gen_batch_rows
+            chunk_size = 10
+            with mock.patch.object(weewx.xtypes.XTypeTable, 'chunk_size', chunk_size):
+                gen = weewx.xtypes.XTypeTable.gen_columns(month_timespan, db_manager)
+                chunks = [next(gen)]
+                self.assertEqual(len(rows_read), chunk_size)
+                chunks.extend(gen)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk['dateTime']) == chunk_size for chunk in chunks[:-1]))
+        self.assertEqual([ts for chunk in chunks for ts in chunk['dateTime']], rows_read)
+        # The chunks should follow each other, without a gap
+        self.assertEqual(chunks[0].timespan[0], month_timespan.start)
+        for chunk, next_chunk in zip(chunks, chunks[1:]):
+            self.assertEqual(chunk.timespan[1], next_chunk.timespan[0])
+        self.assertEqual(chunks[-1].timespan[1], rows_read[-1])
+
     def test_has_data_true(self):
         """Test has_data() with a type known to have data"""
         with weewx.manager.open_manager_with_config(self.config_dict, 'wx_binding') as db_manager:
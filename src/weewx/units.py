@@ -534,6 +534,10 @@ class ValueTuple(tuple):
     def __new__(cls, *args):
         return tuple.__new__(cls, args)
 
+    def __getnewargs__(self):
+        # So that a ValueTuple can be pickled, e.g., to be sent to a worker process
+        return tuple(self)
+
     @property
     def value(self):
         return self[0]
@@ -85,6 +85,15 @@ class WXXTypes(weewx.xtypes.XType):
         except AttributeError:
             raise weewx.UnknownType(obs_type)
 
+    def get_scalar_array(self, obs_type, columns, db_manager, **option_dict):
+        """Invoke the proper method for calculating the desired observation type for a batch of
+        records. Types that do not have such a method are calculated one record at a time."""
+        try:
+            calc_fn = getattr(self, 'array_%s' % obs_type)
+        except AttributeError:
+            return super().get_scalar_array(obs_type, columns, db_manager, **option_dict)
+        return calc_fn(obs_type, columns, db_manager)
+
     def calc_windDir(self, key, data, db_manager):
         """ Set windDir to None if windSpeed is zero. Otherwise, raise weewx.NoCalculate. """
         if 'windSpeed' not in data \
@@ -130,6 +139,21 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'meter'
         return ValueTuple(val, u, 'group_altitude')
 
+    def array_cloudbase(self, key, columns, db_manager):
+        if 'outTemp' not in columns or 'outHumidity' not in columns:
+            raise weewx.CannotCalculate(key)
+        altitude = weewx.units.convertStd(self.altitude_vt, columns['usUnits'])
+        altitudes = [altitude[0]] * len(columns['outTemp'])
+        if columns['usUnits'] == weewx.US:
+            vals = list(map(weewx.wxformulas.cloudbase_US,
+                            columns['outTemp'], columns['outHumidity'], altitudes))
+            u = 'foot'
+        else:
+            vals = list(map(weewx.wxformulas.cloudbase_Metric,
+                            columns['outTemp'], columns['outHumidity'], altitudes))
+            u = 'meter'
+        return ValueTuple(vals, u, 'group_altitude')
+
     @staticmethod
     def calc_dewpoint(key, data, db_manager=None):
         if 'outTemp' not in data or 'outHumidity' not in data:
@@ -142,6 +166,20 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'degree_C'
         return ValueTuple(val, u, 'group_temperature')
 
+    @staticmethod
+    def array_dewpoint(key, columns, db_manager=None):
+        if 'outTemp' not in columns or 'outHumidity' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            vals = list(map(weewx.wxformulas.dewpointF,
+                            columns['outTemp'], columns['outHumidity']))
+            u = 'degree_F'
+        else:
+            vals = list(map(weewx.wxformulas.dewpointC,
+                            columns['outTemp'], columns['outHumidity']))
+            u = 'degree_C'
+        return ValueTuple(vals, u, 'group_temperature')
+
     @staticmethod
     def calc_inDewpoint(key, data, db_manager=None):
         if 'inTemp' not in data or 'inHumidity' not in data:
@@ -154,6 +192,20 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'degree_C'
         return ValueTuple(val, u, 'group_temperature')
 
+    @staticmethod
+    def array_inDewpoint(key, columns, db_manager=None):
+        if 'inTemp' not in columns or 'inHumidity' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            vals = list(map(weewx.wxformulas.dewpointF,
+                            columns['inTemp'], columns['inHumidity']))
+            u = 'degree_F'
+        else:
+            vals = list(map(weewx.wxformulas.dewpointC,
+                            columns['inTemp'], columns['inHumidity']))
+            u = 'degree_C'
+        return ValueTuple(vals, u, 'group_temperature')
+
     @staticmethod
     def calc_windchill(key, data, db_manager=None):
         if 'outTemp' not in data or 'windSpeed' not in data:
@@ -171,6 +223,24 @@ class WXXTypes(weewx.xtypes.XType):
             raise weewx.ViolatedPrecondition("Unknown unit system %s" % data['usUnits'])
         return ValueTuple(val, u, 'group_temperature')
 
+    @staticmethod
+    def array_windchill(key, columns, db_manager=None):
+        if 'outTemp' not in columns or 'windSpeed' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            windchill_fn = weewx.wxformulas.windchillF
+            u = 'degree_F'
+        elif columns['usUnits'] == weewx.METRIC:
+            windchill_fn = weewx.wxformulas.windchillMetric
+            u = 'degree_C'
+        elif columns['usUnits'] == weewx.METRICWX:
+            windchill_fn = weewx.wxformulas.windchillMetricWX
+            u = 'degree_C'
+        else:
+            raise weewx.ViolatedPrecondition("Unknown unit system %s" % columns['usUnits'])
+        vals = list(map(windchill_fn, columns['outTemp'], columns['windSpeed']))
+        return ValueTuple(vals, u, 'group_temperature')
+
     def calc_heatindex(self, key, data, db_manager=None):
         if 'outTemp' not in data or 'outHumidity' not in data:
             raise weewx.CannotCalculate(key)
@@ -184,6 +254,19 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'degree_C'
         return ValueTuple(val, u, 'group_temperature')
 
+    def array_heatindex(self, key, columns, db_manager=None):
+        if 'outTemp' not in columns or 'outHumidity' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            heatindex_fn = weewx.wxformulas.heatindexF
+            u = 'degree_F'
+        else:
+            heatindex_fn = weewx.wxformulas.heatindexC
+            u = 'degree_C'
+        vals = [heatindex_fn(t, r, algorithm=self.heatindex_algo)
+                for t, r in zip(columns['outTemp'], columns['outHumidity'])]
+        return ValueTuple(vals, u, 'group_temperature')
+
     @staticmethod
     def calc_humidex(key, data, db_manager=None):
         if 'outTemp' not in data or 'outHumidity' not in data:
@@ -196,6 +279,20 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'degree_C'
         return ValueTuple(val, u, 'group_temperature')
 
+    @staticmethod
+    def array_humidex(key, columns, db_manager=None):
+        if 'outTemp' not in columns or 'outHumidity' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            vals = list(map(weewx.wxformulas.humidexF,
+                            columns['outTemp'], columns['outHumidity']))
+            u = 'degree_F'
+        else:
+            vals = list(map(weewx.wxformulas.humidexC,
+                            columns['outTemp'], columns['outHumidity']))
+            u = 'degree_C'
+        return ValueTuple(vals, u, 'group_temperature')
+
     @staticmethod
     def calc_appTemp(key, data, db_manager=None):
         if 'outTemp' not in data or 'outHumidity' not in data or 'windSpeed' not in data:
@@ -212,6 +309,24 @@ class WXXTypes(weewx.xtypes.XType):
             u = 'degree_C'
         return ValueTuple(val, u, 'group_temperature')
 
+    @staticmethod
+    def array_appTemp(key, columns, db_manager=None):
+        if 'outTemp' not in columns or 'outHumidity' not in columns \
+                or 'windSpeed' not in columns:
+            raise weewx.CannotCalculate(key)
+        if columns['usUnits'] == weewx.US:
+            vals = list(map(weewx.wxformulas.apptempF, columns['outTemp'],
+                            columns['outHumidity'], columns['windSpeed']))
+            u = 'degree_F'
+        else:
+            # The metric equivalent needs wind speed in mps. Convert.
+            windspeed_vt = weewx.units.as_value_tuple(columns, 'windSpeed')
+            windspeed_mps = weewx.units.convert(windspeed_vt, 'meter_per_second')[0]
+            vals = list(map(weewx.wxformulas.apptempC, columns['outTemp'],
+                            columns['outHumidity'], windspeed_mps))
+            u = 'degree_C'
+        return ValueTuple(vals, u, 'group_temperature')
+
     @staticmethod
     def calc_beaufort(key, data, db_manager=None):
         global first_time
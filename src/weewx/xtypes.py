@@ -5,11 +5,15 @@
 #
 """User-defined extensions to the WeeWX type system"""
 
+import bisect
+import collections.abc
 import datetime
 import time
 import math
+import re
 
 import weedb
+import weeutil.sketch
 import weeutil.weeutil
 import weewx
 import weewx.units
@@ -43,6 +47,51 @@ class XType:
         """
         raise weewx.UnknownType
 
+    def get_scalar_array(self, obs_type, columns, db_manager=None, **option_dict):
+        """Calculate a scalar for each of a batch of records.
+
+        This version calculates the scalars one record at a time, using get_scalar().
+        Specializing versions can calculate them all at once.
+
+        Args:
+            obs_type (str): The name of the XType
+            columns (dict): The records, organized by column. Each key is an observation type,
+                and each value a sequence with one value per record, except for 'usUnits', which
+                holds the unit system used by all the records.
+            db_manager(weewx.manager.Manager|None): An open database manager
+            option_dict(dict): A dictionary containing optional values
+
+        Returns:
+            ValueTuple: The values of the xtype as a ValueTuple. The first element is a list,
+                with one value per record. The value is None for any record where it cannot be
+                calculated.
+
+        Raises:
+            weewx.UnknownType: If the type `obs_type` is unknown to the function.
+            weewx.CannotCalculate: If the type is known to the function, but the columns
+                necessary to calculate the type are not there.
+        """
+        if type(self).get_scalar is XType.get_scalar:
+            # This XType does not calculate any scalars. Do not bother reading the columns.
+            raise weewx.UnknownType(obs_type)
+        std_unit_system = columns['usUnits']
+        # Use items(), so a mapping that reads its columns lazily can read them all at once.
+        items = [(key, values) for key, values in columns.items() if key != 'usUnits']
+        keys = [item[0] for item in items]
+        data_vec = list()
+        unit = unit_group = None
+        for row in zip(*(item[1] for item in items)):
+            record = dict(zip(keys, row))
+            record['usUnits'] = std_unit_system
+            try:
+                value_t = self.get_scalar(obs_type, record, db_manager, **option_dict)
+            except weewx.CannotCalculate:
+                data_vec.append(None)
+            else:
+                data_vec.append(value_t[0])
+                unit, unit_group = value_t[1], value_t[2]
+        return ValueTuple(data_vec, unit, unit_group)
+
     def get_series(self, obs_type, timespan, db_manager, aggregate_type=None,
                    aggregate_interval=None, **option_dict):
         """Calculate a series, possibly with aggregation. Specializing versions should raise...
@@ -95,6 +144,27 @@ def get_scalar(obs_type, record, db_manager=None, **option_dict):
     raise weewx.UnknownType(obs_type)
 
 
+def get_scalar_array(obs_type, columns, db_manager=None, **option_dict):
+    """Return a scalar value for each of a batch of records. See XType.get_scalar_array()."""
+
+    # Search the list, looking for a get_scalar_array() method that does not raise an UnknownType
+    # exception
+    for xtype in xtypes:
+        try:
+            if hasattr(xtype, 'get_scalar_array'):
+                return xtype.get_scalar_array(obs_type, columns, db_manager, **option_dict)
+            else:
+                # A legacy style XType, which does not inherit from XType. Use the version that
+                # calculates one record at a time.
+                return XType.get_scalar_array(xtype, obs_type, columns, db_manager,
+                                              **option_dict)
+        except weewx.UnknownType:
+            # This function does not know about the type. Move on to the next one.
+            pass
+    # None of the functions worked.
+    raise weewx.UnknownType(obs_type)
+
+
 def get_series(obs_type, timespan, db_manager, aggregate_type=None, aggregate_interval=None,
                **option_dict):
     """Return a series (aka vector) of, possibly aggregated, values."""
@@ -167,6 +237,29 @@ def has_data(obs_type, timespan, db_manager):
     return False
 
 
+def get_percentile(aggregate_type):
+    """If an aggregate type is a percentile, return it as a fraction.
+
+    The percentiles are 'median', and 'p1' through 'p99'.
+
+    Example:
+        >>> print(get_percentile('p95'), get_percentile('median'), get_percentile('max'))
+        0.95 0.5 None
+
+    Args:
+        aggregate_type (str): The type of aggregation.
+
+    Returns:
+        float|None: The fraction, or None if the aggregate type is not a percentile.
+    """
+    if aggregate_type == 'median':
+        return 0.5
+    if aggregate_type and aggregate_type[0] == 'p' and aggregate_type[1:].isdigit() \
+            and 0 < int(aggregate_type[1:]) < 100 and aggregate_type[1] != '0':
+        return int(aggregate_type[1:]) / 100.0
+    return None
+
+
 #
 # ######################## Class ArchiveTable ##############################
 #
@@ -180,7 +273,10 @@ class ArchiveTable(XType):
         """Get a series, possibly with aggregation, from the main archive database.
 
         The general strategy is that if aggregation is asked for, chop the series up into separate
-        chunks, calculating the aggregate for each chunk. Then assemble the results.
+        chunks, calculating the aggregate for each chunk. Then assemble the results. If the
+        aggregates of all the chunks can be calculated in a single pass through the database
+        (see get_batch_aggregates()), that is done. Otherwise, each chunk is calculated
+        separately.
 
         If no aggregation is called for, just return the data directly out of the database.
         """
@@ -200,19 +296,25 @@ class ArchiveTable(XType):
             else:
                 do_aggregate = aggregate_type
 
+            # Collect the aggregation intervals for which the database could have data.
+            stamps = list()
             for stamp in weeutil.weeutil.intervalgen(startstamp, stopstamp, aggregate_interval):
                 if db_manager.first_timestamp is None or stamp.stop <= db_manager.first_timestamp:
                     continue
                 if db_manager.last_timestamp is None or stamp.start >= db_manager.last_timestamp:
                     break
-                try:
-                    # Get the aggregate as a ValueTuple
-                    agg_vt = get_aggregate(obs_type, stamp, do_aggregate, db_manager,
-                                           **option_dict)
-                except weewx.CannotCalculate:
-                    # Function get_aggregate() should not raise CannotCalculate. But, just in case,
-                    # catch it and convert to None.
-                    agg_vt = ValueTuple(None, unit, unit_group)
+                stamps.append(stamp)
+
+            use_daily = ArchiveTable.batch_plan(obs_type, do_aggregate, db_manager)
+            if use_daily is None:
+                # The aggregates have to be calculated one interval at a time
+                agg_vts = ArchiveTable._gen_aggregates(obs_type, stamps, do_aggregate,
+                                                       db_manager, **option_dict)
+            else:
+                agg_vts = ArchiveTable.get_batch_aggregates(obs_type, stamps, do_aggregate,
+                                                            db_manager, use_daily)
+
+            for stamp, agg_vt in zip(stamps, agg_vts):
                 if unit:
                     # Make sure units are consistent so far.
                     if agg_vt[1] is not None and (unit != agg_vt[1] or unit_group != agg_vt[2]):
@@ -264,6 +366,166 @@ class ArchiveTable(XType):
                 ValueTuple(stop_vec, 'unix_epoch', 'group_time'),
                 ValueTuple(data_vec, unit, unit_group))
 
+    @staticmethod
+    def _gen_aggregates(obs_type, timespans, aggregate_type, db_manager, **option_dict):
+        """Generator function that calculates the aggregate for each timespan separately, using
+        the xtypes system."""
+        for timespan in timespans:
+            try:
+                # Get the aggregate as a ValueTuple
+                yield get_aggregate(obs_type, timespan, aggregate_type, db_manager, **option_dict)
+            except weewx.CannotCalculate:
+                # Function get_aggregate() should not raise CannotCalculate. But, just in case,
+                # catch it and convert to None.
+                yield ValueTuple(None, None, None)
+
+    # Aggregates that can be calculated for a whole series in a single pass through the database,
+    # and the function that calculates each from the list of (non-null) values in an interval.
+    batch_aggregate_dict = {
+        'avg': lambda values: sum(values) / len(values) if values else None,
+        'count': len,
+        'first': lambda values: values[0] if values else None,
+        'last': lambda values: values[-1] if values else None,
+        'max': lambda values: max(values) if values else None,
+        'min': lambda values: min(values) if values else None,
+        'sum': lambda values: sum(values) if values else None,
+    }
+
+    @staticmethod
+    def batch_plan(obs_type, aggregate_type, db_manager):
+        """Decide whether the aggregates of a series can be calculated in a single pass.
+
+        The per-interval aggregates of a series are calculated by function get_aggregate(), which
+        searches the xtypes list. A single pass can give the same answers only if it is known
+        which extension in the list would have answered. That is the case only if the extensions
+        ahead of ArchiveTable in the list are the built-in ones, or do not do aggregates.
+
+        Args:
+            obs_type (str): The type to be aggregated.
+            aggregate_type (str): The type of aggregation.
+            db_manager (weewx.manager.Manager): An open database manager.
+
+        Returns:
+            bool|None: None if the series cannot be calculated in a single pass. Otherwise, True
+                if the daily summaries should be used for intervals that fall on day boundaries,
+                False if not.
+        """
+        # The type must be a plain column in the archive table. Type 'wind' is excluded because
+        # it is calculated from two columns.
+        if aggregate_type not in ArchiveTable.batch_aggregate_dict \
+                or obs_type == 'wind' \
+                or obs_type in WindVec.windvec_types \
+                or obs_type in AggregateHeatCool.heatcool_types \
+                or obs_type not in db_manager.sqlkeys:
+            return None
+
+        use_daily = False
+        for xtype in xtypes:
+            if isinstance(xtype, ArchiveTable):
+                return use_daily
+            if isinstance(xtype, DailySummaries):
+                use_daily = hasattr(db_manager, 'daykeys') \
+                            and obs_type in db_manager.daykeys \
+                            and aggregate_type in DailySummaries.common
+            elif not isinstance(xtype, (WindVecDaily, WindVec, AggregateHeatCool)) \
+                    and type(xtype).get_aggregate is not XType.get_aggregate:
+                # An unknown extension that does aggregates. It may have an opinion about this
+                # type.
+                return None
+        # ArchiveTable is not in the list at all.
+        return None
+
+    @staticmethod
+    def get_batch_aggregates(obs_type, timespans, aggregate_type, db_manager, use_daily):
+        """Calculate the aggregates for a sequence of timespans in a single pass.
+
+        Each run of contiguous timespans takes one query. Timespans that the daily summaries, or
+        the hourly or monthly rollups, could answer are calculated from the coarsest of them that
+        fits, the rest from the main archive table. Because the
+        timespans are used as a sequence, each one must start at or after the stop of the
+        previous one.
+
+        Args:
+            obs_type (str): The type to be aggregated. It must be a column in the archive table.
+            timespans (list[TimeSpan]): The timespans over which aggregation is to be done.
+            aggregate_type (str): The type of aggregation. It must be a key in
+                batch_aggregate_dict.
+            db_manager (weewx.manager.Manager): An open database manager.
+            use_daily (bool): True to use the daily summaries for timespans that are eligible.
+
+        Returns:
+            list[ValueTuple]: One ValueTuple for each timespan.
+        """
+
+        # Use the coarsest summary that fits each timespan.
+        summaries = DailySummaries.get_summaries(obs_type, db_manager, aggregate_type) \
+            if use_daily else []
+        summary_indexes = {summary: list() for summary in summaries}
+        archive_indexes = list()
+        for i, timespan in enumerate(timespans):
+            for summary in summaries:
+                try:
+                    DailySummaries.check_eligibility(obs_type, timespan, db_manager,
+                                                     aggregate_type, summary)
+                except (weewx.UnknownType, weewx.UnknownAggregation):
+                    continue
+                summary_indexes[summary].append(i)
+                break
+            else:
+                archive_indexes.append(i)
+
+        values = [None] * len(timespans)
+
+        archive_sql = "SELECT dateTime, %s FROM %s " \
+                      "WHERE dateTime > ? AND dateTime <= ? AND %s IS NOT NULL " \
+                      "ORDER BY dateTime ASC" % (obs_type, db_manager.table_name, obs_type)
+        agg_fn = ArchiveTable.batch_aggregate_dict[aggregate_type]
+        for run in ArchiveTable._gen_runs(timespans, archive_indexes):
+            bins = [list() for _ in run]
+            k = 0
+            for timestamp, value in db_manager.genSql(archive_sql,
+                                                      (timespans[run[0]].start,
+                                                       timespans[run[-1]].stop)):
+                while timestamp > timespans[run[k]].stop:
+                    k += 1
+                bins[k].append(value)
+            for i, bin_values in zip(run, bins):
+                values[i] = agg_fn(bin_values)
+
+        for summary, summary_index in summary_indexes.items():
+            summary_sql = "SELECT dateTime, min, max, sum, count, wsum, sumtime FROM %s_%s_%s " \
+                          "WHERE dateTime >= ? AND dateTime < ? " \
+                          "ORDER BY dateTime ASC" % (db_manager.table_name, summary, obs_type)
+            for run in ArchiveTable._gen_runs(timespans, summary_index):
+                bins = [list() for _ in run]
+                k = 0
+                for row in db_manager.genSql(summary_sql,
+                                             (DailySummaries._floor(summary,
+                                                                    timespans[run[0]].start),
+                                              timespans[run[-1]].stop)):
+                    while row[0] >= timespans[run[k]].stop:
+                        k += 1
+                    bins[k].append(row)
+                for i, rows in zip(run, bins):
+                    values[i] = DailySummaries.reduce_rows(rows, aggregate_type)
+
+        u, g = weewx.units.getStandardUnitType(db_manager.std_unit_system, obs_type,
+                                               aggregate_type)
+        return [ValueTuple(value, u, g) for value in values]
+
+    @staticmethod
+    def _gen_runs(timespans, indexes):
+        """Generator function that splits a list of indexes into timespans into runs of
+        contiguous timespans."""
+        run = list()
+        for i in indexes:
+            if run and timespans[i].start != timespans[run[-1]].stop:
+                yield run
+                run = list()
+            run.append(i)
+        if run:
+            yield run
+
     # Set of SQL statements to be used for calculating aggregates from the main archive table.
     agg_sql_dict = {
         'diff': "SELECT (b.%(sql_type)s - a.%(sql_type)s) FROM archive a, archive b "
@@ -340,6 +602,11 @@ class ArchiveTable(XType):
             ValueTuple: A ValueTuple containing the result.
         """
 
+        percentile = get_percentile(aggregate_type)
+        if percentile is not None:
+            return ArchiveTable.get_percentile(obs_type, timespan, aggregate_type, percentile,
+                                               db_manager)
+
         if aggregate_type not in ArchiveTable.valid_aggregate_types:
             raise weewx.UnknownAggregation(aggregate_type)
 
@@ -407,6 +674,29 @@ class ArchiveTable(XType):
         # Form the ValueTuple and return it:
         return weewx.units.ValueTuple(value, u, g)
 
+    @staticmethod
+    def get_percentile(obs_type, timespan, aggregate_type, percentile, db_manager):
+        """Calculate a percentile exactly, from all the values in the main archive table."""
+
+        sql_type = 'windSpeed' if obs_type == 'wind' else obs_type
+        sql_stmt = "SELECT %(sql_type)s FROM %(table_name)s " \
+                   "WHERE dateTime > %(start)s AND dateTime <= %(stop)s " \
+                   "AND %(sql_type)s IS NOT NULL" \
+                   % {
+                       'sql_type': sql_type,
+                       'table_name': db_manager.table_name,
+                       'start': timespan.start,
+                       'stop': timespan.stop
+                   }
+        try:
+            values = [row[0] for row in db_manager.genSql(sql_stmt)]
+        except weedb.NoColumnError:
+            raise weewx.UnknownType(obs_type)
+
+        u, g = weewx.units.getStandardUnitType(db_manager.std_unit_system, obs_type,
+                                               aggregate_type)
+        return weewx.units.ValueTuple(weeutil.sketch.quantile(values, percentile), u, g)
+
     @staticmethod
     def get_wind_aggregate_long(obs_type, timespan, aggregate_type, db_manager):
         """Calculate the math algorithm for vecdir and vecavg in Python. Suitable for
@@ -460,83 +750,97 @@ class ArchiveTable(XType):
 #
 
 class DailySummaries(XType):
-    """Calculate from the daily summaries."""
+    """Calculate from the daily summaries, and from any hourly and monthly rollups."""
 
     # Set of SQL statements to be used for calculating simple aggregates from the daily summaries.
+    # The table is either a daily summary, or a union of rows from daily summaries and rollups.
     agg_sql_dict = {
-        'avg': "SELECT SUM(wsum),SUM(sumtime) FROM %(table_name)s_day_%(obs_key)s "
+        'avg': "SELECT SUM(wsum),SUM(sumtime) FROM %(table)s "
                "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'avg_ge': "SELECT SUM((wsum/sumtime) >= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'avg_ge': "SELECT SUM((wsum/sumtime) >= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s and sumtime <> 0",
-        'avg_le': "SELECT SUM((wsum/sumtime) <= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'avg_le': "SELECT SUM((wsum/sumtime) <= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s and sumtime <> 0",
-        'count': "SELECT SUM(count) FROM %(table_name)s_day_%(obs_key)s "
+        'count': "SELECT SUM(count) FROM %(table)s "
                  "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'gustdir': "SELECT max_dir FROM %(table_name)s_day_%(obs_key)s  "
+        'gustdir': "SELECT max_dir FROM %(table)s  "
                    "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                    "ORDER BY max DESC, maxtime ASC LIMIT 1",
-        'max': "SELECT MAX(max) FROM %(table_name)s_day_%(obs_key)s "
+        'max': "SELECT MAX(max) FROM %(table)s "
                "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'max_ge': "SELECT SUM(max >= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'max_ge': "SELECT SUM(max >= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'max_le': "SELECT SUM(max <= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'max_le': "SELECT SUM(max <= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'maxmin': "SELECT MAX(min) FROM %(table_name)s_day_%(obs_key)s "
+        'maxmin': "SELECT MAX(min) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'maxmintime': "SELECT mintime FROM %(table_name)s_day_%(obs_key)s  "
+        'maxmintime': "SELECT mintime FROM %(table)s  "
                       "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                       "AND mintime IS NOT NULL "
                       "ORDER BY min DESC, mintime ASC LIMIT 1",
-        'maxsum': "SELECT MAX(sum) FROM %(table_name)s_day_%(obs_key)s "
+        'maxsum': "SELECT MAX(sum) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'maxsumtime': "SELECT dateTime FROM %(table_name)s_day_%(obs_key)s  "
+        'maxsumtime': "SELECT dateTime FROM %(table)s  "
                       "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                       "ORDER BY sum DESC, dateTime ASC LIMIT 1",
-        'maxtime': "SELECT maxtime FROM %(table_name)s_day_%(obs_key)s  "
+        'maxtime': "SELECT maxtime FROM %(table)s  "
                    "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                    "AND maxtime IS NOT NULL "
                    "ORDER BY max DESC, maxtime ASC LIMIT 1",
-        'meanmax': "SELECT AVG(max) FROM %(table_name)s_day_%(obs_key)s "
+        'meanmax': "SELECT AVG(max) FROM %(table)s "
                    "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'meanmin': "SELECT AVG(min) FROM %(table_name)s_day_%(obs_key)s "
+        'meanmin': "SELECT AVG(min) FROM %(table)s "
                    "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'min': "SELECT MIN(min) FROM %(table_name)s_day_%(obs_key)s "
+        'min': "SELECT MIN(min) FROM %(table)s "
                "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'min_ge': "SELECT SUM(min >= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'min_ge': "SELECT SUM(min >= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'min_le': "SELECT SUM(min <= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'min_le': "SELECT SUM(min <= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'minmax': "SELECT MIN(max) FROM %(table_name)s_day_%(obs_key)s "
+        'minmax': "SELECT MIN(max) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'minmaxtime': "SELECT maxtime FROM %(table_name)s_day_%(obs_key)s  "
+        'minmaxtime': "SELECT maxtime FROM %(table)s  "
                       "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                       "AND maxtime IS NOT NULL "
                       "ORDER BY max ASC, maxtime ASC ",
-        'minsum': "SELECT MIN(sum) FROM %(table_name)s_day_%(obs_key)s "
+        'minsum': "SELECT MIN(sum) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'minsumtime': "SELECT dateTime FROM %(table_name)s_day_%(obs_key)s  "
+        'minsumtime': "SELECT dateTime FROM %(table)s  "
                       "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                       "ORDER BY sum ASC, dateTime ASC LIMIT 1",
-        'mintime': "SELECT mintime FROM %(table_name)s_day_%(obs_key)s  "
+        'mintime': "SELECT mintime FROM %(table)s  "
                    "WHERE dateTime >= %(start)s AND dateTime < %(stop)s "
                    "AND mintime IS NOT NULL "
                    "ORDER BY min ASC, mintime ASC LIMIT 1",
-        'not_null': "SELECT count>0 as c FROM %(table_name)s_day_%(obs_key)s "
+        'not_null': "SELECT count>0 as c FROM %(table)s "
                     "WHERE dateTime >= %(start)s AND dateTime < %(stop)s ORDER BY c DESC LIMIT 1",
-        'rms': "SELECT SUM(wsquaresum),SUM(sumtime) FROM %(table_name)s_day_%(obs_key)s "
+        'rms': "SELECT SUM(wsquaresum),SUM(sumtime) FROM %(table)s "
                "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'sum': "SELECT SUM(sum) FROM %(table_name)s_day_%(obs_key)s "
+        'sum': "SELECT SUM(sum) FROM %(table)s "
                "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'sum_ge': "SELECT SUM(sum >= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'sum_ge': "SELECT SUM(sum >= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'sum_le': "SELECT SUM(sum <= %(val)s) FROM %(table_name)s_day_%(obs_key)s "
+        'sum_le': "SELECT SUM(sum <= %(val)s) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'vecavg': "SELECT SUM(xsum),SUM(ysum),SUM(sumtime)  FROM %(table_name)s_day_%(obs_key)s "
+        'vecavg': "SELECT SUM(xsum),SUM(ysum),SUM(sumtime)  FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
-        'vecdir': "SELECT SUM(xsum),SUM(ysum) FROM %(table_name)s_day_%(obs_key)s "
+        'vecdir': "SELECT SUM(xsum),SUM(ysum) FROM %(table)s "
                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s",
     }
 
+    # Aggregates that come out the same, whether they are calculated from the daily summaries, or
+    # from the hourly and monthly rollups. The others, such as 'meanmax', are about days.
+    rollup_aggregates = {'avg', 'count', 'gustdir', 'max', 'maxtime', 'min', 'mintime',
+                         'not_null', 'rms', 'sum', 'vecavg', 'vecdir'}
+
+    # Functions that return the timespan of the row of a summary that includes an archive
+    # timestamp.
+    summary_spans = {
+        'month': weeutil.weeutil.archiveMonthSpan,
+        'day': weeutil.weeutil.archiveDaySpan,
+        'hour': weeutil.weeutil.archiveHourSpan,
+    }
+
     @staticmethod
     def get_aggregate(obs_type, timespan, aggregate_type, db_manager, **option_dict):
         """Returns an aggregation of a statistical type for a given time period,
@@ -562,12 +866,25 @@ class DailySummaries(XType):
 
         aggregate_type = aggregate_type.lower()
 
+        # Percentiles come from the sketches of the days, if there are any
+        percentile = get_percentile(aggregate_type)
+        if percentile is not None:
+            return DailySummaries.get_percentile(obs_type, timespan, aggregate_type, percentile,
+                                                 db_manager)
+
         # Raise exception if we don't know about this type of aggregation
         if aggregate_type not in DailySummaries.agg_sql_dict:
             raise weewx.UnknownAggregation(aggregate_type)
 
-        # Check to see whether we can use the daily summaries:
-        DailySummaries.check_eligibility(obs_type, timespan, db_manager, aggregate_type)
+        # Check to see whether we can use the daily summaries, and which rollups to use with them:
+        pieces = DailySummaries.plan_summaries(obs_type, timespan, db_manager, aggregate_type)
+        if len(pieces) == 1:
+            table = "%s_%s_%s" % (db_manager.table_name, pieces[0][0], obs_type)
+        else:
+            table = "(%s) AS summary" % " UNION ALL ".join(
+                "SELECT * FROM %s_%s_%s WHERE dateTime >= %s AND dateTime < %s"
+                % (db_manager.table_name, summary, obs_type, start, stop)
+                for summary, start, stop in pieces)
 
         val = option_dict.get('val')
         if val is None:
@@ -586,16 +903,23 @@ class DailySummaries(XType):
 
         # Form the interpolation dictionary
         inter_dict = {
-            'start': weeutil.weeutil.startOfDay(timespan.start),
-            'stop': timespan.stop,
+            'start': min(piece[1] for piece in pieces),
+            'stop': max(piece[2] for piece in pieces),
             'obs_key': obs_type,
             'aggregate_type': aggregate_type,
             'val': target_val,
+            'table': table,
             'table_name': db_manager.table_name
         }
 
-        # Run the query against the database:
-        row = db_manager.getSql(DailySummaries.agg_sql_dict[aggregate_type] % inter_dict)
+        # If the timespan is one of a sequence whose aggregates are being prefetched, the row
+        # comes from the prefetch. Otherwise, run the query against the database:
+        prefetch = option_dict.get('prefetch')
+        if prefetch is not None and prefetch.covers(timespan) \
+                and (inter_dict['start'], inter_dict['stop']) == (timespan.start, timespan.stop):
+            row = prefetch.get_row(obs_type, timespan, aggregate_type, target_val, db_manager)
+        else:
+            row = db_manager.getSql(DailySummaries.agg_sql_dict[aggregate_type] % inter_dict)
 
         # Each aggregation type requires a slightly different calculation.
         if not row or None in row:
@@ -757,21 +1081,307 @@ class DailySummaries(XType):
                 ValueTuple(data_list, unit, unit_group))
 
     @staticmethod
-    def check_eligibility(obs_type, timespan, db_manager, aggregate_type):
+    def reduce_rows(rows, aggregate_type):
+        """Calculate a simple aggregate from a list of daily summary, or rollup, rows.
+
+        This gives the same result as get_aggregate() would, but from rows that have already been
+        retrieved.
+
+        Args:
+            rows (list[tuple]): Rows from a daily summary, holding dateTime, min, max, sum,
+                count, wsum, and sumtime, in that order.
+            aggregate_type (str): One of 'min', 'max', 'sum', 'count', or 'avg'.
+
+        Returns:
+            float|int|None: The aggregate.
+        """
+
+        def column(i):
+            # Like the SQL aggregate functions, ignore nulls
+            return [row[i] for row in rows if row[i] is not None]
+
+        if aggregate_type == 'min':
+            values = column(1)
+            return min(values) if values else None
+        elif aggregate_type == 'max':
+            values = column(2)
+            return max(values) if values else None
+        elif aggregate_type == 'sum':
+            values = column(3)
+            return sum(values) if values else None
+        elif aggregate_type == 'count':
+            values = column(4)
+            return int(sum(values)) if values else None
+        elif aggregate_type == 'avg':
+            wsums, sumtimes = column(5), column(6)
+            if not wsums or not sumtimes:
+                return None
+            sumtime = sum(sumtimes)
+            return sum(wsums) / sumtime if sumtime else None
+        else:
+            # Should not have made it here. Fail hard.
+            raise ValueError("Unknown aggregation type %s" % aggregate_type)
+
+    @staticmethod
+    def get_percentile(obs_type, timespan, aggregate_type, percentile, db_manager):
+        """Estimate a percentile by merging the sketches of the days in a timespan. The estimate
+        is within 1 percent of a value in the archive that is ranked close to the percentile."""
+
+        if obs_type not in (getattr(db_manager, 'sketchkeys', None) or ()):
+            raise weewx.UnknownAggregation(aggregate_type)
+        DailySummaries.check_eligibility(obs_type, timespan, db_manager, aggregate_type)
+
+        sql_stmt = "SELECT sketch FROM %(table_name)s_sketch_%(obs_type)s " \
+                   "WHERE dateTime >= %(start)s AND dateTime < %(stop)s" \
+                   % {
+                       'table_name': db_manager.table_name,
+                       'obs_type': obs_type,
+                       'start': weeutil.weeutil.startOfDay(timespan.start),
+                       'stop': timespan.stop
+                   }
+        sketch = weeutil.sketch.QuantileSketch()
+        for row in db_manager.genSql(sql_stmt):
+            if row[0]:
+                sketch.merge(weeutil.sketch.QuantileSketch.from_string(row[0]))
+
+        u, g = weewx.units.getStandardUnitType(db_manager.std_unit_system, obs_type,
+                                               aggregate_type)
+        return weewx.units.ValueTuple(sketch.quantile(percentile), u, g)
+
+    @staticmethod
+    def check_eligibility(obs_type, timespan, db_manager, aggregate_type, summary='day'):
+        """Check whether an aggregate can be calculated from a summary alone.
+
+        Args:
+            obs_type (str): The type to be aggregated.
+            timespan (TimeSpan): The timespan over which aggregation is to be done.
+            db_manager (weewx.manager.Manager): An open database manager.
+            aggregate_type (str): The type of aggregation.
+            summary (str): The summary to be used. Either 'day' for the daily summaries, or
+                'hour' or 'month' for a rollup. Default is 'day'.
+
+        Raises:
+            weewx.UnknownType: If there are no daily summaries of the type.
+            weewx.UnknownAggregation: If the summary cannot be used for the aggregate.
+        """
 
         # It has to be a type we know about
         if not hasattr(db_manager, 'daykeys') or obs_type not in db_manager.daykeys:
             raise weewx.UnknownType(obs_type)
 
-        # We cannot use the day summaries if the starting and ending times of the aggregation
-        # interval are not on midnight boundaries, and are not the first or last records in the
-        # database.
+        # A rollup has to exist, and to give the same answer as the daily summaries would
+        if summary not in DailySummaries.get_summaries(obs_type, db_manager, aggregate_type):
+            raise weewx.UnknownAggregation(aggregate_type)
+
+        # We cannot use the summaries if the starting and ending times of the aggregation
+        # interval are not on the boundaries of their rows (midnight, for the day summaries), and
+        # are not the first or last records in the database.
         if db_manager.first_timestamp is None or db_manager.last_timestamp is None:
             raise weewx.UnknownAggregation(aggregate_type)
-        if not (isStartOfDay(timespan.start) or timespan.start == db_manager.first_timestamp) \
-                or not (isStartOfDay(timespan.stop) or timespan.stop == db_manager.last_timestamp):
+        if not (DailySummaries._is_boundary(summary, timespan.start)
+                or timespan.start == db_manager.first_timestamp) \
+                or not (DailySummaries._is_boundary(summary, timespan.stop)
+                        or timespan.stop == db_manager.last_timestamp):
             raise weewx.UnknownAggregation(aggregate_type)
 
+    @staticmethod
+    def get_summaries(obs_type, db_manager, aggregate_type):
+        """Return the summaries that can be used for an aggregate, from the coarsest to the
+        finest. The daily summaries are always included, even if they do not exist."""
+        rollupkeys = getattr(db_manager, 'rollupkeys', None) or {}
+        return [summary for summary in DailySummaries.summary_spans
+                if summary == 'day'
+                or (aggregate_type in DailySummaries.rollup_aggregates
+                    and obs_type in rollupkeys.get(summary, ()))]
+
+    @staticmethod
+    def plan_summaries(obs_type, timespan, db_manager, aggregate_type):
+        """Split a timespan into pieces that can be calculated from the daily summaries and any
+        rollups, using the coarsest summary that fits each piece.
+
+        For example, given monthly and hourly rollups, a timespan from 18:00 on 30 January to
+        06:00 on 2 April is split into 6 hours from the hourly rollup, 1 day from the daily
+        summaries, 2 months from the monthly rollup, 1 day from the daily summaries, and 6 hours
+        from the hourly rollup.
+
+        Args:
+            obs_type (str): The type to be aggregated.
+            timespan (TimeSpan): The timespan over which aggregation is to be done.
+            db_manager (weewx.manager.Manager): An open database manager.
+            aggregate_type (str): The type of aggregation.
+
+        Returns:
+            list[tuple[str, int, int]]: A list of tuples (summary, start, stop). Each one stands
+                for the rows of a summary ('month', 'day', or 'hour') that start at, or after
+                start, and before stop.
+
+        Raises:
+            weewx.UnknownType: If there are no daily summaries of the type.
+            weewx.UnknownAggregation: If the summaries cannot be used for the aggregate.
+        """
+        summaries = DailySummaries.get_summaries(obs_type, db_manager, aggregate_type)
+        # The finest summary has to fit the timespan.
+        finest = summaries[-1]
+        DailySummaries.check_eligibility(obs_type, timespan, db_manager, aggregate_type, finest)
+        start = DailySummaries._floor(finest, timespan.start)
+        stop = DailySummaries._ceil(finest, timespan.stop)
+
+        pieces = list()
+        ranges = [(start, stop)]
+        # Take as much as possible from each coarser summary. What is left over at either end
+        # goes to the next finer one.
+        for summary in summaries[:-1]:
+            remaining = list()
+            for range_start, range_stop in ranges:
+                first = DailySummaries._ceil(summary, range_start)
+                last = DailySummaries._floor(summary, range_stop)
+                if first < last:
+                    pieces.append((summary, first, last))
+                    remaining.extend([(range_start, first), (last, range_stop)])
+                else:
+                    remaining.append((range_start, range_stop))
+            ranges = [(a, b) for a, b in remaining if a < b]
+        pieces.extend((finest, a, b) for a, b in ranges)
+        return pieces or [(finest, start, stop)]
+
+    @staticmethod
+    def _is_boundary(summary, time_ts):
+        """Is a time on the boundary between two rows of a summary?"""
+        if summary == 'day':
+            return isStartOfDay(time_ts)
+        return DailySummaries.summary_spans[summary](time_ts).stop == time_ts
+
+    @staticmethod
+    def _floor(summary, time_ts):
+        """Return the start of the row of a summary that includes a time, or the time itself if
+        it is on a boundary."""
+        if summary == 'day':
+            return weeutil.weeutil.startOfDay(time_ts)
+        if DailySummaries._is_boundary(summary, time_ts):
+            return time_ts
+        return DailySummaries.summary_spans[summary](time_ts).start
+
+    @staticmethod
+    def _ceil(summary, time_ts):
+        """Return the stop of the row of a summary that includes a time, or the time itself if
+        it is on a boundary."""
+        if DailySummaries._is_boundary(summary, time_ts):
+            return time_ts
+        return DailySummaries.summary_spans[summary](time_ts).stop
+
+
+#
+# ######################## Class SpanPrefetch ##############################
+#
+
+class SpanPrefetch:
+    """Prefetches the rows needed to calculate aggregates from the daily summaries, for a
+    sequence of timespans, such as the days of a month, or the months of a year.
+
+    Without a prefetch, each aggregate of each timespan is a query of its own. With it, the first
+    time an aggregate is asked for, the rows of the daily summary for all the timespans are read
+    with a single query, then divided among the timespans. The rows for the other timespans are
+    then served from memory.
+
+    Only timespans that start and stop at midnight can be prefetched.
+    """
+
+    def __init__(self, timespans):
+        """Initialize an instance of SpanPrefetch.
+
+        Args:
+            timespans (list[TimeSpan]): The timespans. They must be in order, and must not
+                overlap.
+        """
+        self.timespans = [span for span in timespans
+                          if isStartOfDay(span.start) and isStartOfDay(span.stop)]
+        self.index = {tuple(span): i for i, span in enumerate(self.timespans)}
+        self.starts = [span.start for span in self.timespans]
+        # Key is (database, table, last timestamp, obs_type, aggregate_type, val). Value is a
+        # list, with the row of each timespan.
+        self.rows = {}
+        self.queries = 0
+
+    def covers(self, timespan):
+        """True if the aggregates of a timespan are prefetched."""
+        return tuple(timespan) in self.index
+
+    def get_row(self, obs_type, timespan, aggregate_type, target_val, db_manager):
+        """Return the row that the query of DailySummaries.agg_sql_dict would return for
+        a timespan, or None if there would be no row."""
+        key = (db_manager.database_name, db_manager.table_name, db_manager.last_timestamp,
+               obs_type, aggregate_type, target_val)
+        if key not in self.rows:
+            self.rows[key] = self._fetch(obs_type, aggregate_type, target_val, db_manager)
+        return self.rows[key][self.index[tuple(timespan)]]
+
+    def _fetch(self, obs_type, aggregate_type, target_val, db_manager):
+        """Run the query of an aggregate for all the timespans at once."""
+        sql = DailySummaries.agg_sql_dict[aggregate_type] % {
+            'start': self.timespans[0].start,
+            'stop': self.timespans[-1].stop,
+            'val': target_val,
+            'table': "%s_day_%s" % (db_manager.table_name, obs_type),
+        }
+        rows = [None] * len(self.timespans)
+        self.queries += 1
+        if 'ORDER BY' in sql:
+            # These queries pick the first of the ordered rows of the daily summary. Pick the
+            # first one of each timespan instead.
+            sql = sql.replace(' LIMIT 1', '').replace('SELECT ', 'SELECT dateTime, ', 1)
+            for row in db_manager.genSql(sql):
+                i = self._find(row[0])
+                if i is not None and rows[i] is None:
+                    rows[i] = row[1:]
+        else:
+            # The others aggregate the rows of the daily summary. Let the database evaluate the
+            # expression of each row, then aggregate them by timespan. Grouping by timespan in SQL
+            # would mean testing each row against every timespan.
+            select, rest = sql[len('SELECT '):].split(' FROM ', 1)
+            functions, expressions = zip(*[SpanPrefetch._parse_term(term)
+                                           for term in select.split(',')])
+            sql = "SELECT dateTime, %s FROM %s ORDER BY dateTime" % (', '.join(expressions), rest)
+            # The non-null values of each expression, for each timespan
+            columns = [None] * len(self.timespans)
+            for row in db_manager.genSql(sql):
+                i = self._find(row[0])
+                if i is None:
+                    continue
+                if columns[i] is None:
+                    columns[i] = [[] for _ in expressions]
+                for column, value in zip(columns[i], row[1:]):
+                    if value is not None:
+                        column.append(value)
+            for i, span_columns in enumerate(columns):
+                if span_columns is not None:
+                    # Like SQL, the aggregate of nothing but nulls is null.
+                    rows[i] = tuple(function(column) if column else None
+                                    for function, column in zip(functions, span_columns))
+        return rows
+
+    def _find(self, ts):
+        """Return the index of the timespan that holds a timestamp, or None if there is none."""
+        i = bisect.bisect_right(self.starts, ts) - 1
+        if i >= 0 and ts < self.timespans[i].stop:
+            return i
+        return None
+
+    # The SQL aggregate functions used by DailySummaries.agg_sql_dict
+    sql_functions = {
+        'SUM': sum,
+        'MAX': max,
+        'MIN': min,
+        'AVG': lambda values: sum(values) / len(values),
+    }
+
+    @staticmethod
+    def _parse_term(term):
+        """Split a term such as 'SUM(wsum)' into its aggregate function, and its expression."""
+        match = re.match(r'(\w+)\((.*)\)$', term.strip())
+        if not match or match.group(1).upper() not in SpanPrefetch.sql_functions:
+            raise ValueError("Unexpected error. Cannot prefetch '%s'" % term)
+        return SpanPrefetch.sql_functions[match.group(1).upper()], match.group(2)
+
 
 #
 # ######################## Class AggregateHeatCool ##############################
@@ -786,6 +1396,8 @@ class AggregateHeatCool(XType):
     default_coolbase = (65.0, "degree_F", "group_temperature")
     default_growbase = (50.0, "degree_F", "group_temperature")
 
+    heatcool_types = ('heatdeg', 'cooldeg', 'growdeg')
+
     @staticmethod
     def get_aggregate(obs_type, timespan, aggregate_type, db_manager, **option_dict):
         """Returns heating and cooling degree days over a time period.
@@ -806,7 +1418,7 @@ class AggregateHeatCool(XType):
         """
 
         # Check to see whether heating or cooling degree days are being asked for:
-        if obs_type not in ['heatdeg', 'cooldeg', 'growdeg']:
+        if obs_type not in AggregateHeatCool.heatcool_types:
             raise weewx.UnknownType(obs_type)
 
         # Only summation (total) or average heating or cooling degree days is supported:
@@ -827,11 +1439,19 @@ class AggregateHeatCool(XType):
         growbase_t = weewx.units.convertStd((float(growbase[0]), growbase[1], "group_temperature"),
                                             db_manager.std_unit_system)
 
+        day_spans = list(weeutil.weeutil.genDaySpans(timespan.start, timespan.stop))
+        # Get the average temperatures of all the days with one query, unless they are already
+        # being prefetched.
+        prefetch = option_dict.get('prefetch')
+        if prefetch is None or not all(prefetch.covers(day_span) for day_span in day_spans):
+            prefetch = SpanPrefetch(day_spans)
+
         total = 0.0
         count = 0
-        for daySpan in weeutil.weeutil.genDaySpans(timespan.start, timespan.stop):
+        for daySpan in day_spans:
             # Get the average temperature for the day as a value tuple:
-            Tavg_t = DailySummaries.get_aggregate('outTemp', daySpan, 'avg', db_manager)
+            Tavg_t = DailySummaries.get_aggregate('outTemp', daySpan, 'avg', db_manager,
+                                                  prefetch=prefetch)
             # Make sure it's valid before including it in the aggregation:
             if Tavg_t is not None and Tavg_t[0] is not None:
                 if aggregate_type == 'not_null':
@@ -864,6 +1484,9 @@ class XTypeTable(XType):
     this version calculates it on the fly. Note: this version only works if no aggregation has
     been requested."""
 
+    # How many records to hand to get_scalar_array() at a time
+    chunk_size = 1000
+
     @staticmethod
     def get_series(obs_type, timespan, db_manager, aggregate_type=None, aggregate_interval=None,
                    **option_dict):
@@ -885,23 +1508,14 @@ class XTypeTable(XType):
             std_unit_system = None
 
             # Hit the database.
-            for record in db_manager.genBatchRecords(*timespan):
-
-                if std_unit_system:
-                    if std_unit_system != record['usUnits']:
-                        raise weewx.UnsupportedFeature("Unit system cannot change "
-                                                       "within a series.")
-                else:
-                    std_unit_system = record['usUnits']
-
-                # Given a record, use the xtypes system to calculate a value:
-                try:
-                    value = get_scalar(obs_type, record, db_manager)
-                    data_vec.append(value[0])
-                except weewx.CannotCalculate:
-                    data_vec.append(None)
-                start_vec.append(record['dateTime'] - record['interval'] * 60)
-                stop_vec.append(record['dateTime'])
+            for columns in XTypeTable.gen_columns(timespan, db_manager):
+                std_unit_system = columns['usUnits']
+                # Given a chunk of records, use the xtypes system to calculate the values:
+                data_vec.extend(XTypeTable._calc_values(obs_type, columns, db_manager))
+                start_vec.extend(ts - interval * 60
+                                 for ts, interval in zip(columns['dateTime'],
+                                                         columns['interval']))
+                stop_vec.extend(columns['dateTime'])
 
             unit, unit_group = weewx.units.getStandardUnitType(std_unit_system, obs_type)
 
@@ -913,9 +1527,10 @@ class XTypeTable(XType):
     def get_aggregate(obs_type, timespan, aggregate_type, db_manager, **option_dict):
         """Calculate an aggregate value for an xtype. Addresses issue #864. """
 
-        # This version offers a limited set of aggregation types
+        # This version offers a limited set of aggregation types, and percentiles
+        percentile = get_percentile(aggregate_type)
         if aggregate_type not in {'sum', 'count', 'avg', 'max', 'min',
-                                  'mintime', 'maxtime', 'not_null'}:
+                                  'mintime', 'maxtime', 'not_null'} and percentile is None:
             raise weewx.UnknownAggregation(aggregate_type)
 
         std_unit_system = None
@@ -925,36 +1540,34 @@ class XTypeTable(XType):
         maximum = None
         mintime = None
         maxtime = None
+        # The values, if they are needed for a percentile
+        values_seen = []
 
         # Hit the database.
-        for record in db_manager.genBatchRecords(*timespan):
-            if std_unit_system:
-                if std_unit_system != record['usUnits']:
-                    raise weewx.UnsupportedFeature("Unit system cannot change within the database")
-            else:
-                std_unit_system = record['usUnits']
+        for columns in XTypeTable.gen_columns(timespan, db_manager):
+            std_unit_system = columns['usUnits']
 
-            # Given a record, use the xtypes system to calculate a value. If the value cannot be
-            # calculated a CannotCalculate exception will be raised. Be prepared to catch it.
-            try:
-                # A ValueTuple will be returned, so use only the first element.
-                value = get_scalar(obs_type, record, db_manager)[0]
-            except weewx.CannotCalculate:
-                value = None
+            # Given a chunk of records, use the xtypes system to calculate the values.
+            values = XTypeTable._calc_values(obs_type, columns, db_manager)
 
-            if value is not None:
-                if aggregate_type == 'not_null':
-                    return ValueTuple(True, 'boolean', 'group_boolean')
-                total += value
-                count += 1
-                if minimum is None or value < minimum:
-                    minimum = value
-                    mintime = record['dateTime']
-                if maximum is None or value > maximum:
-                    maximum = value
-                    maxtime = record['dateTime']
-
-        if aggregate_type == 'sum':
+            for value, ts in zip(values, columns['dateTime']):
+                if value is not None:
+                    if aggregate_type == 'not_null':
+                        return ValueTuple(True, 'boolean', 'group_boolean')
+                    total += value
+                    count += 1
+                    if minimum is None or value < minimum:
+                        minimum = value
+                        mintime = ts
+                    if maximum is None or value > maximum:
+                        maximum = value
+                        maxtime = ts
+                    if percentile is not None:
+                        values_seen.append(value)
+
+        if percentile is not None:
+            result = weeutil.sketch.quantile(values_seen, percentile)
+        elif aggregate_type == 'sum':
             result = total
         elif aggregate_type == 'count':
             result = count
@@ -978,6 +1591,122 @@ class XTypeTable(XType):
 
         return weewx.units.ValueTuple(result, u, g)
 
+    @staticmethod
+    def gen_columns(timespan, db_manager):
+        """Generator function that yields the archive records within a timespan, organized by
+        column, a chunk at a time.
+
+        Args:
+            timespan (TimeSpan): The records in this timespan will be returned.
+            db_manager (weewx.manager.Manager): An open database manager.
+
+        Yields:
+            ArchiveColumns: A chunk of up to XTypeTable.chunk_size records, in the form expected
+                by get_scalar_array().
+        """
+        # Start by reading only the timestamps. The other columns are read as they are needed.
+        # Each chunk is yielded as soon as it is full, so only one chunk is held at a time.
+        chunk = list()
+        chunk_start = timespan[0]
+        std_unit_system = None
+        last_time = 0
+        for row in db_manager.genBatchRows(*timespan,
+                                           columns=['dateTime', 'usUnits', 'interval']):
+            # The following is to get around a bug in sqlite when all the tables are in one file:
+            if row[0] <= last_time:
+                continue
+            last_time = row[0]
+            if std_unit_system:
+                if std_unit_system != row[1]:
+                    raise weewx.UnsupportedFeature("Unit system cannot change "
+                                                   "within a series.")
+            else:
+                std_unit_system = row[1]
+            chunk.append(row)
+            if len(chunk) >= XTypeTable.chunk_size:
+                yield XTypeTable._make_columns(db_manager, chunk_start, std_unit_system, chunk)
+                chunk_start = chunk[-1][0]
+                chunk = list()
+
+        if chunk:
+            yield XTypeTable._make_columns(db_manager, chunk_start, std_unit_system, chunk)
+
+    @staticmethod
+    def _make_columns(db_manager, chunk_start, std_unit_system, chunk):
+        """Organize a chunk of rows of timestamps, unit systems, and intervals by column."""
+        return ArchiveColumns(db_manager, (chunk_start, chunk[-1][0]), std_unit_system,
+                              {'dateTime': tuple(row[0] for row in chunk),
+                               'interval': tuple(row[2] for row in chunk)})
+
+    @staticmethod
+    def _calc_values(obs_type, columns, db_manager):
+        """Calculate the values of an xtype for a chunk of records."""
+        try:
+            return get_scalar_array(obs_type, columns, db_manager)[0]
+        except weewx.CannotCalculate:
+            return [None] * len(columns['dateTime'])
+
+
+class ArchiveColumns(collections.abc.Mapping):
+    """A chunk of archive records, organized by column, in the form expected by
+    get_scalar_array(). A column is only read from the database the first time it is used."""
+
+    def __init__(self, db_manager, timespan, std_unit_system, columns):
+        """Initialize an instance of ArchiveColumns.
+
+        Args:
+            db_manager (weewx.manager.Manager): An open database manager.
+            timespan (tuple[float, float]): The exclusive start and inclusive stop of the chunk.
+            std_unit_system (int): The unit system of all the records.
+            columns (dict): The columns that have already been read. Must include 'dateTime'.
+        """
+        self.db_manager = db_manager
+        self.timespan = timespan
+        self.std_unit_system = std_unit_system
+        self.columns = columns
+
+    def __getitem__(self, key):
+        if key == 'usUnits':
+            return self.std_unit_system
+        if key not in self.columns:
+            if key not in self.db_manager.sqlkeys:
+                raise KeyError(key)
+            self.load([key])
+        return self.columns[key]
+
+    def __contains__(self, key):
+        return key in self.db_manager.sqlkeys
+
+    def __iter__(self):
+        return iter(self.db_manager.sqlkeys)
+
+    def __len__(self):
+        return len(self.db_manager.sqlkeys)
+
+    def items(self):
+        # Read all the columns in a single query.
+        self.load(self.db_manager.sqlkeys)
+        return super().items()
+
+    def values(self):
+        self.load(self.db_manager.sqlkeys)
+        return super().values()
+
+    def load(self, keys):
+        """Read the given columns from the database, if they have not been read already."""
+        keys = [key for key in keys if key != 'usUnits' and key not in self.columns]
+        if not keys:
+            return
+        rows = list(self.db_manager.genBatchRows(*self.timespan, columns=['dateTime'] + keys))
+        timestamps = self.columns['dateTime']
+        if len(rows) != len(timestamps) or any(row[0] != ts for row, ts in zip(rows, timestamps)):
+            # The archive has changed since the timestamps were read. Line the rows up with them.
+            rows_by_time = {row[0]: row for row in rows}
+            missing = (None,) * (len(keys) + 1)
+            rows = [rows_by_time.get(ts, missing) for ts in timestamps]
+        for i, key in enumerate(keys, start=1):
+            self.columns[key] = tuple(row[i] for row in rows)
+
 
 # ############################# WindVec extensions #########################################
 